@@ -0,0 +1,47 @@
+import math
+import wave
+from array import array
+
+SAMPLE_RATE = 16000
+
+def _tone(frequency: float, seconds: float, amplitude: int = 8000) -> array:
+    samples = int(seconds * SAMPLE_RATE)
+    return array("h", (int(amplitude * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)) for i in range(samples)))
+
+def synth_samples(duration: float, tone_seconds: float = 4.0, silence_seconds: float = 1.0) -> array:
+    """
+    Builds a deterministic 16 kHz mono int16 signal of alternating tones and silence.
+    Each tone block uses a different pitch so consecutive "utterances" are distinguishable.
+    """
+    frequencies = (220.0, 330.0, 440.0, 550.0)
+    blocks = [_tone(f, tone_seconds) for f in frequencies]
+    silence = array("h", bytes(2 * int(silence_seconds * SAMPLE_RATE)))
+
+    total = int(duration * SAMPLE_RATE)
+    samples = array("h")
+    i = 0
+    while len(samples) < total:
+        samples.extend(blocks[i % len(blocks)])
+        samples.extend(silence)
+        i += 1
+    del samples[total:]
+    return samples
+
+def write_wav(path: str, duration: float, **kwargs) -> str:
+    """Writes a synthetic tones-plus-silence WAV file of the given length in seconds."""
+    samples = synth_samples(duration, **kwargs)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+    return path
+
+def read_wav(path: str, sampling_rate: int = SAMPLE_RATE) -> array:
+    """Reads a WAV file written by write_wav back into int16 samples."""
+    with wave.open(path, "rb") as f:
+        if f.getframerate() != sampling_rate or f.getnchannels() != 1:
+            raise ValueError("Benchmark audio must be 16 kHz mono")
+        samples = array("h")
+        samples.frombytes(f.readframes(f.getnframes()))
+    return samples
@@ -0,0 +1,92 @@
+"""
+Cold-start cost of the web app.
+
+Starts a fresh interpreter per run (as a serverless cold start does), imports
+src.main under -X importtime and serves one request in-process, then reports
+the import time, the time to the first response, the slowest imports and
+which optional dependencies were pulled in. Each run gets an empty SQLite
+file, so the first request also pays for creating the schema.
+
+    cd backend
+    python -m benchmarks.bench_cold_start --runs 5 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies only some requests need; none should load at import time
+LAZY_MODULES = ("celery", "openai", "smtplib", "jose", "passlib", "jinja2", "faster_whisper")
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import src.main
+imported = time.perf_counter()
+loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+from fastapi.testclient import TestClient
+with TestClient(src.main.app) as client:
+    status = client.get(sys.argv[1]).status_code
+first = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (first - start) * 1000,
+    "status": status,
+    "loaded_at_import": loaded,
+}}))
+"""
+
+def parse_importtime(stderr: str, top: int):
+    """(module, cumulative ms) for the slowest imports in -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(cumulative) / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return [{"module": name, "cumulative_ms": round(ms, 1)} for name, ms in rows[:top]]
+
+def cold_start(path: str = "/", importtime: bool = False, env=None) -> dict:
+    """One cold start in a subprocess; with importtime, includes the raw -X importtime log."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE, path]
+    with tempfile.TemporaryDirectory() as workdir:
+        proc = subprocess.run(
+            cmd, cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+            env={**os.environ, "DB_URL": f"sqlite:///{os.path.join(workdir, 'cold.db')}", **(env or {})},
+        )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    if importtime:
+        result["importtime"] = proc.stderr
+    return result
+
+def run_benchmark(runs: int = 5, top: int = 15, path: str = "/") -> dict:
+    samples = [cold_start(path) for _ in range(runs)]
+    profiled = cold_start(path, importtime=True)
+    return {
+        "runs": runs,
+        "path": path,
+        "status": samples[-1]["status"],
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "first_response_ms": round(statistics.median(s["first_response_ms"] for s in samples), 1),
+        "lazy_modules_loaded_at_import": profiled["loaded_at_import"],
+        "slowest_imports": parse_importtime(profiled["importtime"], top),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import and first-response time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--path", default="/", help="Path of the first request")
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.runs, args.top, args.path), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
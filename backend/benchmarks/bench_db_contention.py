@@ -0,0 +1,119 @@
+"""
+SQLite contention between progress writes and status polls.
+
+Runs writer threads that bump job progress (one short transaction per
+segment, like BackgroundTasks jobs) next to reader threads that poll job
+status, against a scratch SQLite file. Compares a default engine with the
+engine built by models.make_engine (WAL, busy_timeout, synchronous=NORMAL).
+
+    cd backend
+    python -m benchmarks.bench_db_contention --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.models import Base, Transcription, make_engine
+
+def _default_engine(url: str):
+    # The engine settings used before tuning
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+def _tuned_engine(url: str):
+    return make_engine(url)
+
+ENGINES = {"default": _default_engine, "tuned": _tuned_engine}
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 3)
+
+def run_case(make, writers: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = make(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add_all(Transcription(id=f"job-{i}", status="processing") for i in range(writers))
+            db.commit()
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {"writes": 0, "reads": 0, "errors": 0, "read_ms": []}
+
+        def writer(task_id):
+            while not stop.is_set():
+                try:
+                    with Session() as db:
+                        trans = db.query(Transcription).filter(Transcription.id == task_id).first()
+                        trans.progress += 1
+                        db.commit()
+                    with lock:
+                        stats["writes"] += 1
+                except OperationalError:
+                    with lock:
+                        stats["errors"] += 1
+
+        def reader(i):
+            task_id = f"job-{i % writers}"
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    with Session() as db:
+                        db.query(Transcription.status, Transcription.progress).filter(Transcription.id == task_id).first()
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        stats["reads"] += 1
+                        stats["read_ms"].append(elapsed)
+                except OperationalError:
+                    with lock:
+                        stats["errors"] += 1
+
+        threads = [threading.Thread(target=writer, args=(f"job-{i}",)) for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+        for t in threads:
+            t.start()
+        time.sleep(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    return {
+        "writes_per_s": round(stats["writes"] / seconds, 1),
+        "reads_per_s": round(stats["reads"] / seconds, 1),
+        "locked_errors": stats["errors"],
+        "read_p50_ms": _percentile(stats["read_ms"], 50),
+        "read_p99_ms": _percentile(stats["read_ms"], 99),
+    }
+
+def run_benchmark(writers: int = 4, readers: int = 8, seconds: float = 5.0) -> dict:
+    return {
+        "writers": writers,
+        "readers": readers,
+        "seconds": seconds,
+        "engines": {name: run_case(make, writers, readers, seconds) for name, make in ENGINES.items()},
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SQLite progress-write vs status-read contention")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.writers, args.readers, args.seconds), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
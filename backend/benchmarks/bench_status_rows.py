@@ -0,0 +1,97 @@
+"""
+Status lookup cost on a database seeded with long transcripts.
+
+Seeds a scratch SQLite file with finished jobs whose text, translation and
+checkpoint columns are large, then times the lookups the hot paths make:
+
+- full_row: every column, as before the payload columns were deferred
+- orm_row: db.query(Transcription), which now skips the deferred payloads
+- status_columns: the narrow projection used by GET /status
+
+    cd backend
+    python -m benchmarks.bench_status_rows --jobs 200 --text-kb 1024
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, undefer
+
+from src.models import Base, Transcription
+
+PAYLOAD_COLUMNS = (Transcription.text, Transcription.translation, Transcription.timings, Transcription.checkpoint)
+
+def seed(session, jobs: int, text_kb: int) -> list[str]:
+    """Adds `jobs` finished transcriptions with ~text_kb KiB of text each."""
+    words = ("budget", "meeting", "review", "quarter", "launch", "customer", "pipeline", "forecast")
+    rng = random.Random(0)
+    ids = []
+    for _ in range(jobs):
+        text = " ".join(rng.choice(words) for _ in range(text_kb * 128))
+        task_id = str(uuid.uuid4())
+        ids.append(task_id)
+        session.add(Transcription(
+            id=task_id, status="done", progress=len(text) // 80, filename="long.mp3",
+            text=text, translation=text, timings={"inference": 1000.0},
+            checkpoint={"offset": 0.0, "segments": [{"start": 0.0, "end": 1.0, "text": text[:4096]}]},
+        ))
+    session.commit()
+    return ids
+
+def _full_row(db, task_id):
+    row = db.query(Transcription).options(*(undefer(c) for c in PAYLOAD_COLUMNS)).filter(Transcription.id == task_id).first()
+    return row.status, row.progress
+
+def _orm_row(db, task_id):
+    row = db.query(Transcription).filter(Transcription.id == task_id).first()
+    return row.status, row.progress
+
+def _status_columns(db, task_id):
+    row = (
+        db.query(Transcription.status, Transcription.progress, Transcription.error_message)
+        .filter(Transcription.id == task_id)
+        .first()
+    )
+    return row.status, row.progress
+
+QUERIES = {"full_row": _full_row, "orm_row": _orm_row, "status_columns": _status_columns}
+
+def run_benchmark(jobs: int = 200, text_kb: int = 1024, lookups: int = 500) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            ids = seed(db, jobs, text_kb)
+
+        rng = random.Random(1)
+        sample = [rng.choice(ids) for _ in range(lookups)]
+        report = {"jobs": jobs, "text_kb": text_kb, "lookups": lookups, "ms_per_lookup": {}}
+        for name, query in QUERIES.items():
+            # A fresh session per lookup, like one request or one progress write
+            start = time.perf_counter()
+            for task_id in sample:
+                with Session() as db:
+                    query(db, task_id)
+            report["ms_per_lookup"][name] = round((time.perf_counter() - start) * 1000 / lookups, 3)
+        engine.dispose()
+    return report
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Status lookup cost with large transcript payloads")
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--text-kb", type=int, default=1024, help="Approximate transcript size per job in KiB")
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.jobs, args.text_kb, args.lookups), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Offline benchmark for the transcription engine.
+
+Runs transcribe_with_whisper end to end on synthetic tones-plus-silence audio,
+against a deterministic stub model by default or a real (locally cached) model.
+No network access or GPU is required.
+
+    cd backend
+    python -m benchmarks.bench_transcribe --durations 30,300
+    python -m benchmarks.bench_transcribe --check            # compare with baseline.json
+    python -m benchmarks.bench_transcribe --update-baseline  # record a new baseline
+    python -m benchmarks.bench_transcribe --model tiny       # real model, must be cached
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src import models, tasks, transcribe, utils
+from .audio import SAMPLE_RATE, read_wav, write_wav
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Compared against the baseline; everything else in the report is informational.
+TRACKED_METRICS = ("rtf", "peak_rss_mb", "stages.progress_writes", "stages.merge_speakers", "stages.export")
+
+# Absolute slack added to stage baselines; small stage costs are dominated by I/O jitter.
+NOISE_FLOOR_MS = 25.0
+
+class StubWhisperModel:
+    """
+    Deterministic stand-in for faster_whisper.WhisperModel.
+    Emits one segment per voiced region, found with a cheap energy threshold,
+    and can simulate inference cost per second of audio.
+    """
+    def __init__(self, cost_per_audio_second: float = 0.0, window: float = 0.1, threshold: int = 1000):
+        self.cost_per_audio_second = cost_per_audio_second
+        self.window = int(window * SAMPLE_RATE)
+        self.threshold = threshold
+
+    def _voiced_regions(self, audio):
+        start = None
+        for offset in range(0, len(audio), self.window):
+            chunk = audio[offset:offset + self.window]
+            voiced = max(chunk) > self.threshold
+            if voiced and start is None:
+                start = offset
+            elif not voiced and start is not None:
+                yield start / SAMPLE_RATE, offset / SAMPLE_RATE
+                start = None
+        if start is not None:
+            yield start / SAMPLE_RATE, len(audio) / SAMPLE_RATE
+
+    def _segments(self, audio):
+        for i, (start, end) in enumerate(self._voiced_regions(audio)):
+            if self.cost_per_audio_second:
+                time.sleep(self.cost_per_audio_second * (end - start))
+            yield SimpleNamespace(start=start, end=end, text=f" Tone segment number {i}.")
+
+    def transcribe(self, audio, language=None, task="transcribe", **kwargs):
+        info = SimpleNamespace(
+            language=language or "en",
+            language_probability=1.0,
+            duration=len(audio) / SAMPLE_RATE,
+        )
+        return self._segments(audio), info
+
+def _speaker_turns(duration: float, turn: float = 5.0):
+    """Synthetic diarization output alternating two speakers every `turn` seconds."""
+    turns = []
+    t = 0.0
+    i = 0
+    while t < duration:
+        turns.append({"start": t, "end": min(duration, t + turn), "speaker": f"SPEAKER_{i % 2:02d}"})
+        t += turn
+        i += 1
+    return turns
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_case(duration: float, model: str = "stub", workdir: str | None = None, stub_cost: float = 0.0) -> dict:
+    """Benchmarks one synthetic file of `duration` seconds and returns its report."""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        audio_path = write_wav(os.path.join(tmp, f"bench_{int(duration)}s.wav"), duration)
+
+        # Progress writes go through the real update_progress against a scratch SQLite DB
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+        task_id = f"bench-{uuid.uuid4()}"
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with session_factory() as db:
+            db.add(models.Transcription(id=task_id, status="processing"))
+            db.commit()
+
+        progress = {"writes": 0, "seconds": 0.0}
+
+        def on_segment(position=None):
+            started = time.perf_counter()
+            tasks.update_progress(task_id, position)
+            progress["seconds"] += time.perf_counter() - started
+            progress["writes"] += 1
+
+        patches = [
+            patch.object(models, "SessionLocal", session_factory),
+            patch.object(transcribe, "diarize_audio", lambda path: _speaker_turns(duration)),
+            patch.dict(os.environ, {"WHISPER_MODEL": model, "HF_HUB_OFFLINE": "1"}),
+        ]
+        if model == "stub":
+            patches += [
+                patch.object(transcribe, "get_model", lambda name, compute_type=None: StubWhisperModel(stub_cost)),
+                patch.object(transcribe, "load_audio", read_wav),
+            ]
+        for p in patches:
+            p.start()
+        # The benchmark measures the local engine, never the OpenAI API
+        saved_env = {k: os.environ.pop(k) for k in ("OPENAI_API_KEY", "USE_OPENAI_API") if k in os.environ}
+        try:
+            started = time.perf_counter()
+            result = transcribe.transcribe_with_whisper(audio_path, language="en", diarize=True, on_segment=on_segment)
+
+            export_started = time.perf_counter()
+            outputs = [
+                utils.clean_to_csv(result["segments"], task_id),
+                utils.save_timestamped_text(result["segments"], task_id),
+            ]
+            export_seconds = time.perf_counter() - export_started
+            wall = time.perf_counter() - started
+        finally:
+            os.environ.update(saved_env)
+            for p in reversed(patches):
+                p.stop()
+            engine.dispose()
+
+        for path in outputs:
+            if os.path.exists(path):
+                os.remove(path)
+
+    stages = dict(result.get("timings", {}))
+    stages["progress_writes"] = round(progress["seconds"] * 1000, 1)
+    stages["export"] = round(export_seconds * 1000, 1)
+    return {
+        "duration_s": duration,
+        "wall_s": round(wall, 3),
+        "rtf": round(wall / duration, 4),
+        "peak_rss_mb": _peak_rss_mb(),
+        "segments": len(result["segments"]),
+        "progress_writes": progress["writes"],
+        "stages": stages,
+    }
+
+def run_benchmark(durations, model: str = "stub", stub_cost: float = 0.0) -> dict:
+    """Runs every duration and returns a report keyed by duration in seconds."""
+    return {
+        "model": model,
+        "cases": {str(int(d)): run_case(d, model=model, stub_cost=stub_cost) for d in durations},
+    }
+
+def _metric(case: dict, name: str):
+    value = case
+    for part in name.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.5) -> list[str]:
+    """
+    Lists regressions where a tracked metric exceeds its baseline by more than `tolerance`.
+    Cases or metrics missing from either side are skipped.
+    """
+    regressions = []
+    for key, case in report.get("cases", {}).items():
+        base_case = baseline.get("cases", {}).get(key)
+        if not base_case:
+            continue
+        for name in TRACKED_METRICS:
+            current, base = _metric(case, name), _metric(base_case, name)
+            if current is None or base is None:
+                continue
+            slack = NOISE_FLOOR_MS if name.startswith("stages.") else 0.0
+            if current > base * (1 + tolerance) + slack:
+                regressions.append(f"{key}s {name}: {current} > {base} (+{tolerance:.0%} allowed)")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline transcription engine benchmark")
+    parser.add_argument("--durations", default="30,300", help="Comma-separated audio lengths in seconds")
+    parser.add_argument("--model", default="stub", help="'stub' or a locally cached faster-whisper model such as 'tiny'")
+    parser.add_argument("--stub-cost", type=float, default=0.0, help="Simulated stub inference seconds per audio second")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--check", action="store_true", help="Fail if the run regresses past the baseline")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Also write the report to this path")
+    args = parser.parse_args(argv)
+
+    durations = [float(d) for d in args.durations.split(",") if d]
+    report = run_benchmark(durations, model=args.model, stub_cost=args.stub_cost)
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        return 0
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("model") != report["model"]:
+            print(f"Baseline was recorded with model {baseline.get('model')!r}, not {report['model']!r}", file=sys.stderr)
+            return 2
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+API load test for a single web node.
+
+Starts the FastAPI app under uvicorn on a loopback port, with a stubbed
+transcriber and a scratch SQLite database, then replays a scenario of
+status-polling tabs and uploading users against it. Reports p50/p95/p99
+latency and the error rate per route.
+
+    cd backend
+    python -m benchmarks.loadtest benchmarks/scenarios/polling_heavy.yaml
+    python -m benchmarks.loadtest benchmarks/scenarios/smoke.yaml --output report.json
+
+The load generator shares the process with the server, so absolute numbers
+are pessimistic; use it to compare changes, not to quote capacity.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from unittest.mock import patch
+
+import httpx
+import yaml
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+
+DEFAULT_SCENARIO = {
+    "name": "unnamed",
+    "duration": 60,
+    "users": 10,
+    "seed": 0,
+    "pollers": {"count": 0, "interval": 5, "accept": "html"},
+    "uploads": {"per_minute": 0, "file_size_kb": 256, "poll_interval": 1, "download": ["text", "csv"]},
+    "transcriber": {"seconds": 0.5, "segments": 5},
+    "rate_limit": False,
+}
+
+def load_scenario(path: str) -> dict:
+    """Reads a YAML or JSON scenario file and fills in defaults."""
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    scenario = {**DEFAULT_SCENARIO, **data}
+    for key in ("pollers", "uploads", "transcriber"):
+        scenario[key] = {**DEFAULT_SCENARIO[key], **(data.get(key) or {})}
+    return scenario
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class Recorder:
+    """Collects request latencies and failures per route template."""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool):
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def summary(self) -> dict:
+        routes = {}
+        total = failed = 0
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            errors = self.errors[route]
+            total += len(values)
+            failed += errors
+            routes[route] = {
+                "requests": len(values),
+                "errors": errors,
+                "error_rate": round(errors / len(values), 4),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+            }
+        return {
+            "requests": total,
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "routes": routes,
+        }
+
+async def _timed(client, recorder, route, method, url, expect=(200,), **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        recorder.record(route, time.perf_counter() - started, False)
+        return None
+    recorder.record(route, time.perf_counter() - started, response.status_code in expect)
+    return response
+
+def stub_transcriber(seconds: float, segments: int):
+    """Replacement for transcribe_with_whisper that sleeps instead of running a model."""
+    def transcribe(file_path, language="auto", on_segment=None, **kwargs):
+        segs = []
+        for i in range(segments):
+            time.sleep(seconds / max(segments, 1))
+            segs.append({"start": float(i), "end": float(i + 1), "text": f" Segment {i}."})
+            if on_segment:
+                on_segment(float(i + 1))
+        return {"text": "".join(s["text"] for s in segs).strip(), "segments": segs, "language": "en", "timings": {}}
+    return transcribe
+
+async def _poller(client, recorder, task_id, interval, accept, deadline, rng):
+    headers = {"Accept": "application/json"} if accept == "json" else {"HX-Request": "true"}
+    await asyncio.sleep(rng.uniform(0, interval))
+    while time.monotonic() < deadline:
+        await _timed(client, recorder, "/status/{task_id}", "GET", f"/status/{task_id}", headers=headers)
+        await asyncio.sleep(interval)
+
+async def _upload_flow(client, recorder, username, password, payload, uploads, deadline):
+    response = await _timed(client, recorder, "/login", "POST", "/login", data={"username": username, "password": password})
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}", "Accept": "application/json"}
+
+    response = await _timed(
+        client, recorder, "/transcribe", "POST", "/transcribe",
+        headers=headers, files={"file": ("load.mp3", payload, "audio/mpeg")}, data={"language": "en"},
+    )
+    if response is None or response.status_code != 200:
+        return
+    task_id = response.json()["task_id"]
+
+    status = "queued"
+    while status not in ("done", "failed") and time.monotonic() < deadline:
+        await asyncio.sleep(uploads["poll_interval"])
+        response = await _timed(client, recorder, "/status/{task_id}", "GET", f"/status/{task_id}", headers=headers)
+        if response is not None and response.status_code == 200:
+            status = response.json()["status"]
+
+    if status == "done":
+        for fmt in uploads["download"]:
+            await _timed(client, recorder, "/download/{task_id}/{fmt}", "GET", f"/download/{task_id}/{fmt}", headers=headers)
+
+async def drive(base_url: str, scenario: dict, users: list[str], password: str, poll_task_ids: list[str]) -> dict:
+    """Replays the scenario against base_url and returns the latency summary."""
+    rng = random.Random(scenario["seed"])
+    recorder = Recorder()
+    pollers, uploads = scenario["pollers"], scenario["uploads"]
+    payload = rng.randbytes(int(uploads["file_size_kb"] * 1024))
+    started = time.monotonic()
+    deadline = started + scenario["duration"]
+    # Upload flows get extra time to finish their poll and download loop
+    flow_deadline = deadline + max(30, scenario["transcriber"]["seconds"] * 4)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        background = [
+            asyncio.create_task(_poller(client, recorder, task_id, pollers["interval"], pollers["accept"], deadline, rng))
+            for task_id in poll_task_ids
+        ]
+        flows = []
+        if uploads["per_minute"] > 0:
+            gap = 60.0 / uploads["per_minute"]
+            i = 0
+            while time.monotonic() < deadline:
+                username = users[i % len(users)]
+                flows.append(asyncio.create_task(_upload_flow(client, recorder, username, password, payload, uploads, flow_deadline)))
+                i += 1
+                await asyncio.sleep(min(gap, max(0.0, deadline - time.monotonic())))
+        await asyncio.gather(*background, *flows)
+
+    summary = recorder.summary()
+    summary["scenario"] = scenario["name"]
+    summary["elapsed_s"] = round(time.monotonic() - started, 1)
+    return summary
+
+def _seed(web, scenario: dict, password: str) -> tuple[list[str], list[str]]:
+    """Creates load-test users and the jobs that polling tabs watch."""
+    hashed = web.get_password_hash(password)
+    run_id = uuid.uuid4().hex[:8]
+    users = [f"load-{run_id}-{i}" for i in range(scenario["users"])]
+    task_ids = [str(uuid.uuid4()) for _ in range(scenario["pollers"]["count"])]
+    with web.session_scope() as db:
+        db.add_all(web.User(username=u, hashed_password=hashed) for u in users)
+        db.add_all(web.Transcription(id=t, status="processing", progress=3) for t in task_ids)
+    return users, task_ids
+
+def run(scenario: dict) -> dict:
+    """Serves the app on a loopback port with a stub transcriber and runs the scenario."""
+    import uvicorn
+    from src import main as web
+    from src.models import init_db
+
+    # The app runs with lifespan off and the scratch database starts empty
+    init_db()
+    password = "load-test-password"
+    users, task_ids = _seed(web, scenario, password)
+    web.app.state.limiter.enabled = scenario["rate_limit"]
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(web.app, log_level="warning", lifespan="off"))
+
+    transcriber = scenario["transcriber"]
+    env = {k: v for k, v in os.environ.items() if k != "REDIS_URL"}
+    with patch.object(web, "transcribe_with_whisper", stub_transcriber(transcriber["seconds"], transcriber["segments"])), \
+            patch.dict(os.environ, env, clear=True):
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        try:
+            return asyncio.run(drive(f"http://127.0.0.1:{port}", scenario, users, password, task_ids))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+def format_table(summary: dict) -> str:
+    lines = [f"{'route':<28} {'reqs':>7} {'err%':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    for route, r in summary["routes"].items():
+        lines.append(
+            f"{route:<28} {r['requests']:>7} {r['error_rate'] * 100:>5.1f}% {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}"
+        )
+    lines.append(f"total {summary['requests']} requests, error rate {summary['error_rate'] * 100:.2f}%")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test one AVTranscribe web node")
+    parser.add_argument("scenario", help="Path to a YAML or JSON scenario file")
+    parser.add_argument("--duration", type=float, help="Override the scenario duration in seconds")
+    parser.add_argument("--output", help="Write the JSON summary to this path")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    if args.duration:
+        scenario["duration"] = args.duration
+    # Must be set before the app (and its engine) is imported
+    os.environ.setdefault("DB_URL", f"sqlite:///{tempfile.mkdtemp(prefix='avtranscribe-load-')}/load.db")
+
+    summary = run(scenario)
+    print(format_table(summary))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
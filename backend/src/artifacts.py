@@ -0,0 +1,77 @@
+import os
+import time
+from datetime import datetime, timedelta, UTC
+import structlog
+from sqlalchemy import and_, not_
+from .events import TERMINAL_STATUSES
+from .models import Artifact, Transcription, Upload, UploadChunk, session_scope
+
+logger = structlog.get_logger()
+
+ARTIFACT_TTL_HOURS = float(os.getenv("ARTIFACT_TTL_HOURS", "24"))
+
+def register_artifact(db, path: str, kind: str, task_id: str | None = None, ttl_hours: float | None = None):
+    """
+    Records a spooled file so cleanup can find it without listing the directory.
+    Re-registering a path refreshes its expiry. The row is committed with the caller's transaction.
+    """
+    ttl = ARTIFACT_TTL_HOURS if ttl_hours is None else ttl_hours
+    expires_at = datetime.now(UTC) + timedelta(hours=ttl)
+    artifact = db.query(Artifact).filter(Artifact.path == path).first()
+    if artifact:
+        artifact.expires_at = expires_at
+        if task_id is not None:
+            # e.g. a resumable upload's file, registered before finalize gave it a job
+            artifact.task_id = task_id
+        return
+    db.add(Artifact(path=path, kind=kind, task_id=task_id, expires_at=expires_at))
+
+def purge_expired(batch_size: int = 500, time_budget: float = 60.0) -> int:
+    """
+    Deletes expired artifacts and their registry rows in bounded batches,
+    along with the Upload and UploadChunk rows of expired resumable uploads.
+    Inputs of jobs that have not finished are kept past their expiry.
+    Stops once the time budget is spent; the remainder is picked up by the next run.
+
+    Returns:
+        The number of artifacts purged.
+    """
+    deadline = time.monotonic() + time_budget
+    purged = 0
+    while time.monotonic() < deadline:
+        with session_scope() as db:
+            # A job's input stays until the job is done or failed, however long it queues or retries
+            unfinished_input = and_(
+                Artifact.kind == "upload",
+                # Spelled out so a NULL task_id (an unfinalized upload) does not make the test NULL
+                Artifact.task_id.isnot(None),
+                Artifact.task_id.in_(
+                    db.query(Transcription.id).filter(Transcription.status.notin_(TERMINAL_STATUSES)).scalar_subquery()
+                ),
+            )
+            batch = (
+                db.query(Artifact.id, Artifact.path)
+                .filter(Artifact.expires_at <= datetime.now(UTC), not_(unfinished_input))
+                .order_by(Artifact.expires_at)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            for _, path in batch:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning("Failed to delete artifact", path=path, error=str(e))
+            db.query(Artifact).filter(Artifact.id.in_([artifact_id for artifact_id, _ in batch])).delete(synchronize_session=False)
+            # A resumable upload's rows go with its spool file
+            paths = [path for _, path in batch]
+            upload_ids = db.query(Upload.id).filter(Upload.path.in_(paths)).scalar_subquery()
+            db.query(UploadChunk).filter(UploadChunk.upload_id.in_(upload_ids)).delete(synchronize_session=False)
+            db.query(Upload).filter(Upload.path.in_(paths)).delete(synchronize_session=False)
+        purged += len(batch)
+        if len(batch) < batch_size:
+            break
+    return purged
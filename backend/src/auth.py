@@ -1,11 +1,10 @@
 import os
 from datetime import datetime, timedelta, UTC
+from functools import lru_cache
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, ExpiredSignatureError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 import structlog
 
@@ -18,11 +17,16 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-it-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def pwd_context():
+    """The bcrypt context, built on first use; passlib's import and backend probing are slow."""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def authenticate_user(db: Session, username: str, password: str):
     if len(password) > 72:
@@ -35,9 +39,10 @@ def authenticate_user(db: Session, username: str, password: str):
     return user
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(UTC) + expires_delta
@@ -54,27 +59,46 @@ def get_db():
     finally:
         db.close()
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def user_from_token(db: Session, token: str | None):
+    """Returns the user a bearer token belongs to, or None if it is missing, invalid or expired."""
+    if not token:
+        return None
+    from jose import ExpiredSignatureError, JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             logger.warning("JWT payload missing 'sub' claim")
-            raise credentials_exception
+            return None
     except ExpiredSignatureError:
         logger.warning("JWT token expired")
-        raise credentials_exception
+        return None
     except JWTError as e:
         logger.warning("JWT decode failed", error=str(e))
-        raise credentials_exception
+        return None
 
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         logger.warning("User from JWT not found in database", username=username)
-        raise credentials_exception
+    return user
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+    user = user_from_token(db, token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+async def get_websocket_user(token: str | None = None):
+    """
+    WebSocket variant of get_current_user; browsers cannot set headers, so the token comes as ?token=.
+    The lookup uses its own session, closed before the socket starts, rather than one held for its lifetime.
+    """
+    with SessionLocal() as db:
+        user = user_from_token(db, token)
+    if user is None:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
     return user
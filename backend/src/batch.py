@@ -0,0 +1,100 @@
+import io
+import os
+import zipfile
+import zlib
+from typing import Iterable, Iterator, List, Tuple
+
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "50"))
+MAX_MEMBER_SIZE = 100 * 1024 * 1024
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# What a corrupt, truncated, encrypted or exotic archive raises while it is read
+ARCHIVE_ERRORS = (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, EOFError, OSError)
+
+def is_zip_upload(filename: str, content_type: str | None) -> bool:
+    return os.path.splitext(filename)[1].lower() == ".zip" or content_type in ("application/zip", "application/x-zip-compressed")
+
+def iter_zip_media(fileobj, allowed_extensions: set) -> Iterator[Tuple[zipfile.ZipFile, zipfile.ZipInfo]]:
+    """
+    Yields the media members of a zip archive, skipping directories, hidden
+    files and anything that is not an allowed media type.
+
+    Raises:
+        ValueError: If the archive is unreadable, too large or holds too many files.
+    """
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except ARCHIVE_ERRORS:
+        raise ValueError("Invalid zip archive")
+    count = 0
+    for member in archive.infolist():
+        name = os.path.basename(member.filename)
+        if member.is_dir() or not name or name.startswith("."):
+            continue
+        if os.path.splitext(name)[1].lower() not in allowed_extensions:
+            continue
+        if member.file_size > MAX_MEMBER_SIZE:
+            raise ValueError(f"Archive member too large: {name}")
+        count += 1
+        if count > MAX_BATCH_FILES:
+            raise ValueError(f"Too many files (max {MAX_BATCH_FILES})")
+        yield archive, member
+
+def extract_member(archive: zipfile.ZipFile, member: zipfile.ZipInfo, dest_path: str) -> int:
+    """
+    Streams one archive member to disk without holding it in memory.
+    Stops at MAX_MEMBER_SIZE regardless of the size the archive declares.
+
+    Returns:
+        The number of bytes written.
+
+    Raises:
+        ValueError: If the member is too large or cannot be extracted.
+    """
+    written = 0
+    try:
+        with archive.open(member) as src, open(dest_path, "wb") as dst:
+            while chunk := src.read(COPY_BUFFER_SIZE):
+                written += len(chunk)
+                if written > MAX_MEMBER_SIZE:
+                    raise ValueError(f"Archive member too large: {member.filename}")
+                dst.write(chunk)
+    except ARCHIVE_ERRORS as e:
+        raise ValueError(f"Could not extract archive member {member.filename}: {e}")
+    return written
+
+class _ZipSink(io.RawIOBase):
+    """Write-only buffer that hands finished bytes to the response as they are produced."""
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_zip(entries: Iterable[Tuple[str, str | bytes]]) -> Iterator[bytes]:
+    """
+    Builds a zip archive incrementally from (arcname, path-or-bytes) entries,
+    yielding compressed bytes as they are produced so nothing is buffered whole.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for arcname, source in entries:
+            with archive.open(arcname, "w") as dst:
+                if isinstance(source, bytes):
+                    dst.write(source)
+                else:
+                    with open(source, "rb") as src:
+                        while chunk := src.read(COPY_BUFFER_SIZE):
+                            dst.write(chunk)
+                            yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import select
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+import structlog
+from sqlalchemy import event, inspect, text
+from .models import SessionLocal, Transcription, engine
+from .progress import progress_fraction
+
+logger = structlog.get_logger()
+
+CHANNEL = "job_status"
+TERMINAL_STATUSES = {"done", "failed"}
+
+# Seconds a listener waits before reconnecting after its connection drops
+RECONNECT_DELAY = 2.0
+
+_PENDING = "status_events"
+
+def is_terminal(status: Optional[str]) -> bool:
+    return status in TERMINAL_STATUSES
+
+def events_backend() -> str:
+    """
+    Where status changes are published: STATUS_EVENTS=postgres|redis|local|off,
+    or auto (the default) for Postgres NOTIFY when the DB is Postgres, Redis
+    pub/sub when REDIS_URL is set, and in-process delivery otherwise.
+    """
+    backend = os.getenv("STATUS_EVENTS", "auto")
+    if backend != "auto":
+        return backend
+    if engine.dialect.name == "postgresql":
+        return "postgres"
+    if os.getenv("REDIS_URL"):
+        return "redis"
+    return "local"
+
+def status_payload(trans: Transcription) -> dict:
+    return {
+        "task_id": trans.id,
+        "status": trans.status,
+        "progress": trans.progress or 0,
+        "fraction": 1.0 if trans.status == "done" else progress_fraction(trans.duration, trans.audio_done),
+    }
+
+_redis_client = None
+
+def _redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis
+        _redis_client = redis.Redis.from_url(os.environ["REDIS_URL"])
+    return _redis_client
+
+def _collect(session, flush_context):
+    # Runs before the flushed objects are marked clean, so attribute history still shows the change
+    changed = {}
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Transcription):
+            continue
+        attrs = inspect(obj).attrs
+        if obj in session.new or attrs.status.history.has_changes() or attrs.progress.history.has_changes():
+            changed[obj.id] = status_payload(obj)
+    if not changed:
+        return
+    if events_backend() == "postgres":
+        # NOTIFY is transactional: listeners hear it on commit, never on rollback
+        connection = session.connection()
+        for payload in changed.values():
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": json.dumps(payload)})
+    else:
+        session.info.setdefault(_PENDING, {}).update(changed)
+
+def _publish_pending(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    backend = events_backend()
+    for payload in pending.values():
+        try:
+            if backend == "redis":
+                _redis().publish(CHANNEL, json.dumps(payload))
+            elif backend == "local":
+                broker.dispatch(payload)
+        except Exception as e:
+            logger.warning("Failed to publish status change", task_id=payload["task_id"], error=str(e))
+
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
+
+def watch_sessions(session_factory):
+    """Publishes the status and progress of every Transcription a session commits."""
+    if os.getenv("STATUS_EVENTS", "auto") == "off":
+        return
+    event.listen(session_factory, "after_flush", _collect)
+    event.listen(session_factory, "after_commit", _publish_pending)
+    event.listen(session_factory, "after_soft_rollback", lambda session, previous_transaction: _discard_pending(session))
+
+class StatusBroker:
+    """
+    Fans status changes out to the requests waiting on them in this process.
+    One listener thread per process holds the Postgres LISTEN connection or
+    the Redis subscription and hands each message to the event loop. `live`
+    is True only while such a channel is connected, i.e. when changes
+    committed by any process are delivered.
+    """
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._loop = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.live = False
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._stop.clear()
+        backend = events_backend()
+        # "local" only reaches jobs committed by this process (BackgroundTasks);
+        # the local executor and other web workers are not heard, so live stays
+        # False and waiting requests still re-read the row
+        if backend in ("postgres", "redis"):
+            target = self._listen_postgres if backend == "postgres" else self._listen_redis
+            self._thread = threading.Thread(target=self._run, args=(target,), name="status-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=RECONNECT_DELAY + 1)
+            self._thread = None
+        self.live = False
+        self._loop = None
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=100)
+        self._subscribers[task_id].add(queue)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(task_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[task_id]
+
+    @contextmanager
+    def subscription(self, task_id: str):
+        queue = self.subscribe(task_id)
+        try:
+            yield queue
+        finally:
+            self.unsubscribe(task_id, queue)
+
+    def dispatch(self, payload: dict):
+        """Thread-safe: queues `payload` for delivery on the event loop."""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, payload)
+
+    def _deliver(self, payload: dict):
+        for queue in list(self._subscribers.get(payload.get("task_id"), ())):
+            if queue.full():
+                # A slow reader only needs the latest state
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    def _run(self, listen):
+        while not self._stop.is_set():
+            try:
+                listen()
+            except Exception as e:
+                logger.warning("Status listener disconnected", error=str(e))
+            self.live = False
+            self._stop.wait(RECONNECT_DELAY)
+
+    def _listen_postgres(self):
+        raw = engine.raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.autocommit = True
+            if callable(getattr(conn, "notifies", None)):
+                # psycopg 3
+                conn.execute(f"LISTEN {CHANNEL}")
+                self.live = True
+                while not self._stop.is_set():
+                    for notify in conn.notifies(timeout=1.0):
+                        self.dispatch(json.loads(notify.payload))
+            else:
+                # psycopg2
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                self.live = True
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.dispatch(json.loads(conn.notifies.pop(0).payload))
+        finally:
+            raw.invalidate()
+
+    def _listen_redis(self):
+        pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANNEL)
+            self.live = True
+            while not self._stop.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message:
+                    self.dispatch(json.loads(message["data"]))
+        finally:
+            pubsub.close()
+
+broker = StatusBroker()
+
+watch_sessions(SessionLocal)
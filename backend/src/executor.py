@@ -0,0 +1,273 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, UTC
+from typing import Any, Dict, Optional
+import structlog
+from .artifacts import purge_expired
+from .metrics import JOB_FAILURES
+from .models import LocalJob, SessionLocal, Transcription, engine, ensure_schema
+from .utils import send_error_email
+
+logger = structlog.get_logger()
+
+# A claimed job whose worker has not checked in for this long is presumed dead
+LEASE_SECONDS = float(os.getenv("LOCAL_JOB_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("LOCAL_JOB_MAX_ATTEMPTS", "3"))
+POLL_SECONDS = float(os.getenv("LOCAL_POLL_SECONDS", "1.0"))
+# How often the pool purges expired artifacts, which Celery beat does otherwise
+CLEANUP_SECONDS = float(os.getenv("LOCAL_CLEANUP_SECONDS", "3600"))
+
+_memory_lock = threading.Lock()
+
+def executor_mode() -> str:
+    """
+    Where queued jobs run: JOB_EXECUTOR=celery|local|background, or auto (the
+    default) for Celery when REDIS_URL is set outside Vercel and BackgroundTasks
+    otherwise.
+    """
+    mode = os.getenv("JOB_EXECUTOR", "auto")
+    if mode != "auto":
+        return mode
+    return "celery" if os.getenv("REDIS_URL") and not os.getenv("VERCEL") else "background"
+
+def worker_name(index: int = 0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+@contextmanager
+def claim_lock(bind):
+    """
+    Serialises claims on SQLite, which has no SKIP LOCKED, with an exclusive
+    lock on a file next to the database. Other databases need no extra lock.
+    """
+    if bind.dialect.name != "sqlite":
+        yield
+        return
+    database = bind.url.database
+    if not database or database == ":memory:":
+        with _memory_lock:
+            yield
+        return
+    import fcntl
+    with open(f"{database}.queue-lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def submit(file_path: str, language: str, format: str, task_id: str, diarize: bool, session_factory=SessionLocal):
+    """Queues a job for the local executor; its Transcription row must already be committed."""
+    with session_factory() as db:
+        db.add(LocalJob(task_id=task_id, file_path=file_path, language=language, format=format, diarize=diarize))
+        db.commit()
+
+def claim_next(worker: str, session_factory=SessionLocal) -> Optional[Dict[str, Any]]:
+    """
+    Claims the oldest queued job for `worker`.
+
+    Returns:
+        The job's arguments, or None when the queue is empty.
+    """
+    with session_factory() as db, claim_lock(db.get_bind()):
+        job = (
+            db.query(LocalJob)
+            .filter(LocalJob.status == "queued")
+            .order_by(LocalJob.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.rollback()
+            return None
+        job.status = "claimed"
+        job.worker = worker
+        job.attempts += 1
+        job.heartbeat_at = datetime.now(UTC)
+        claimed = {
+            "task_id": job.task_id,
+            "file_path": job.file_path,
+            "language": job.language,
+            "format": job.format,
+            "diarize": job.diarize,
+            "attempts": job.attempts,
+        }
+        db.commit()
+        return claimed
+
+def heartbeat(task_id: str, worker: str, session_factory=SessionLocal):
+    with session_factory() as db:
+        db.query(LocalJob).filter(LocalJob.task_id == task_id, LocalJob.worker == worker).update(
+            {"heartbeat_at": datetime.now(UTC)}
+        )
+        db.commit()
+
+def finish(task_id: str, session_factory=SessionLocal):
+    with session_factory() as db:
+        db.query(LocalJob).filter(LocalJob.task_id == task_id).delete()
+        db.commit()
+
+def fail_job(task_id: str, file_path: str, message: str, error: str, session_factory=SessionLocal):
+    """
+    Marks a local job as failed, notifies the admin and removes its input
+    file, as fail_transcription does for Celery jobs.
+    """
+    with session_factory() as db:
+        trans = db.query(Transcription).filter(Transcription.id == task_id).first()
+        if trans:
+            trans.status = "failed"
+            trans.error_message = message
+            trans.checkpoint = None
+        db.commit()
+
+    JOB_FAILURES.labels(mode="local").inc()
+    send_error_email(task_id, error)
+
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+def requeue(filter_clause, reason: str, session_factory=SessionLocal) -> int:
+    """
+    Returns claimed jobs matching `filter_clause` to the queue, or fails them
+    once they have used up MAX_ATTEMPTS.
+
+    Returns:
+        The number of jobs recovered.
+    """
+    failed = []
+    with session_factory() as db:
+        jobs = db.query(LocalJob).filter(LocalJob.status == "claimed", filter_clause).all()
+        for job in jobs:
+            if job.attempts >= MAX_ATTEMPTS:
+                logger.error("Local job failed permanently", task_id=job.task_id, worker=job.worker, reason=reason)
+                failed.append((job.task_id, job.file_path, f"Worker stopped {job.attempts} times while running the job ({reason})"))
+                db.delete(job)
+                continue
+            logger.warning("Requeuing local job", task_id=job.task_id, worker=job.worker, attempts=job.attempts, reason=reason)
+            job.status = "queued"
+            job.worker = None
+            trans = db.query(Transcription).filter(Transcription.id == job.task_id).first()
+            if trans:
+                trans.status = f"retrying ({job.attempts}/{MAX_ATTEMPTS})"
+        db.commit()
+    for task_id, file_path, message in failed:
+        fail_job(task_id, file_path, message, message, session_factory)
+    return len(jobs)
+
+def cleanup_expired() -> int:
+    """Purges expired artifacts; the local executor's stand-in for the Celery beat cleanup."""
+    try:
+        count = purge_expired()
+    except Exception as e:
+        logger.warning("Artifact cleanup failed", error=str(e))
+        return 0
+    logger.info("Expired artifacts purged", count=count)
+    return count
+
+def recover_stale(now: Optional[datetime] = None, session_factory=SessionLocal) -> int:
+    """Requeues jobs whose worker stopped heartbeating, e.g. after a crash or restart of the box."""
+    cutoff = (now or datetime.now(UTC)) - timedelta(seconds=LEASE_SECONDS)
+    return requeue(LocalJob.heartbeat_at < cutoff, "lease expired", session_factory)
+
+def release_worker(worker: str, session_factory=SessionLocal) -> int:
+    """Requeues the job of a worker process known to have died."""
+    return requeue(LocalJob.worker == worker, "worker exited", session_factory)
+
+def run_job(job: Dict[str, Any], worker: str, session_factory=SessionLocal):
+    """Runs a claimed job, heartbeating its lease until it finishes."""
+    from .main import run_transcription_sync
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(LEASE_SECONDS / 3):
+            try:
+                heartbeat(job["task_id"], worker, session_factory)
+            except Exception as e:
+                logger.warning("Local job heartbeat failed", task_id=job["task_id"], error=str(e))
+
+    beater = threading.Thread(target=beat, name="job-heartbeat", daemon=True)
+    beater.start()
+    try:
+        # Failures are recorded on the job by the pipeline itself
+        run_transcription_sync(job["file_path"], job["language"], job["format"], job["task_id"], job["diarize"], mode="local")
+    finally:
+        done.set()
+        beater.join()
+        finish(job["task_id"], session_factory)
+
+def worker_loop(index: int, stop):
+    """Body of one worker process: claim, run, repeat until `stop` is set."""
+    # Connections inherited from the parent must not be shared
+    engine.dispose(close=False)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker = worker_name(index)
+    logger.info("Local worker started", worker=worker)
+    while not stop.is_set():
+        try:
+            job = claim_next(worker)
+        except Exception as e:
+            logger.warning("Local job claim failed", worker=worker, error=str(e))
+            job = None
+        if job is None:
+            stop.wait(POLL_SECONDS)
+            continue
+        logger.info("Local job claimed", task_id=job["task_id"], worker=worker, attempt=job["attempts"])
+        run_job(job, worker)
+
+def run_pool(concurrency: int):
+    """
+    Runs `concurrency` worker processes, replacing any that die and requeuing
+    the job it held, and requeues jobs whose lease expired (a previous run of
+    the pool, or another box, that stopped without finishing them). Also
+    purges expired artifacts every CLEANUP_SECONDS.
+    """
+    ensure_schema()
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    # Setting the process-shared event from a signal handler can deadlock on its
+    # internal lock, so handlers set a local flag and the loop forwards it
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+
+    def spawn(index):
+        process = ctx.Process(target=worker_loop, args=(index, stop), name=f"local-worker-{index}")
+        process.start()
+        return process
+
+    recover_stale()
+    cleanup_expired()
+    next_cleanup = time.monotonic() + CLEANUP_SECONDS
+    workers = {index: spawn(index) for index in range(concurrency)}
+    logger.info("Local executor started", concurrency=concurrency)
+    while not stopping.wait(min(LEASE_SECONDS / 2, 5.0)):
+        for index, process in list(workers.items()):
+            if process.is_alive():
+                continue
+            logger.warning("Local worker exited", worker=index, exitcode=process.exitcode)
+            release_worker(f"{socket.gethostname()}:{process.pid}:{index}")
+            workers[index] = spawn(index)
+        recover_stale()
+        if time.monotonic() >= next_cleanup:
+            cleanup_expired()
+            next_cleanup = time.monotonic() + CLEANUP_SECONDS
+    logger.info("Local executor stopping; running jobs finish first")
+    stop.set()
+    for process in workers.values():
+        process.join()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Runs queued transcription jobs without Redis (JOB_EXECUTOR=local)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("LOCAL_WORKERS", "1")))
+    args = parser.parse_args(argv)
+    run_pool(args.concurrency)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import os
+from array import array
+from typing import Any, Dict, List, Optional
+import structlog
+from .artifacts import register_artifact
+from .models import Transcription
+from .policy import tier_models
+from .search import index_transcript
+from .timeindex import write_time_index
+from .transcribe import RESUME_PROMPT_CHARS, SAMPLE_RATE
+from .utils import clean_to_csv, save_timestamped_text
+
+logger = structlog.get_logger()
+
+# New audio that triggers a decode, and the most audio held undecided
+STEP_SECONDS = float(os.getenv("LIVE_STEP_SECONDS", "1.0"))
+WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", "15"))
+MAX_SESSION_SECONDS = float(os.getenv("LIVE_MAX_SESSION_SECONDS", "14400"))
+
+def live_model() -> str:
+    """Model for live sessions: LIVE_WHISPER_MODEL, else the fast tier's model."""
+    return os.getenv("LIVE_WHISPER_MODEL") or tier_models()["fast"]
+
+def pcm16_to_float32(samples: array):
+    """Converts signed 16-bit samples to the float32 array Whisper expects."""
+    import numpy as np
+    return np.frombuffer(samples.tobytes(), dtype=np.int16).astype(np.float32) / 32768.0
+
+class LiveSession:
+    """
+    Incremental decoding of a 16 kHz mono s16le PCM stream.
+
+    Audio since the last finalised segment is kept in a buffer and re-decoded
+    every `step` seconds of new audio. Every segment but the last is final;
+    the last is sent as a partial and may still change. A buffer longer than
+    `window` seconds is finalised outright so decode cost stays bounded.
+    """
+    def __init__(self, model, language: Optional[str] = None, step: float = STEP_SECONDS, window: float = WINDOW_SECONDS):
+        self.model = model
+        self.language = None if language in (None, "auto") else language
+        self.step = step
+        self.window = window
+        self.buffer = array("h")
+        self.buffer_start = 0.0
+        self.received = 0
+        self.pending = 0
+        self.segments: List[Dict[str, Any]] = []
+        self._odd = b""
+
+    @property
+    def duration(self) -> float:
+        return self.received / SAMPLE_RATE
+
+    def feed(self, chunk: bytes) -> bool:
+        """Appends PCM bytes; returns True once enough new audio has arrived for a decode."""
+        data = self._odd + chunk
+        # A frame may split a sample; carry the odd byte into the next one
+        cut = len(data) - len(data) % 2
+        self._odd = data[cut:]
+        samples = array("h")
+        samples.frombytes(data[:cut])
+        self.buffer.extend(samples)
+        self.received += len(samples)
+        self.pending += len(samples)
+        return self.pending >= self.step * SAMPLE_RATE
+
+    def _trim(self, until: float):
+        cut = min(len(self.buffer), max(0, int((until - self.buffer_start) * SAMPLE_RATE)))
+        del self.buffer[:cut]
+        self.buffer_start += cut / SAMPLE_RATE
+
+    def decode(self, final: bool = False) -> List[Dict[str, Any]]:
+        """
+        Decodes the buffer and returns the messages for the client.
+
+        Args:
+            final: The stream has ended; finalise everything buffered.
+
+        Returns:
+            "final" messages for newly settled segments, then at most one "partial".
+        """
+        self.pending = 0
+        if not self.buffer:
+            return []
+        prompt = "".join(s["text"] for s in self.segments)[-RESUME_PROMPT_CHARS:] or None
+        segments_gen, info = self.model.transcribe(
+            pcm16_to_float32(self.buffer),
+            language=self.language,
+            beam_size=1,
+            condition_on_previous_text=False,
+            initial_prompt=prompt,
+        )
+        hypothesis = [
+            {"start": s.start + self.buffer_start, "end": s.end + self.buffer_start, "text": s.text}
+            for s in segments_gen
+        ]
+        if self.language is None:
+            # Keep the first detection so later windows cannot flip language mid-sentence
+            self.language = info.language
+
+        buffered = len(self.buffer) / SAMPLE_RATE
+        if final or buffered >= self.window:
+            settled, partial = hypothesis, None
+            self._trim(self.buffer_start + buffered)
+        else:
+            settled, partial = hypothesis[:-1], (hypothesis[-1] if hypothesis else None)
+            if settled:
+                self._trim(settled[-1]["end"])
+        self.segments.extend(settled)
+
+        messages = [{"type": "final", **seg} for seg in settled]
+        if partial:
+            messages.append({"type": "partial", **partial})
+        return messages
+
+def persist_session(db, session: LiveSession, task_id: str, user_id: Optional[int], model_name: str) -> Transcription:
+    """
+    Stores a finished live session as a normal done job, with the same files
+    and search index as an upload, so the existing downloads work.
+    """
+    segments = session.segments
+    csv_path = clean_to_csv(segments, task_id)
+    text_timestamps_path = save_timestamped_text(segments, task_id)
+    index_path = write_time_index(segments, None, task_id)
+    trans = Transcription(
+        id=task_id,
+        user_id=user_id,
+        status="done",
+        filename="live-session",
+        text="".join(s["text"] for s in segments).strip(),
+        csv_path=csv_path,
+        text_timestamps_path=text_timestamps_path,
+        index_path=index_path,
+        language=session.language,
+        progress=len(segments),
+        duration=session.duration,
+        model_name=model_name,
+    )
+    db.add(trans)
+    db.flush()
+    index_transcript(db, task_id, user_id, segments)
+    register_artifact(db, csv_path, "csv", task_id)
+    register_artifact(db, text_timestamps_path, "text_timestamps", task_id)
+    register_artifact(db, index_path, "time_index", task_id)
+    logger.info("Live session saved", task_id=task_id, segments=len(segments), duration=session.duration)
+    return trans
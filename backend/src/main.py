@@ -1,21 +1,50 @@
-from fastapi import FastAPI, UploadFile, Form, Request, HTTPException, Depends, BackgroundTasks, status
+from fastapi import FastAPI, UploadFile, Form, Body, Header, Request, HTTPException, Depends, BackgroundTasks, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from .models import Base, Transcription, User, SessionLocal, engine, session_scope
-from .transcribe import transcribe_with_whisper
-from .utils import validate_file, save_text, clean_to_csv, save_timestamped_text, send_error_email
-from .auth import authenticate_user, create_access_token, get_current_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
-from datetime import timedelta
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from .models import JobGroup, Transcription, Upload, UploadChunk, User, SessionLocal, ensure_schema, session_scope
+from .transcribe import SAMPLE_RATE, get_model, transcribe_with_whisper
+from .utils import validate_file, save_text, clean_to_csv, save_timestamped_text, send_error_email, spool_path
+from .artifacts import register_artifact
+from .timeindex import TimeIndex, MAX_RANGE_ITEMS, write_time_index
+from .search import MAX_SEARCH_RESULTS, index_transcript, search_segments
+from .uploads import (
+    MAX_RESUMABLE_UPLOAD_SIZE, RECOMMENDED_CHUNK_SIZE,
+    PENDING_DIGEST, chunk_list_digest, has_overlaps, missing_ranges, overlapping_chunk, preallocate, write_chunk,
+)
+from .batch import MAX_BATCH_FILES, extract_member, is_zip_upload, iter_zip_media, stream_zip
+from .auth import authenticate_user, create_access_token, get_current_user, get_password_hash, get_websocket_user, ACCESS_TOKEN_EXPIRE_MINUTES
+from .live import MAX_SESSION_SECONDS, LiveSession, live_model, persist_session
+from .static_assets import (
+    NO_CACHE, SHORT_CACHE, HashedStaticFiles, build_hash, etag_matches, first_existing, render_service_worker,
+    resolve_root_files
+)
+from .metrics import (
+    EXPORT_SECONDS, JOB_FAILURES, PROGRESS_WRITES, REQUEST_LATENCY, UPLOAD_BYTES,
+    observe_queue_wait, render_metrics,
+)
+from .profiling import StageTimer, dual_output_saving, maybe_profile, merge_timings
+from .policy import QUALITY_TIERS, choose_for_job, probe_duration, record_language
+from .progress import Checkpointer, attempt_realtime_factor, media_passes, pass_position, progress_fields
+from .events import broker as status_broker, is_terminal
+from .executor import executor_mode, submit as submit_local_job
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from datetime import UTC, datetime, timedelta
+import asyncio
+import base64
+import json
 import uuid
 import os
 import shutil
+import time
 import structlog
 
 logger = structlog.get_logger()
@@ -26,8 +55,23 @@ TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
 STATIC_DIR = os.path.join(os.path.dirname(BASE_DIR), "static")
 FRONTEND_DIST_DIR = os.path.join(os.path.dirname(os.path.dirname(BASE_DIR)), "frontend", "dist")
 
-app = FastAPI()
-templates = Jinja2Templates(directory=TEMPLATE_DIR)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Status changes pushed by workers wake waiting /status requests in this process
+    ensure_schema()
+    status_broker.start(asyncio.get_running_loop())
+    try:
+        yield
+    finally:
+        status_broker.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+@lru_cache(maxsize=1)
+def get_templates():
+    # Jinja2 is only needed by the HTMX pages, so it loads on the first one
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory=TEMPLATE_DIR)
 
 # Security: Enforce HTTPS if configured
 if os.getenv("ENFORCE_HTTPS", "").lower() == "true":
@@ -43,10 +87,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# DB Setup
-Base.metadata.create_all(bind=engine)
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template so task IDs don't explode cardinality
+        route = request.scope.get("route")
+        REQUEST_LATENCY.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        ).observe(time.perf_counter() - started)
 
 def get_db():
+    ensure_schema()
     db = SessionLocal()
     try:
         yield db
@@ -64,74 +123,148 @@ if os.path.exists(STATIC_DIR):
 
 # Serve React assets if dist exists
 if os.path.exists(os.path.join(FRONTEND_DIST_DIR, "assets")):
-    app.mount("/assets", StaticFiles(directory=os.path.join(FRONTEND_DIST_DIR, "assets")), name="assets")
+    app.mount("/assets", HashedStaticFiles(directory=os.path.join(FRONTEND_DIST_DIR, "assets")), name="assets")
+
+# PWA files and the page they cache are resolved once at startup rather than per request
+ROOT_FILES = resolve_root_files(FRONTEND_DIST_DIR, STATIC_DIR)
+REACT_INDEX = first_existing([os.path.join(FRONTEND_DIST_DIR, "index.html")])
+BUILD_HASH = build_hash([
+    REACT_INDEX or os.path.join(TEMPLATE_DIR, "index.html"), ROOT_FILES["manifest.json"], ROOT_FILES["icon.svg"]
+])
+SERVICE_WORKER = render_service_worker(ROOT_FILES["sw.js"], BUILD_HASH) if ROOT_FILES["sw.js"] else None
+
+def root_file(request: Request, name: str, media_type: str | None = None):
+    path = ROOT_FILES[name]
+    if not path:
+        raise HTTPException(status_code=404, detail="Not found")
+    # The stat up front sets the ETag now, so a revalidation can be answered without the body
+    response = FileResponse(path, media_type=media_type, headers={"Cache-Control": SHORT_CACHE}, stat_result=os.stat(path))
+    if etag_matches(request.headers.get("if-none-match"), response.headers["etag"]):
+        return Response(status_code=304, headers={"ETag": response.headers["etag"], "Cache-Control": SHORT_CACHE})
+    return response
 
 # PWA Support: Serve manifest, service worker, and icons from root
 @app.get("/manifest.json")
-async def get_manifest():
-    fe_manifest = os.path.join(FRONTEND_DIST_DIR, "manifest.json")
-    if os.path.exists(fe_manifest):
-        return FileResponse(fe_manifest)
-    return FileResponse(os.path.join(STATIC_DIR, "manifest.json"))
+async def get_manifest(request: Request):
+    return root_file(request, "manifest.json")
 
 @app.get("/sw.js")
-async def get_sw():
-    fe_sw = os.path.join(FRONTEND_DIST_DIR, "sw.js")
-    if os.path.exists(fe_sw):
-        return FileResponse(fe_sw, media_type="application/javascript")
-    return FileResponse(os.path.join(STATIC_DIR, "sw.js"), media_type="application/javascript")
+async def get_sw(request: Request):
+    if SERVICE_WORKER is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    # Browsers must see a new build's worker right away
+    headers = {"Cache-Control": NO_CACHE, "ETag": f'"{BUILD_HASH}"'}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(SERVICE_WORKER, media_type="application/javascript", headers=headers)
 
 @app.get("/icon.svg")
-async def get_icon():
-    fe_icon = os.path.join(FRONTEND_DIST_DIR, "icon.svg")
-    if os.path.exists(fe_icon):
-        return FileResponse(fe_icon)
-    return FileResponse(os.path.join(STATIC_DIR, "icon.svg"))
+async def get_icon(request: Request):
+    return root_file(request, "icon.svg")
 
 @app.get("/vite.svg")
-async def get_vite_svg():
-    fe_vite = os.path.join(FRONTEND_DIST_DIR, "vite.svg")
-    if os.path.exists(fe_vite):
-        return FileResponse(fe_vite)
-    # Fallback for development
-    dev_vite = os.path.join(os.path.dirname(FRONTEND_DIST_DIR), "public", "vite.svg")
-    if os.path.exists(dev_vite):
-        return FileResponse(dev_vite)
-    return FileResponse(os.path.join(STATIC_DIR, "vite.svg"))
-
-def update_progress_sync(task_id: str):
+async def get_vite_svg(request: Request):
+    return root_file(request, "vite.svg")
+
+def update_progress_sync(task_id: str, position: float | None = None):
     """
-    Synchronous helper to increment progress.
+    Synchronous helper to increment progress and record the media position reached.
     """
     try:
         with session_scope() as db:
             trans = db.query(Transcription).filter(Transcription.id == task_id).first()
             if trans:
                 trans.progress += 1
+                if position is not None:
+                    trans.audio_done = max(trans.audio_done or 0.0, position)
+        PROGRESS_WRITES.inc()
     except Exception as e:
         logger.error("Failed to update task progress", task_id=task_id, error=str(e))
 
-def run_transcription_sync(file_path: str, language: str, format: str, task_id: str, diarize: bool = False):
+def save_checkpoint_sync(task_id: str, checkpoint: dict):
+    """
+    Synchronous helper to persist the completed segments and audio offset so a
+    requeued local job can resume.
+    """
+    try:
+        with session_scope() as db:
+            trans = db.query(Transcription).filter(Transcription.id == task_id).first()
+            if trans:
+                trans.checkpoint = {**checkpoint, "segments": list(checkpoint["segments"])}
+    except Exception as e:
+        logger.error("Failed to save task checkpoint", task_id=task_id, error=str(e))
+
+def run_transcription_sync(
+    file_path: str, language: str, format: str, task_id: str, diarize: bool = False, mode: str = "background"
+):
     """
-    Synchronous transcription helper for BackgroundTasks (used in serverless mode).
+    Synchronous transcription helper for BackgroundTasks (used in serverless
+    mode) and the local executor, whose requeued jobs resume from the last
+    checkpoint. `mode` labels failures in the job failure metric.
     """
+    if not os.path.exists(file_path):
+        # e.g. a requeued local job whose box lost its spool directory; retrying cannot help
+        logger.error("Transcription input missing", task_id=task_id, file=file_path)
+        JOB_FAILURES.labels(mode=mode).inc()
+        with session_scope() as db:
+            trans = db.query(Transcription).filter(Transcription.id == task_id).first()
+            if trans:
+                trans.status = "failed"
+                trans.error_message = "Input file is no longer available; please upload it again"
+                trans.checkpoint = None
+        return
+
+    timer = StageTimer()
+    checkpointer = Checkpointer(task_id, save_checkpoint_sync)
+    choice = {"model": None, "compute_type": None}
+    job_task = "transcribe"
+    word_timestamps = False
+    checkpoint = None
     try:
         with session_scope() as db:
             trans = db.query(Transcription).filter(Transcription.id == task_id).first()
             if trans:
+                queue_wait = observe_queue_wait(trans.created_at)
+                if queue_wait is not None:
+                    timer.record("queue_wait", queue_wait)
+                checkpoint = dict(trans.checkpoint) if trans.checkpoint else None
+                choice = choose_for_job(db, trans, file_path)
+                job_task = trans.task or "transcribe"
+                word_timestamps = bool(trans.word_timestamps)
                 trans.status = "processing"
-                trans.progress = 0
+                trans.progress = len(checkpoint["segments"]) if checkpoint else 0
+                trans.attempt_offset = trans.audio_done = (
+                    pass_position(checkpoint["offset"], 0, media_passes(job_task), 0.0) if checkpoint else 0.0
+                )
+                trans.started_at = datetime.now(UTC)
+        started = time.perf_counter()
 
-        def on_segment():
-            update_progress_sync(task_id)
+        def on_segment(position=None):
+            update_progress_sync(task_id, position)
 
-        result = transcribe_with_whisper(file_path, language=language, on_segment=on_segment, diarize=diarize)
+        with maybe_profile(task_id):
+            result = transcribe_with_whisper(
+                file_path, language=language, task=job_task, on_segment=on_segment, diarize=diarize,
+                resume_from=checkpoint, on_checkpoint=checkpointer,
+                model_name=choice["model"], compute_type=choice["compute_type"],
+                on_language=lambda lang, prob, model: record_language(task_id, lang, prob, model),
+                word_timestamps=word_timestamps
+            )
+        timer.update(result.get("timings"))
 
         text = result.get("text", "").strip()
         segments = result.get("segments", [])
         detected_lang = result.get("language", language)
-        csv_path = clean_to_csv(segments, task_id)
-        text_timestamps_path = save_timestamped_text(segments, task_id)
+        with timer.stage("export"):
+            with EXPORT_SECONDS.labels(format="csv").time():
+                csv_path = clean_to_csv(segments, task_id)
+            with EXPORT_SECONDS.labels(format="text_timestamps").time():
+                text_timestamps_path = save_timestamped_text(segments, task_id)
+            index_path = write_time_index(segments, result.get("words"), task_id)
+            translation = result.get("translation")
+            if translation:
+                translation_csv_path = clean_to_csv(translation["segments"], f"{task_id}_translation")
+                translation_timestamps_path = save_timestamped_text(translation["segments"], f"{task_id}_translation")
 
         with session_scope() as db:
             trans = db.query(Transcription).filter(Transcription.id == task_id).first()
@@ -139,23 +272,90 @@ def run_transcription_sync(file_path: str, language: str, format: str, task_id:
                 trans.text = text
                 trans.csv_path = csv_path
                 trans.text_timestamps_path = text_timestamps_path
+                trans.index_path = index_path
                 trans.language = detected_lang
                 trans.progress = len(segments)
+                trans.model_name = result.get("model", choice["model"])
+                trans.compute_type = result.get("compute_type", choice["compute_type"])
+                trans.language_probability = result.get("language_probability")
+                trans.timings = merge_timings(trans.timings, timer.stages)
+                trans.checkpoint = None
+                if translation:
+                    trans.translation = translation["text"].strip()
+                    trans.translation_csv_path = translation_csv_path
+                    trans.translation_timestamps_path = translation_timestamps_path
                 trans.status = "done"
+                trans.audio_done = trans.duration
+                trans.realtime_factor = attempt_realtime_factor(
+                    time.perf_counter() - started, trans.duration, trans.attempt_offset
+                )
+                index_transcript(db, task_id, trans.user_id, segments)
+            register_artifact(db, csv_path, "csv", task_id)
+            register_artifact(db, text_timestamps_path, "text_timestamps", task_id)
+            register_artifact(db, index_path, "time_index", task_id)
+            if translation:
+                register_artifact(db, translation_csv_path, "csv", task_id)
+                register_artifact(db, translation_timestamps_path, "text_timestamps", task_id)
 
         if os.path.exists(file_path):
             os.remove(file_path)
     except Exception as e:
         logger.error("Background transcription failed", task_id=task_id, error=str(e))
+        JOB_FAILURES.labels(mode=mode).inc()
         send_error_email(task_id, str(e))
         with session_scope() as db:
             trans = db.query(Transcription).filter(Transcription.id == task_id).first()
             if trans:
                 trans.status = "failed"
                 trans.error_message = str(e)
+                trans.checkpoint = None
         if os.path.exists(file_path):
             os.remove(file_path)
 
+ALLOWED_LANGUAGES = {"auto", "en", "es", "fr", "de", "it", "pt", "nl", "ja", "ko", "zh", "ru"}
+ALLOWED_FORMATS = {"auto", "text", "csv", "text_timestamps", "audio", "video"}
+ALLOWED_EXTENSIONS = {".mp3", ".wav", ".mp4", ".avi", ".mov"}
+ALLOWED_TASKS = {"transcribe", "translate", "both"}
+
+def validate_job_options(language: str, format: str, quality: str = "balanced", task: str = "transcribe"):
+    """Rejects unsupported language codes, output formats, quality tiers and tasks with a 400."""
+    if language not in ALLOWED_LANGUAGES and len(language) != 2:
+        raise HTTPException(status_code=400, detail="Invalid language code")
+
+    if format not in ALLOWED_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+
+    if quality not in QUALITY_TIERS:
+        raise HTTPException(status_code=400, detail="Invalid quality: fast, balanced or accurate")
+
+    if task not in ALLOWED_TASKS:
+        raise HTTPException(status_code=400, detail="Invalid task: transcribe, translate or both")
+
+def enqueue_job(background_tasks: BackgroundTasks, file_path: str, language: str, format: str, task_id: str, diarize: bool):
+    """
+    Dispatches a queued job to Celery, to the local executor's queue, or to
+    BackgroundTasks in serverless mode (see executor_mode).
+    """
+    mode = executor_mode()
+    if mode == "celery":
+        from .tasks import transcribe_task
+        transcribe_task.delay(file_path, language, format, task_id, diarize)
+    elif mode == "local":
+        submit_local_job(file_path, language, format, task_id, diarize)
+    else:
+        logger.info("Using BackgroundTasks (Serverless Mode)", task_id=task_id)
+        background_tasks.add_task(run_transcription_sync, file_path, language, format, task_id, diarize)
+
+def queued_response(request: Request, task_id: str):
+    if "application/json" in request.headers.get("Accept", ""):
+        return JSONResponse({"task_id": task_id, "status": "queued", "progress": 0})
+
+    return get_templates().TemplateResponse(
+        request, 
+        "status_partial.html", 
+        {"task_id": task_id, "status": "queued", "progress": 0}
+    )
+
 @app.post("/signup")
 async def signup(username: str = Form(...), password: str = Form(...), db = Depends(get_db)):
     if len(username) < 3 or len(username) > 50:
@@ -189,15 +389,19 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db = Depends(g
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@app.get("/metrics")
+async def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     # Try to serve React app first if built
-    react_index = os.path.join(FRONTEND_DIST_DIR, "index.html")
-    if os.path.exists(react_index):
-        return FileResponse(react_index)
+    if REACT_INDEX:
+        return FileResponse(REACT_INDEX, headers={"Cache-Control": NO_CACHE})
     
     # Fallback to HTMX version
-    return templates.TemplateResponse(request, "index.html")
+    return get_templates().TemplateResponse(request, "index.html")
 
 @app.post("/transcribe")
 @limiter.limit(os.getenv("RATE_LIMIT", "10/minute"))
@@ -208,115 +412,848 @@ async def transcribe(
     language: str = Form("auto"),
     format: str = Form("auto"),
     diarize: bool = Form(False),
+    quality: str = Form("balanced"),
+    task: str = Form("transcribe"),
+    word_timestamps: bool = Form(False),
     db = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Input validation
-    allowed_languages = {"auto", "en", "es", "fr", "de", "it", "pt", "nl", "ja", "ko", "zh", "ru"}
-    allowed_formats = {"auto", "text", "csv", "text_timestamps", "audio", "video"}
-
-    if language not in allowed_languages and len(language) != 2:
-        raise HTTPException(status_code=400, detail="Invalid language code")
-
-    if format not in allowed_formats:
-        raise HTTPException(status_code=400, detail="Invalid format")
+    validate_job_options(language, format, quality, task)
 
     if not validate_file(file):
         logger.error("Invalid file upload", filename=file.filename or "unknown")
         raise HTTPException(status_code=400, detail="Invalid file: Check type/size (max 100MB)")
     
     safe_filename = os.path.basename(file.filename or "uploaded_file")
-    temp_path = f"/tmp/{uuid.uuid4()}_{safe_filename}"
+    temp_path = spool_path(f"{uuid.uuid4()}_{safe_filename}")
+    upload_timer = StageTimer()
     try:
-        with open(temp_path, "wb") as buffer:
+        with upload_timer.stage("upload_spool"), open(temp_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
     except Exception as e:
         logger.error("Failed to save uploaded file", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to save uploaded file")
+    if file.size is not None:
+        UPLOAD_BYTES.observe(file.size)
     
+    # Container probing is blocking file I/O; keep it off the event loop
+    duration = await asyncio.to_thread(probe_duration, temp_path)
     task_id = str(uuid.uuid4())
     trans = Transcription(
         id=task_id, 
         status="queued",
+        user_id=current_user.id,
         filename=safe_filename,
         language=language,
-        diarize=diarize
+        diarize=diarize,
+        quality=quality,
+        task=task,
+        word_timestamps=word_timestamps,
+        duration=duration,
+        timings=upload_timer.stages
     )
     db.add(trans)
+    register_artifact(db, temp_path, "upload", task_id)
     db.commit()
-    
-    # Decide between Celery and BackgroundTasks
-    use_celery = os.getenv("REDIS_URL") is not None and os.getenv("VERCEL") is None
-    if use_celery:
-        from .tasks import transcribe_task
-        transcribe_task.delay(temp_path, language, format, task_id, diarize)
+
+    enqueue_job(background_tasks, temp_path, language, format, task_id, diarize)
+    return queued_response(request, task_id)
+
+@app.post("/uploads", status_code=201)
+async def create_upload(
+    filename: str = Form(...),
+    size: int = Form(...),
+    language: str = Form("auto"),
+    format: str = Form("auto"),
+    diarize: bool = Form(False),
+    quality: str = Form("balanced"),
+    task: str = Form("transcribe"),
+    word_timestamps: bool = Form(False),
+    db = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Starts a resumable upload. Chunks are then sent with PATCH /uploads/{upload_id}
+    (in any order, in parallel if desired) and the job is queued by /finalize.
+    """
+    validate_job_options(language, format, quality, task)
+    safe_filename = os.path.basename(filename)
+    if os.path.splitext(safe_filename)[1].lower() not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+    if size <= 0 or size > MAX_RESUMABLE_UPLOAD_SIZE:
+        raise HTTPException(status_code=400, detail=f"Invalid size (max {MAX_RESUMABLE_UPLOAD_SIZE // (1024 * 1024)}MB)")
+
+    upload_id = str(uuid.uuid4())
+    path = spool_path(f"{upload_id}_{safe_filename}")
+    preallocate(path, size)
+    db.add(Upload(
+        id=upload_id,
+        user_id=current_user.id,
+        filename=safe_filename,
+        path=path,
+        size=size,
+        language=language,
+        format=format,
+        diarize=diarize,
+        quality=quality,
+        task=task,
+        word_timestamps=word_timestamps
+    ))
+    register_artifact(db, path, "upload")
+    db.commit()
+    return JSONResponse(
+        {"upload_id": upload_id, "size": size, "chunk_size": RECOMMENDED_CHUNK_SIZE},
+        status_code=201,
+        headers={"Location": f"/uploads/{upload_id}"}
+    )
+
+def get_open_upload(db, upload_id: uuid.UUID, user: User) -> Upload:
+    upload = db.query(Upload).filter(Upload.id == str(upload_id), Upload.user_id == user.id).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if upload.status != "open":
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    return upload
+
+@app.patch("/uploads/{upload_id}", status_code=204)
+async def upload_chunk(
+    request: Request,
+    upload_id: uuid.UUID,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    content_length: int | None = Header(None),
+    db = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    upload = get_open_upload(db, upload_id, current_user)
+    if upload_offset < 0 or upload_offset >= upload.size:
+        raise HTTPException(status_code=400, detail="Upload-Offset out of range")
+    # The span must be known up front so overlaps are refused before the file is touched
+    if content_length is None:
+        raise HTTPException(status_code=411, detail="Content-Length required")
+    if content_length <= 0:
+        raise HTTPException(status_code=400, detail="Empty chunk")
+    if upload_offset + content_length > upload.size:
+        raise HTTPException(status_code=413, detail="Chunk exceeds declared upload length")
+
+    chunks = db.query(UploadChunk).filter(UploadChunk.upload_id == upload.id).all()
+    overlapping = overlapping_chunk([(c.offset, c.length) for c in chunks], upload_offset, content_length)
+    if overlapping is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Chunk overlaps the one received at offset {overlapping}; resend using fixed chunk boundaries"
+        )
+
+    # Reserve the span before writing: a pending chunk counts as missing, so bytes
+    # that land in the file are never covered by a stale or unrecorded digest.
+    # A resent chunk at the same offset replaces the earlier attempt.
+    chunk = next((c for c in chunks if c.offset == upload_offset), None)
+    if chunk:
+        chunk.length = content_length
+        chunk.sha256 = PENDING_DIGEST
     else:
-        logger.info("Using BackgroundTasks (Serverless Mode)", task_id=task_id)
-        background_tasks.add_task(run_transcription_sync, temp_path, language, format, task_id, diarize)
-    
-    if "application/json" in request.headers.get("Accept", ""):
-        return JSONResponse({"task_id": task_id, "status": "queued", "progress": 0})
+        chunk = UploadChunk(upload_id=upload.id, offset=upload_offset, length=content_length, sha256=PENDING_DIGEST)
+        db.add(chunk)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A chunk at this offset is already being written")
 
-    return templates.TemplateResponse(
-        request, 
-        "status_partial.html", 
-        {"task_id": task_id, "status": "queued", "progress": 0}
+    try:
+        length, sha256 = await write_chunk(upload.path, upload_offset, upload_offset + content_length, request.stream())
+    except Exception as e:
+        db.delete(chunk)
+        db.commit()
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=413, detail=str(e))
+        raise
+    if length != content_length:
+        db.delete(chunk)
+        db.commit()
+        raise HTTPException(status_code=400, detail="Chunk shorter than Content-Length")
+    UPLOAD_BYTES.observe(length)
+
+    chunk.sha256 = sha256
+    # Each accepted chunk extends the partial file's lifetime, so a resumed upload is not purged mid-way
+    register_artifact(db, upload.path, "upload")
+    db.commit()
+    return Response(status_code=204, headers={"Upload-Offset": str(upload_offset + length)})
+
+@app.get("/uploads/{upload_id}")
+async def get_upload(upload_id: uuid.UUID, db = Depends(get_db), current_user: User = Depends(get_current_user)):
+    upload = db.query(Upload).filter(Upload.id == str(upload_id), Upload.user_id == current_user.id).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    chunks = (
+        db.query(UploadChunk.offset, UploadChunk.length)
+        .filter(UploadChunk.upload_id == upload.id, UploadChunk.sha256 != PENDING_DIGEST)
+        .all()
+    )
+    missing = missing_ranges([(c.offset, c.length) for c in chunks], upload.size)
+    received = upload.size - sum(end - start for start, end in missing)
+    # Upload-Offset is the contiguous prefix, as in tus; `missing` serves parallel clients
+    contiguous = missing[0][0] if missing else upload.size
+    return JSONResponse(
+        {
+            "upload_id": upload.id,
+            "status": upload.status,
+            "size": upload.size,
+            "received": received,
+            "missing": [list(r) for r in missing],
+            "task_id": upload.task_id
+        },
+        headers={"Upload-Offset": str(contiguous), "Upload-Length": str(upload.size)}
+    )
+
+@app.post("/uploads/{upload_id}/finalize")
+@limiter.limit(os.getenv("RATE_LIMIT", "10/minute"))
+async def finalize_upload(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    upload_id: uuid.UUID,
+    db = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    upload = get_open_upload(db, upload_id, current_user)
+    chunks = (
+        db.query(UploadChunk.offset, UploadChunk.length, UploadChunk.sha256)
+        .filter(UploadChunk.upload_id == upload.id, UploadChunk.sha256 != PENDING_DIGEST)
+        .all()
+    )
+    spans = [(c.offset, c.length) for c in chunks]
+    if has_overlaps(spans):
+        raise HTTPException(status_code=409, detail="Chunks overlap; resend using fixed chunk boundaries")
+    missing = missing_ranges(spans, upload.size)
+    if missing:
+        raise HTTPException(status_code=409, detail={"message": "Upload incomplete", "missing": [list(r) for r in missing]})
+
+    duration = await asyncio.to_thread(probe_duration, upload.path)
+    task_id = str(uuid.uuid4())
+    upload.digest = chunk_list_digest([(c.offset, c.sha256) for c in chunks])
+    upload.status = "finalized"
+    upload.task_id = task_id
+    db.add(Transcription(
+        id=task_id,
+        status="queued",
+        user_id=upload.user_id,
+        filename=upload.filename,
+        language=upload.language,
+        diarize=upload.diarize,
+        quality=upload.quality,
+        task=upload.task,
+        word_timestamps=upload.word_timestamps,
+        duration=duration
+    ))
+    register_artifact(db, upload.path, "upload", task_id)
+    db.commit()
+
+    logger.info("Resumable upload finalized", upload_id=upload.id, task_id=task_id, size=upload.size, digest=upload.digest)
+    enqueue_job(background_tasks, upload.path, upload.language, upload.format, task_id, upload.diarize)
+    return queued_response(request, task_id)
+
+@app.post("/batch")
+@limiter.limit(os.getenv("RATE_LIMIT", "10/minute"))
+async def submit_batch(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    files: list[UploadFile],
+    language: str = Form("auto"),
+    format: str = Form("auto"),
+    diarize: bool = Form(False),
+    quality: str = Form("balanced"),
+    task: str = Form("transcribe"),
+    word_timestamps: bool = Form(False),
+    db = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queues one job per uploaded file, or per media file inside a single zip archive,
+    under a job group that can be polled and downloaded as a whole.
+    """
+    validate_job_options(language, format, quality, task)
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+
+    # Spool everything first so a bad member rejects the batch before any job is queued
+    spooled = []
+
+    def discard_spooled():
+        for path, _ in spooled:
+            if os.path.exists(path):
+                os.remove(path)
+
+    try:
+        if len(files) == 1 and is_zip_upload(files[0].filename or "", files[0].content_type):
+            for archive, member in iter_zip_media(files[0].file, ALLOWED_EXTENSIONS):
+                safe_filename = os.path.basename(member.filename)
+                path = spool_path(f"{uuid.uuid4()}_{safe_filename}")
+                spooled.append((path, safe_filename))
+                UPLOAD_BYTES.observe(extract_member(archive, member, path))
+        else:
+            if len(files) > MAX_BATCH_FILES:
+                raise ValueError(f"Too many files (max {MAX_BATCH_FILES})")
+            for file in files:
+                if not validate_file(file):
+                    raise ValueError(f"Invalid file: {file.filename or 'unknown'}")
+                safe_filename = os.path.basename(file.filename or "uploaded_file")
+                path = spool_path(f"{uuid.uuid4()}_{safe_filename}")
+                spooled.append((path, safe_filename))
+                with open(path, "wb") as buffer:
+                    shutil.copyfileobj(file.file, buffer)
+                if file.size is not None:
+                    UPLOAD_BYTES.observe(file.size)
+        if not spooled:
+            raise ValueError("No media files found")
+    except ValueError as e:
+        discard_spooled()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        discard_spooled()
+        raise
+
+    # Until the commit registers them as artifacts nothing else would remove these
+    # files, so any exit, including a cancelled request, cleans them up
+    try:
+        durations = await asyncio.gather(*(asyncio.to_thread(probe_duration, path) for path, _ in spooled))
+        group_id = str(uuid.uuid4())
+        db.add(JobGroup(id=group_id, user_id=current_user.id))
+        jobs = []
+        for (path, safe_filename), duration in zip(spooled, durations):
+            task_id = str(uuid.uuid4())
+            db.add(Transcription(
+                id=task_id,
+                status="queued",
+                user_id=current_user.id,
+                filename=safe_filename,
+                language=language,
+                diarize=diarize,
+                quality=quality,
+                task=task,
+                word_timestamps=word_timestamps,
+                duration=duration,
+                group_id=group_id
+            ))
+            register_artifact(db, path, "upload", task_id)
+            jobs.append((path, task_id))
+        db.commit()
+    except BaseException:
+        db.rollback()
+        discard_spooled()
+        raise
+
+    for path, task_id in jobs:
+        enqueue_job(background_tasks, path, language, format, task_id, diarize)
+    logger.info("Batch queued", group_id=group_id, jobs=len(jobs))
+    return JSONResponse({"group_id": group_id, "task_ids": [task_id for _, task_id in jobs], "count": len(jobs)})
+
+def get_group_jobs(db, group_id: uuid.UUID, user: User):
+    group = db.query(JobGroup).filter(JobGroup.id == str(group_id), JobGroup.user_id == user.id).first()
+    if not group:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return (
+        db.query(Transcription.id, Transcription.filename, Transcription.status, Transcription.progress)
+        .filter(Transcription.group_id == group.id)
+        .order_by(Transcription.created_at, Transcription.id)
+        .all()
+    )
+
+def summarize_group(jobs) -> dict:
+    counts = {}
+    for job in jobs:
+        key = "retrying" if job.status.startswith("retrying") else job.status
+        counts[key] = counts.get(key, 0) + 1
+    finished = counts.get("done", 0) + counts.get("failed", 0)
+    if finished < len(jobs):
+        overall = "processing" if finished or counts.get("processing") else "queued"
+    elif counts.get("failed", 0) == len(jobs):
+        overall = "failed"
+    elif counts.get("failed"):
+        overall = "partial"
+    else:
+        overall = "done"
+    return {"status": overall, "total": len(jobs), "finished": finished, "counts": counts}
+
+@app.get("/batch/{group_id}")
+async def get_batch_status(group_id: uuid.UUID, db = Depends(get_db), current_user: User = Depends(get_current_user)):
+    jobs = get_group_jobs(db, group_id, current_user)
+    return JSONResponse({
+        "group_id": str(group_id),
+        **summarize_group(jobs),
+        "tasks": [
+            {"task_id": job.id, "filename": job.filename, "status": job.status, "progress": job.progress}
+            for job in jobs
+        ]
+    })
+
+@app.get("/batch/{group_id}/download")
+async def download_batch(
+    group_id: uuid.UUID,
+    fmt: str = "all",
+    db = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    allowed_fmts = {"all", "text", "csv", "text_timestamps"}
+    if fmt not in allowed_fmts:
+        raise HTTPException(status_code=400, detail="Invalid format: all, text, csv or text_timestamps")
+    jobs = get_group_jobs(db, group_id, current_user)
+    summary = summarize_group(jobs)
+    if summary["finished"] < summary["total"]:
+        raise HTTPException(status_code=400, detail=f"Batch not complete. {summary['finished']}/{summary['total']} finished")
+
+    done_ids = [job.id for job in jobs if job.status == "done"]
+
+    def entries():
+        # One job's transcript in memory at a time, each read in its own short session
+        for i, task_id in enumerate(done_ids, start=1):
+            with session_scope() as row_db:
+                row = row_db.query(
+                    Transcription.filename, Transcription.text,
+                    Transcription.csv_path, Transcription.text_timestamps_path
+                ).filter(Transcription.id == task_id).first()
+            if row is None:
+                continue
+            stem = f"{i:03d}_{os.path.splitext(row.filename or task_id)[0]}"
+            if fmt in ("all", "text"):
+                yield f"{stem}.txt", (row.text or "").encode("utf-8")
+            if fmt in ("all", "csv") and row.csv_path and os.path.exists(row.csv_path):
+                yield f"{stem}.csv", row.csv_path
+            if fmt in ("all", "text_timestamps") and row.text_timestamps_path and os.path.exists(row.text_timestamps_path):
+                yield f"{stem}_timestamps.txt", row.text_timestamps_path
+
+    return StreamingResponse(
+        stream_zip(entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="batch_{group_id}.zip"'}
+    )
+
+MAX_JOBS_PAGE = 100
+
+def encode_job_cursor(created_at: datetime, task_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{task_id}".encode()).decode()
+
+def decode_job_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, task_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), task_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.websocket("/live")
+async def live_transcription(
+    websocket: WebSocket,
+    language: str = "auto",
+    current_user: User = Depends(get_websocket_user)
+):
+    """
+    Live transcription of a 16 kHz mono s16le PCM stream sent as binary frames.
+    Sends {"type": "partial"|"final", start, end, text} as decoding settles; a
+    {"type": "stop"} text frame (or disconnecting) ends the session, which is
+    saved as a done job and answered with {"type": "done", "task_id"}.
+    """
+    await websocket.accept()
+    try:
+        validate_job_options(language, "auto")
+    except HTTPException:
+        await websocket.close(code=1003, reason="Unsupported language")
+        return
+
+    task_id = str(uuid.uuid4())
+    model_name = live_model()
+    model = await asyncio.to_thread(get_model, model_name)
+    session = LiveSession(model, language)
+    await websocket.send_json({"type": "ready", "task_id": task_id, "sample_rate": SAMPLE_RATE})
+
+    connected = True
+    final = []
+    try:
+        while session.duration < MAX_SESSION_SECONDS:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes"):
+                if session.feed(message["bytes"]):
+                    # Inference runs off the event loop; frames arriving meanwhile join the next decode
+                    for update in await asyncio.to_thread(session.decode):
+                        await websocket.send_json(update)
+            elif message.get("text"):
+                try:
+                    if json.loads(message["text"]).get("type") == "stop":
+                        break
+                except (ValueError, AttributeError):
+                    pass
+    except WebSocketDisconnect:
+        connected = False
+    finally:
+        # Audio already received is saved even if a decode or the socket failed
+        try:
+            final = await asyncio.to_thread(session.decode, True)
+        except Exception as e:
+            logger.error("Final live decode failed", task_id=task_id, error=str(e))
+        if session.received:
+            # A short session of its own: none is held open for the life of the socket
+            with session_scope() as db:
+                persist_session(db, session, task_id, current_user.id, model_name)
+    if connected:
+        for update in final:
+            await websocket.send_json(update)
+        await websocket.send_json({"type": "done", "task_id": task_id if session.received else None})
+        await websocket.close()
+
+@app.get("/jobs")
+async def list_jobs(
+    cursor: str | None = None,
+    limit: int = 20,
+    status_filter: str | None = None,
+    db = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    The user's jobs, newest first. Pages with a keyset cursor over
+    (created_at, id) so every page is an index range scan, never an OFFSET.
+    """
+    limit = max(1, min(limit, MAX_JOBS_PAGE))
+    query = db.query(
+        Transcription.id, Transcription.filename, Transcription.status, Transcription.progress,
+        Transcription.language, Transcription.task, Transcription.group_id, Transcription.created_at, Transcription.updated_at
+    ).filter(Transcription.user_id == current_user.id)
+    if status_filter:
+        query = query.filter(Transcription.status == status_filter)
+    if cursor:
+        created_at, task_id = decode_job_cursor(cursor)
+        query = query.filter(tuple_(Transcription.created_at, Transcription.id) < (created_at, task_id))
+    rows = query.order_by(Transcription.created_at.desc(), Transcription.id.desc()).limit(limit).all()
+
+    return JSONResponse({
+        "jobs": [
+            {
+                "task_id": row.id,
+                "filename": row.filename,
+                "status": row.status,
+                "progress": row.progress,
+                "language": row.language,
+                "task": row.task,
+                "group_id": row.group_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+            }
+            for row in rows
+        ],
+        "next_cursor": encode_job_cursor(rows[-1].created_at, rows[-1].id) if len(rows) == limit else None
+    })
+
+@app.get("/search")
+async def search(
+    q: str,
+    after: int = 0,
+    limit: int = 20,
+    db = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full-text search over the user's finished transcripts. Returns matching
+    segments with timestamps; pass `next_after` back as `after` for the next page.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty query")
+    limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+    rows = search_segments(db, current_user.id, q, after=after, limit=limit)
+    return JSONResponse({
+        "query": q,
+        "results": [
+            {"task_id": row.task_id, "filename": row.filename, "start": row.start, "end": row.end, "text": row.text}
+            for row in rows
+        ],
+        "next_after": rows[-1].id if len(rows) == limit else None
+    })
+
+MAX_BULK_STATUS_IDS = 500
+# Worker clocks stamp updated_at at flush, so a row can become visible after
+# a later-stamped one; as_of trails the newest stamp by this much to cover it
+BULK_STATUS_OVERLAP = timedelta(seconds=float(os.getenv("BULK_STATUS_OVERLAP_SECONDS", "60")))
+
+@app.post("/status/bulk")
+async def get_bulk_status(
+    task_ids: list[uuid.UUID] = Body(..., embed=True),
+    changed_since: datetime | None = Body(None, embed=True),
+    db = Depends(get_db)
+):
+    """
+    Status of many jobs at once. Pass the returned `as_of` back as
+    `changed_since` to fetch only changes; consecutive windows overlap by
+    BULK_STATUS_OVERLAP, so a job may be reported again and clients should
+    treat the response as an upsert keyed by task_id.
+    """
+    if len(task_ids) > MAX_BULK_STATUS_IDS:
+        raise HTTPException(status_code=400, detail=f"Too many task IDs (max {MAX_BULK_STATUS_IDS})")
+    ids = list(dict.fromkeys(str(t) for t in task_ids))
+    started = datetime.now(UTC).replace(tzinfo=None)
+
+    query = db.query(
+        Transcription.id, Transcription.status, Transcription.progress,
+        Transcription.error_message, Transcription.updated_at
+    ).filter(Transcription.id.in_(ids))
+    if changed_since is not None:
+        if changed_since.tzinfo is not None:
+            changed_since = changed_since.astimezone(UTC).replace(tzinfo=None)
+        query = query.filter(Transcription.updated_at > changed_since)
+    rows = query.all()
+
+    # A stamp ahead of our clock (worker clock skew) must not push the window past rows still in flight
+    latest = max([row.updated_at for row in rows if row.updated_at], default=started)
+    as_of = min(latest, started) - BULK_STATUS_OVERLAP
+    if changed_since is not None:
+        as_of = max(as_of, changed_since)
+
+    body = {
+        "as_of": as_of.isoformat(),
+        "tasks": [
+            {
+                "task_id": row.id,
+                "status": row.status,
+                "progress": row.progress,
+                "error_message": row.error_message,
+                "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+            }
+            for row in rows
+        ]
+    }
+    if changed_since is None:
+        found = {row.id for row in rows}
+        body["missing"] = [task_id for task_id in ids if task_id not in found]
+    return JSONResponse(body)
+
+# Longest a /status request holds waiting for a change, and the SSE keepalive interval
+MAX_STATUS_WAIT = 30.0
+STATUS_POLL_SECONDS = 5.0
+
+def read_status(db, task_id: str):
+    return (
+        db.query(
+            Transcription.status, Transcription.progress, Transcription.error_message, Transcription.duration,
+            Transcription.audio_done, Transcription.attempt_offset, Transcription.started_at
+        )
+        .filter(Transcription.id == task_id)
+        .first()
+    )
+
+async def wait_for_status_change(task_id: str, timeout: float):
+    """
+    Returns once the job changes state or progress, or after `timeout` seconds.
+    Reads use their own short session, so no pooled connection is held while waiting.
+    Without a cross-process push channel the row is re-read every STATUS_POLL_SECONDS.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    seen = None
+    with status_broker.subscription(task_id) as updates:
+        # Subscribed before reading, so a change committed in between still wakes us
+        while True:
+            if seen is None or not status_broker.live:
+                with session_scope() as db:
+                    row = db.query(Transcription.status, Transcription.progress).filter(Transcription.id == task_id).first()
+                if not row or is_terminal(row.status) or seen not in (None, tuple(row)):
+                    return
+                seen = tuple(row)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(updates.get(), min(remaining, STATUS_POLL_SECONDS))
+                return
+            except TimeoutError:
+                pass
+
+@app.get("/status/{task_id}/events")
+async def status_events(task_id: uuid.UUID):
+    """
+    Server-sent events with the job's status and progress, pushed as workers
+    commit them. The stream ends once the job is done or failed.
+    """
+    task_id_str = str(task_id)
+    updates = status_broker.subscribe(task_id_str)
+    # A stream can stay open for hours; each read takes a connection only for its query
+    with session_scope() as db:
+        row = read_status(db, task_id_str)
+    if not row:
+        status_broker.unsubscribe(task_id_str, updates)
+        raise HTTPException(status_code=404, detail="Task not found")
+    current = {
+        "task_id": task_id_str, "status": row.status, "progress": row.progress,
+        **progress_fields(row), "error_message": row.error_message
+    }
+
+    async def stream():
+        latest = current
+        try:
+            yield f"data: {json.dumps(latest)}\n\n"
+            while not is_terminal(latest["status"]):
+                try:
+                    payload = await asyncio.wait_for(updates.get(), STATUS_POLL_SECONDS)
+                except TimeoutError:
+                    if status_broker.live:
+                        yield ": keepalive\n\n"
+                        continue
+                    # No push channel in this process; fall back to reading the row
+                    with session_scope() as poll_db:
+                        row = read_status(poll_db, task_id_str)
+                    if not row or (row.status, row.progress) == (latest["status"], latest["progress"]):
+                        continue
+                    payload = {"task_id": task_id_str, "status": row.status, "progress": row.progress, **progress_fields(row)}
+                latest = payload
+                yield f"data: {json.dumps(latest)}\n\n"
+        finally:
+            status_broker.unsubscribe(task_id_str, updates)
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @app.get("/status/{task_id}")
-async def get_status(request: Request, task_id: uuid.UUID, db = Depends(get_db)):
+async def get_status(request: Request, task_id: uuid.UUID, debug: bool = False, wait: float = 0, db = Depends(get_db)):
     task_id_str = str(task_id)
-    trans = db.query(Transcription).filter(Transcription.id == task_id_str).first()
+    if wait > 0 and not debug:
+        # Long poll: answer as soon as a worker pushes a change instead of on the next poll.
+        # `db` has not queried yet, so it holds no connection during the wait
+        await wait_for_status_change(task_id_str, min(wait, MAX_STATUS_WAIT))
+    if debug:
+        trans = db.query(Transcription).filter(Transcription.id == task_id_str).first()
+    else:
+        # Polled every few seconds per open tab; read only the status columns
+        trans = read_status(db, task_id_str)
     if not trans:
         raise HTTPException(status_code=404, detail="Task not found")
+
+    if debug:
+        # Debug variant: always JSON, with the per-stage timing breakdown
+        return JSONResponse({
+            "task_id": task_id_str,
+            "status": trans.status,
+            "progress": trans.progress,
+            "error_message": trans.error_message,
+            "model": trans.model_name,
+            "compute_type": trans.compute_type,
+            "duration": trans.duration,
+            "language": trans.language,
+            "language_probability": trans.language_probability,
+            "task": trans.task,
+            "realtime_factor": trans.realtime_factor,
+            **progress_fields(trans),
+            "timings": trans.timings or {},
+            **({"dual_output_saved_ms": dual_output_saving(trans.timings)} if trans.task == "both" else {})
+        })
     
     if "application/json" in request.headers.get("Accept", ""):
         return JSONResponse({
             "task_id": str(task_id),
             "status": trans.status,
             "progress": trans.progress,
+            **progress_fields(trans),
             "error_message": trans.error_message
         })
 
-    return templates.TemplateResponse(
+    return get_templates().TemplateResponse(
         request, 
         "status_partial.html", 
         {
             "task_id": task_id, 
             "status": trans.status, 
             "progress": trans.progress,
+            **progress_fields(trans),
             "error_message": trans.error_message
         }
     )
 
+@app.get("/transcript/{task_id}/range")
+async def get_transcript_range(
+    task_id: uuid.UUID,
+    t0: float = 0.0,
+    t1: float | None = None,
+    level: str = "segments",
+    limit: int = MAX_RANGE_ITEMS,
+    db = Depends(get_db)
+):
+    """
+    Segments or words overlapping [t0, t1] seconds, answered from the job's
+    time index without loading the full transcript.
+    """
+    if level not in ("segments", "words"):
+        raise HTTPException(status_code=400, detail="Invalid level: segments or words")
+    if t1 is None:
+        t1 = float("inf")
+    if t1 < t0 or t0 < 0:
+        raise HTTPException(status_code=400, detail="Invalid range")
+    limit = max(1, min(limit, MAX_RANGE_ITEMS))
+
+    task_id_str = str(task_id)
+    row = db.query(Transcription.status, Transcription.index_path).filter(Transcription.id == task_id_str).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if row.status != "done":
+        raise HTTPException(status_code=400, detail=f"Task not complete. Current status: {row.status}")
+    if not row.index_path or not os.path.exists(row.index_path):
+        raise HTTPException(status_code=404, detail="Time index not found")
+
+    with TimeIndex(row.index_path) as index:
+        if level == "words" and not index.has_words:
+            raise HTTPException(status_code=404, detail="This job has no word timestamps")
+        items = index.words(t0, t1, limit) if level == "words" else index.segments(t0, t1, limit)
+    return JSONResponse({
+        "task_id": task_id_str,
+        "t0": t0,
+        "t1": None if t1 == float("inf") else t1,
+        level: items,
+        "truncated": len(items) >= limit
+    })
+
+def output_basename(output: str) -> str:
+    return "translation" if output == "translation" else "transcription"
+
 @app.get("/download/{task_id}/{fmt}")
-async def download(task_id: uuid.UUID, fmt: str, db = Depends(get_db)):
+async def download(task_id: uuid.UUID, fmt: str, output: str = "transcript", db = Depends(get_db)):
     task_id_str = str(task_id)
     allowed_fmts = {"text", "csv", "text_timestamps"}
     if fmt not in allowed_fmts:
         raise HTTPException(status_code=400, detail="Invalid format: text, csv or text_timestamps")
+    if output not in ("transcript", "translation"):
+        raise HTTPException(status_code=400, detail="Invalid output: transcript or translation")
 
     trans = db.query(Transcription).filter(Transcription.id == task_id_str).first()
     if not trans:
         raise HTTPException(status_code=404, detail="Task not found")
     if trans.status != "done":
         raise HTTPException(status_code=400, detail=f"Task not complete. Current status: {trans.status}")
+
+    if output == "translation":
+        # Only dual-output jobs (task=both) carry a separate translation
+        if trans.translation_csv_path is None:
+            raise HTTPException(status_code=404, detail="This job has no translation")
+        name = f"{task_id}_translation"
+        csv_path, text_timestamps_path = trans.translation_csv_path, trans.translation_timestamps_path
+    else:
+        name = str(task_id)
+        csv_path, text_timestamps_path = trans.csv_path, trans.text_timestamps_path
     
     if fmt == "text":
-        file_path = f"/tmp/{task_id}.txt"
+        file_path = spool_path(f"{name}.txt")
         if not os.path.exists(file_path):
-            file_path = save_text(trans.text or "", task_id)
-        return FileResponse(file_path, filename="transcription.txt")
+            # The deferred text column is only loaded when the file has to be rebuilt
+            text = trans.translation if output == "translation" else trans.text
+            file_path = save_text(text or "", name)
+            register_artifact(db, file_path, "text", task_id_str)
+            db.commit()
+        return FileResponse(file_path, filename=f"{output_basename(output)}.txt")
     elif fmt == "csv":
-        if not trans.csv_path or not os.path.exists(trans.csv_path):
+        if not csv_path or not os.path.exists(csv_path):
              raise HTTPException(status_code=404, detail="CSV file not found")
-        return FileResponse(trans.csv_path, filename="transcription.csv")
+        return FileResponse(csv_path, filename=f"{output_basename(output)}.csv")
     elif fmt == "text_timestamps":
-        if not trans.text_timestamps_path or not os.path.exists(trans.text_timestamps_path):
+        if not text_timestamps_path or not os.path.exists(text_timestamps_path):
             # Note: This is a heavy fallback, usually the file should exist.
             # However, for simplicity if it's missing we just return 404 for now
             # as re-transcribing here is not feasible without the original file.
             raise HTTPException(status_code=404, detail="Timestamped text file not found")
-        return FileResponse(trans.text_timestamps_path, filename="transcription_timestamps.txt")
+        return FileResponse(text_timestamps_path, filename=f"{output_basename(output)}_timestamps.txt")
     
     raise HTTPException(status_code=400, detail="Invalid format: text, csv or text_timestamps")
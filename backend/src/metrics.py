@@ -0,0 +1,148 @@
+import os
+from datetime import datetime, UTC
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    PlatformCollector,
+    ProcessCollector,
+    generate_latest,
+    start_http_server,
+)
+import structlog
+
+logger = structlog.get_logger()
+
+# Gunicorn workers and Celery prefork children each hold their own metric values.
+# Setting PROMETHEUS_MULTIPROC_DIR makes prometheus_client write them to a shared
+# directory so a single scrape aggregates every process.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# A private registry keeps repeated imports of this module (e.g. as both `src` and
+# `backend.src`) from colliding in prometheus_client's global registry.
+REGISTRY = CollectorRegistry()
+ProcessCollector(registry=REGISTRY)
+PlatformCollector(registry=REGISTRY)
+
+REQUEST_LATENCY = Histogram(
+    "avtranscribe_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    registry=REGISTRY,
+)
+UPLOAD_BYTES = Histogram(
+    "avtranscribe_upload_bytes",
+    "Size of uploaded media files in bytes",
+    buckets=(1e5, 1e6, 5e6, 1e7, 2.5e7, 5e7, 1e8, 2.5e8, 5e8, 1e9),
+    registry=REGISTRY,
+)
+QUEUE_WAIT = Histogram(
+    "avtranscribe_queue_wait_seconds",
+    "Time between job creation and a worker starting it",
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+    registry=REGISTRY,
+)
+MODEL_LOAD = Histogram(
+    "avtranscribe_model_load_seconds",
+    "Time spent loading a Whisper model",
+    ["model"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+    registry=REGISTRY,
+)
+MODEL_CACHE = Counter(
+    "avtranscribe_model_cache_total",
+    "Model cache lookups by result (hit or miss)",
+    ["model", "result"],
+    registry=REGISTRY,
+)
+REALTIME_FACTOR = Histogram(
+    "avtranscribe_realtime_factor",
+    "Processing time divided by audio duration per job",
+    ["backend"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5),
+    registry=REGISTRY,
+)
+SEGMENTS_PER_SECOND = Histogram(
+    "avtranscribe_segments_per_second",
+    "Transcribed segments produced per second of processing",
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 50, 100),
+    registry=REGISTRY,
+)
+DIARIZATION_SECONDS = Histogram(
+    "avtranscribe_diarization_seconds",
+    "Time spent in speaker diarization",
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800),
+    registry=REGISTRY,
+)
+EXPORT_SECONDS = Histogram(
+    "avtranscribe_export_seconds",
+    "Time spent writing result files",
+    ["format"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+    registry=REGISTRY,
+)
+STAGE_SECONDS = Histogram(
+    "avtranscribe_stage_seconds",
+    "Time spent in each pipeline stage",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600),
+    registry=REGISTRY,
+)
+PROGRESS_WRITES = Counter(
+    "avtranscribe_progress_writes_total",
+    "Progress updates written to the database",
+    registry=REGISTRY,
+)
+API_UPLOAD_BYTES_SAVED = Counter(
+    "avtranscribe_api_upload_bytes_saved_total",
+    "Bytes not sent to the OpenAI API because the audio was re-encoded first",
+    registry=REGISTRY,
+)
+JOB_FAILURES = Counter(
+    "avtranscribe_job_failures_total",
+    "Transcription jobs that failed permanently",
+    ["mode"],
+    registry=REGISTRY,
+)
+JOB_RETRIES = Counter(
+    "avtranscribe_job_retries_total",
+    "Transcription job retries scheduled",
+    registry=REGISTRY,
+)
+
+def _collection_registry():
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    from prometheus_client import multiprocess
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def render_metrics() -> tuple[bytes, str]:
+    """Returns the exposition payload and its content type."""
+    return generate_latest(_collection_registry()), CONTENT_TYPE_LATEST
+
+def start_exporter(port: int):
+    """Starts a standalone HTTP exporter, used by the Celery worker."""
+    start_http_server(port, registry=_collection_registry())
+    logger.info("Prometheus exporter listening", port=port)
+
+def mark_process_dead(pid: int):
+    """Removes a dead child's live gauges from the multiprocess directory."""
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
+
+def observe_queue_wait(created_at) -> float | None:
+    """
+    Records how long a job sat in the queue before a worker picked it up.
+    Returns the wait in seconds, or None when the creation time is unknown.
+    """
+    if not isinstance(created_at, datetime):
+        return None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=UTC)
+    wait = max(0.0, (datetime.now(UTC) - created_at).total_seconds())
+    QUEUE_WAIT.observe(wait)
+    return wait
@@ -1,6 +1,8 @@
-from sqlalchemy import String, create_engine, DateTime
+from sqlalchemy import DDL, JSON, BigInteger, Float, ForeignKey, Index, Integer, String, UniqueConstraint, create_engine, event, inspect, select, text, DateTime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
 import os
+import threading
 from contextlib import contextmanager
 from datetime import datetime, UTC
 
@@ -16,15 +18,66 @@ if not DB_URL:
     else:
         DB_URL = "sqlite:///transcriptions.db"
 
-# Add sqlite-specific settings if needed, and ensure pool for in-memory
-engine_args = {}
-if "sqlite" in DB_URL:
-    engine_args["connect_args"] = {"check_same_thread": False}
-    if ":memory:" in DB_URL:
-         from sqlalchemy.pool import StaticPool
-         engine_args["poolclass"] = StaticPool
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
 
-engine = create_engine(DB_URL, **engine_args)
+def engine_options(db_url: str) -> dict:
+    """
+    Keyword arguments for create_engine, tuned per backend from env vars.
+
+    SQLite gets a busy timeout so concurrent writers wait instead of failing.
+    Postgres gets an explicit pool per process (DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING), or none at all with DB_PGBOUNCER=true,
+    where PgBouncer in transaction mode does the pooling.
+    """
+    options = {}
+    if db_url.startswith("sqlite"):
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")) / 1000,
+        }
+        if ":memory:" in db_url:
+            options["poolclass"] = StaticPool
+    elif db_url.startswith("postgresql"):
+        if _env_flag("DB_PGBOUNCER", "false"):
+            options["poolclass"] = NullPool
+            if db_url.startswith("postgresql+psycopg:"):
+                # Server-side prepared statements do not survive transaction pooling
+                options["connect_args"] = {"prepare_threshold": None}
+        else:
+            options["pool_size"] = int(os.getenv("DB_POOL_SIZE", "5"))
+            options["max_overflow"] = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+            options["pool_timeout"] = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+            options["pool_recycle"] = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+            options["pool_pre_ping"] = _env_flag("DB_POOL_PRE_PING", "true")
+    return options
+
+def configure_sqlite(engine):
+    """
+    Sets WAL mode, busy_timeout and synchronous on every new SQLite connection,
+    so status reads no longer wait for progress writes and writers queue on
+    the lock instead of raising "database is locked".
+    """
+    busy_timeout = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    wal = ":memory:" not in str(engine.url) and _env_flag("SQLITE_WAL", "true")
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.close()
+
+def make_engine(db_url: str):
+    engine = create_engine(db_url, **engine_options(db_url))
+    if engine.dialect.name == "sqlite":
+        configure_sqlite(engine)
+    return engine
+
+engine = make_engine(DB_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @contextmanager
@@ -46,17 +99,262 @@ class User(Base):
     username: Mapped[str] = mapped_column(String, unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String)
 
+class JobGroup(Base):
+    __tablename__ = "job_groups"
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
+
 class Transcription(Base):
     __tablename__ = "transcriptions"
+    # Serves per-user history newest first; id breaks ties for keyset pagination
+    __table_args__ = (Index("ix_transcriptions_user_id_created_at", "user_id", "created_at", "id"),)
     id: Mapped[str] = mapped_column(String, primary_key=True, index=True)
-    status: Mapped[str] = mapped_column(String, default="queued")
-    text: Mapped[str | None] = mapped_column(String, nullable=True)
+    status: Mapped[str] = mapped_column(String, default="queued", index=True)
+    user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    # Large payloads are deferred: loading a job for status or progress skips them
+    # until the attribute is read
+    text: Mapped[str | None] = mapped_column(String, nullable=True, deferred=True)
     csv_path: Mapped[str | None] = mapped_column(String, nullable=True)
     text_timestamps_path: Mapped[str | None] = mapped_column(String, nullable=True)
     filename: Mapped[str | None] = mapped_column(String, nullable=True)
     language: Mapped[str | None] = mapped_column(String, nullable=True)
+    language_probability: Mapped[float | None] = mapped_column(Float, nullable=True)
     diarize: Mapped[bool] = mapped_column(default=False)
     error_message: Mapped[str | None] = mapped_column(String, nullable=True)
     progress: Mapped[int] = mapped_column(default=0)
+    group_id: Mapped[str | None] = mapped_column(ForeignKey("job_groups.id"), nullable=True, index=True)
+    # Requested quality tier and what the model policy chose for it
+    quality: Mapped[str | None] = mapped_column(String, nullable=True)
+    # "transcribe", "translate" or "both" (transcript plus English translation)
+    task: Mapped[str] = mapped_column(String, default="transcribe")
+    word_timestamps: Mapped[bool] = mapped_column(default=False)
+    # Binary segment/word time index served by the range endpoint
+    index_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    translation: Mapped[str | None] = mapped_column(String, nullable=True, deferred=True)
+    translation_csv_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    translation_timestamps_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    duration: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # End of the last transcribed segment, and where the current attempt started (resumes)
+    audio_done: Mapped[float | None] = mapped_column(Float, nullable=True)
+    attempt_offset: Mapped[float | None] = mapped_column(Float, nullable=True)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Wall time of the finishing attempt divided by media duration
+    realtime_factor: Mapped[float | None] = mapped_column(Float, nullable=True)
+    model_name: Mapped[str | None] = mapped_column(String, nullable=True)
+    compute_type: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Per-stage durations in milliseconds, e.g. {"inference": 5210.4, "export": 12.1}
+    timings: Mapped[dict | None] = mapped_column(JSON, nullable=True, deferred=True)
+    # Completed segments and audio offset of an interrupted attempt, cleared once the job ends
+    checkpoint: Mapped[dict | None] = mapped_column(JSON, nullable=True, deferred=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+
+# Files written to the spool directory, swept by expires_at instead of scanning /tmp
+class Artifact(Base):
+    __tablename__ = "artifacts"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    path: Mapped[str] = mapped_column(String, unique=True)
+    kind: Mapped[str] = mapped_column(String)
+    task_id: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+# Resumable uploads: chunks are written in place into a preallocated spool file
+class Upload(Base):
+    __tablename__ = "uploads"
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    filename: Mapped[str] = mapped_column(String)
+    path: Mapped[str] = mapped_column(String)
+    size: Mapped[int] = mapped_column(BigInteger)
+    language: Mapped[str] = mapped_column(String, default="auto")
+    format: Mapped[str] = mapped_column(String, default="auto")
+    diarize: Mapped[bool] = mapped_column(default=False)
+    quality: Mapped[str | None] = mapped_column(String, nullable=True)
+    task: Mapped[str] = mapped_column(String, default="transcribe")
+    word_timestamps: Mapped[bool] = mapped_column(default=False)
+    status: Mapped[str] = mapped_column(String, default="open")
+    # chunk_list_digest of the chunks, set at finalize (not the SHA-256 of the file itself)
+    digest: Mapped[str | None] = mapped_column(String, nullable=True)
+    task_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+    __table_args__ = (UniqueConstraint("upload_id", "offset"),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    upload_id: Mapped[str] = mapped_column(ForeignKey("uploads.id"), index=True)
+    offset: Mapped[int] = mapped_column(BigInteger)
+    length: Mapped[int] = mapped_column(BigInteger)
+    sha256: Mapped[str] = mapped_column(String)
+
+# Queue of the local executor (JOB_EXECUTOR=local); a row lives until its job finishes
+class LocalJob(Base):
+    __tablename__ = "local_jobs"
+    __table_args__ = (Index("ix_local_jobs_status_created_at", "status", "created_at"),)
+    task_id: Mapped[str] = mapped_column(ForeignKey("transcriptions.id"), primary_key=True)
+    file_path: Mapped[str] = mapped_column(String)
+    language: Mapped[str] = mapped_column(String, default="auto")
+    format: Mapped[str] = mapped_column(String, default="auto")
+    diarize: Mapped[bool] = mapped_column(default=False)
+    status: Mapped[str] = mapped_column(String, default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    worker: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC))
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+# One row per segment of a finished transcript; the full-text index covers `text`
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+    __table_args__ = (Index("ix_transcript_segments_user_id_id", "user_id", "id"),)
+    # INTEGER PRIMARY KEY on SQLite so it doubles as the FTS5 content rowid
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    task_id: Mapped[str] = mapped_column(ForeignKey("transcriptions.id"), index=True)
+    user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    start: Mapped[float] = mapped_column(Float)
+    end: Mapped[float] = mapped_column(Float)
+    text: Mapped[str] = mapped_column(String)
+
+# SQLite: external-content FTS5 table kept in sync by triggers
+for statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transcript_segments_fts "
+    "USING fts5(text, content='transcript_segments', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS transcript_segments_ai AFTER INSERT ON transcript_segments BEGIN "
+    "INSERT INTO transcript_segments_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS transcript_segments_ad AFTER DELETE ON transcript_segments BEGIN "
+    "INSERT INTO transcript_segments_fts(transcript_segments_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+):
+    event.listen(TranscriptSegment.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    TranscriptSegment.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS transcript_segments_fts").execute_if(dialect="sqlite"),
+)
+
+# Postgres: GIN index over the tsvector the search query matches against
+event.listen(
+    TranscriptSegment.__table__, "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_transcript_segments_tsv ON transcript_segments "
+        "USING GIN (to_tsvector('simple', text))"
+    ).execute_if(dialect="postgresql"),
+)
+
+# Bump whenever a model gains a column or index, so existing databases are
+# reconciled once by init_db (create_all never alters a table that exists)
+SCHEMA_VERSION = 1
+
+class SchemaInfo(Base):
+    __tablename__ = "schema_info"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(Integer)
+
+def add_missing_columns(connection) -> list[str]:
+    """
+    Adds the columns and indexes models gained after their table was created.
+
+    Columns are added nullable, since existing rows have no value for them,
+    then backfilled with their scalar default if they have one. Foreign key
+    constraints are not added to existing tables.
+
+    Returns:
+        The "table.column" names added.
+    """
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    preparer = connection.dialect.identifier_preparer
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            connection.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=connection.dialect)}"
+            ))
+            if column.default is not None and column.default.is_scalar:
+                connection.execute(table.update().where(column.is_(None)).values({column.name: column.default.arg}))
+            added.append(f"{table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    return added
+
+# Arbitrary key for the Postgres advisory lock held while the schema is created
+SCHEMA_LOCK_KEY = 0x41565453
+_memory_schema_lock = threading.Lock()
+
+@contextmanager
+def schema_lock(bind):
+    """
+    Serialises init_db across processes, e.g. gunicorn workers that all start
+    with DB_AUTO_CREATE on: a Postgres advisory lock, or on SQLite an
+    exclusive lock on a file next to the database.
+    """
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as connection:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+                connection.commit()
+        return
+    database = bind.url.database if bind.dialect.name == "sqlite" else None
+    if not database or database == ":memory:":
+        with _memory_schema_lock:
+            yield
+        return
+    import fcntl
+    with open(f"{database}.schema-lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def init_db(bind=None):
+    """
+    Creates missing tables and upgrades existing ones to SCHEMA_VERSION.
+    Run once per deploy: python -m src.models
+
+    Returns:
+        The "table.column" names added to existing tables.
+    """
+    bind = bind or engine
+    with schema_lock(bind):
+        Base.metadata.create_all(bind=bind)
+        with bind.begin() as connection:
+            version = connection.execute(select(SchemaInfo.version).where(SchemaInfo.id == 1)).scalar()
+            if version is not None and version >= SCHEMA_VERSION:
+                return []
+            added = add_missing_columns(connection)
+            if version is None:
+                connection.execute(SchemaInfo.__table__.insert().values(id=1, version=SCHEMA_VERSION))
+            else:
+                connection.execute(SchemaInfo.__table__.update().where(SchemaInfo.id == 1).values(version=SCHEMA_VERSION))
+        return added
+
+_schema_checked = False
+
+def ensure_schema():
+    """
+    Creates the schema on first use in this process when DB_AUTO_CREATE allows it.
+    The default, auto, only does so for SQLite, whose file may be new on every
+    cold start (e.g. /tmp on Vercel); other databases are initialised by init_db.
+    """
+    global _schema_checked
+    if _schema_checked:
+        return
+    setting = os.getenv("DB_AUTO_CREATE", "auto").lower()
+    if setting == "true" or (setting == "auto" and engine.dialect.name == "sqlite"):
+        init_db()
+    _schema_checked = True
+
+if __name__ == "__main__":
+    added = init_db()
+    if added:
+        print(f"Added columns: {', '.join(added)}")
+    print(f"Schema ready on {engine.url.render_as_string(hide_password=True)}")
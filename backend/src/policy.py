@@ -0,0 +1,144 @@
+import os
+from typing import Optional
+import structlog
+from sqlalchemy import func, or_
+from .models import Transcription, session_scope
+
+logger = structlog.get_logger()
+
+# Smallest to largest; downgrades step left along this ladder
+MODEL_LADDER = ["tiny", "base", "small", "medium", "large-v3"]
+
+QUALITY_TIERS = ("fast", "balanced", "accurate")
+DEFAULT_QUALITY = "balanced"
+
+# Sizes that ship an English-only variant (tiny.en, base.en, ...)
+ENGLISH_ONLY_SIZES = {"tiny", "base", "small", "medium"}
+
+def tier_models() -> dict:
+    """Preferred model per quality tier; balanced follows WHISPER_MODEL."""
+    return {
+        "fast": os.getenv("FAST_WHISPER_MODEL", "tiny"),
+        "balanced": os.getenv("WHISPER_MODEL", "base"),
+        "accurate": os.getenv("ACCURATE_WHISPER_MODEL", "medium"),
+    }
+
+def language_models() -> dict:
+    """
+    Per-language model overrides from LANGUAGE_MODELS, e.g. "en=distil-large-v3,de=large-v3".
+    """
+    mapping = {}
+    for pair in os.getenv("LANGUAGE_MODELS", "").split(","):
+        lang, _, model = pair.partition("=")
+        if lang.strip() and model.strip():
+            mapping[lang.strip()] = model.strip()
+    return mapping
+
+def route_model(model: str, language: str, task: str = "transcribe") -> str:
+    """
+    Swaps in a language-specialised model once the language is known: a
+    LANGUAGE_MODELS override, else the English-only variant for English audio.
+    Translation keeps the multilingual model.
+    """
+    if task != "transcribe":
+        return model
+    override = language_models().get(language)
+    if override:
+        return override
+    if language == "en" and model in ENGLISH_ONLY_SIZES and os.getenv("ENGLISH_ONLY_MODELS", "true") == "true":
+        return f"{model}.en"
+    return model
+
+def probe_duration(file_path: str) -> Optional[float]:
+    """
+    Reads the media duration in seconds from the container header without decoding.
+    Returns None if PyAV is unavailable or the file cannot be probed.
+    """
+    try:
+        import av
+        with av.open(file_path) as container:
+            if container.duration:
+                return container.duration / av.time_base
+    except Exception as e:
+        logger.warning("Could not probe media duration", file=file_path, error=str(e))
+    return None
+
+def queue_backlog(db) -> int:
+    """Number of jobs waiting for a worker, including ones scheduled for retry."""
+    count = (
+        db.query(func.count(Transcription.id))
+        .filter(or_(Transcription.status == "queued", Transcription.status.like("retrying%")))
+        .scalar()
+    )
+    return int(count or 0)
+
+def _step_down(model: str, steps: int) -> str:
+    # Any large variant (large, large-v2, ...) sits at the top of the ladder
+    rank = len(MODEL_LADDER) - 1 if model.startswith("large") else (
+        MODEL_LADDER.index(model) if model in MODEL_LADDER else None
+    )
+    if steps <= 0 or rank is None:
+        return model
+    return MODEL_LADDER[max(0, rank - steps)]
+
+def select_model(quality: Optional[str], duration: Optional[float], backlog: int) -> dict:
+    """
+    Picks the model and compute type for one job.
+
+    Args:
+        quality: Requested tier ("fast", "balanced" or "accurate").
+        duration: Probed media length in seconds, if known.
+        backlog: Jobs currently waiting for a worker.
+
+    Returns:
+        Dict with "model", "compute_type" (None keeps the device default) and "reason".
+    """
+    high = int(os.getenv("BACKLOG_HIGH", "10"))
+    critical = int(os.getenv("BACKLOG_CRITICAL", "50"))
+    long_media = float(os.getenv("LONG_MEDIA_SECONDS", "1800"))
+
+    tier = quality if quality in QUALITY_TIERS else DEFAULT_QUALITY
+    preferred = tier_models()[tier]
+    if os.getenv("MODEL_POLICY", "adaptive") == "fixed":
+        return {"model": preferred, "compute_type": None, "reason": f"tier:{tier}"}
+
+    steps = 0
+    reasons = [f"tier:{tier}"]
+    if backlog >= critical:
+        steps += 2
+        reasons.append(f"backlog:{backlog}")
+    elif backlog >= high:
+        steps += 1
+        reasons.append(f"backlog:{backlog}")
+    # Long files hold a worker the longest, so they give way first under load
+    if steps and duration and duration >= long_media:
+        steps += 1
+        reasons.append(f"duration:{int(duration)}s")
+
+    model = _step_down(preferred, steps)
+    compute_type = "int8" if backlog >= critical else None
+    return {"model": model, "compute_type": compute_type, "reason": ",".join(reasons)}
+
+def choose_for_job(db, trans: Transcription, file_path: str) -> dict:
+    """Runs the policy for a job that is about to start and records the inputs on its row."""
+    if trans.duration is None:
+        trans.duration = probe_duration(file_path)
+    # The job itself is still counted as queued until its status is flushed
+    backlog = max(0, queue_backlog(db) - (1 if trans.status == "queued" else 0))
+    choice = select_model(trans.quality, trans.duration, backlog)
+    trans.model_name = choice["model"]
+    trans.compute_type = choice["compute_type"]
+    logger.info("Model selected", task_id=trans.id, **choice)
+    return choice
+
+def record_language(task_id: str, language: str, probability: float, model: str):
+    """Stores the pre-pass language and the model it routed to before inference starts."""
+    try:
+        with session_scope() as db:
+            trans = db.query(Transcription).filter(Transcription.id == task_id).first()
+            if trans:
+                trans.language = language
+                trans.language_probability = probability
+                trans.model_name = model
+    except Exception as e:
+        logger.error("Failed to record detected language", task_id=task_id, error=str(e))
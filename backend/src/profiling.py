@@ -0,0 +1,76 @@
+import os
+import random
+import time
+import cProfile
+from contextlib import contextmanager
+import structlog
+from .metrics import STAGE_SECONDS
+
+logger = structlog.get_logger()
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/avtranscribe-profiles")
+
+class StageTimer:
+    """
+    Collects wall-clock durations of named pipeline stages.
+    Durations are kept in milliseconds so the record stays compact when stored.
+    """
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds * 1000, 1)
+        STAGE_SECONDS.labels(stage=name).observe(seconds)
+
+    def update(self, stages: dict | None):
+        for name, ms in (stages or {}).items():
+            self.stages[name] = round(self.stages.get(name, 0.0) + ms, 1)
+
+def merge_timings(existing, stages: dict) -> dict:
+    """Merges newly measured stages into a stored timing record."""
+    merged = dict(existing or {})
+    merged.update(stages)
+    return merged
+
+# Work a dual-output job does once that two separate jobs would each repeat
+SHARED_DUAL_OUTPUT_STAGES = ("upload_spool", "audio_decode", "language_id", "model_acquisition", "diarization")
+
+def dual_output_saving(timings) -> float:
+    """Milliseconds a dual-output job saved compared with separate transcribe and translate jobs."""
+    return round(sum((timings or {}).get(name, 0.0) for name in SHARED_DUAL_OUTPUT_STAGES), 1)
+
+@contextmanager
+def maybe_profile(task_id: str):
+    """
+    Profiles the enclosed block with cProfile for a sampled fraction of jobs.
+    Enabled by PROFILE_SAMPLE_RATE (0.0-1.0); dumps are pstats files named after the task.
+    """
+    try:
+        rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    except ValueError:
+        rate = 0.0
+    if rate <= 0 or random.random() >= rate:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"{task_id}.prof")
+            profiler.dump_stats(path)
+            logger.info("Saved job profile", task_id=task_id, path=path)
+        except Exception as e:
+            logger.warning("Failed to save job profile", task_id=task_id, error=str(e))
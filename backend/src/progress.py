@@ -0,0 +1,106 @@
+import os
+import time
+from datetime import datetime, UTC
+from typing import Any, Callable, Dict, Optional
+
+# ETAs from fewer seconds of covered audio than this swing too much to show
+MIN_ETA_AUDIO_SECONDS = 5.0
+# Minimum seconds between checkpoint writes while a job runs
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", "30"))
+
+def media_passes(task: Optional[str]) -> int:
+    """How many times a job runs over its media: twice for a transcript plus translation."""
+    return 2 if task == "both" else 1
+
+def pass_position(position: float, pass_index: int, passes: int, duration: float) -> float:
+    """
+    Maps a position within one pass onto a single media timeline, so audio_done
+    reaches the duration only at the end of the last pass.
+    """
+    return (pass_index * duration + position) / passes
+
+def attempt_realtime_factor(elapsed: float, duration: Optional[float], attempt_offset: Optional[float]) -> Optional[float]:
+    """
+    Wall time per second of media this attempt covered; a resumed attempt only
+    covers what its checkpoint left. None when that is unknown or nothing.
+    """
+    if not duration:
+        return None
+    covered = duration - (attempt_offset or 0.0)
+    if covered <= 0:
+        return None
+    return round(elapsed / covered, 4)
+
+def progress_fraction(duration: Optional[float], audio_done: Optional[float]) -> Optional[float]:
+    """Share of the media transcribed so far (0.0-1.0), or None if the duration is unknown."""
+    if not duration or audio_done is None:
+        return None
+    return max(0.0, min(1.0, audio_done / duration))
+
+def eta_seconds(
+    duration: Optional[float],
+    audio_done: Optional[float],
+    attempt_offset: Optional[float],
+    started_at: Optional[datetime],
+    now: Optional[datetime] = None,
+) -> Optional[float]:
+    """
+    Seconds until the job finishes, from the real-time factor observed in the
+    current attempt.
+
+    Args:
+        duration: Media length in seconds.
+        audio_done: End of the last transcribed segment, in seconds of media.
+        attempt_offset: Media already covered when the attempt started (resumes).
+        started_at: When the attempt started.
+        now: Current time; defaults to now.
+
+    Returns:
+        Estimated seconds remaining, or None until enough audio is covered.
+    """
+    if not duration or audio_done is None or not isinstance(started_at, datetime):
+        return None
+    covered = audio_done - (attempt_offset or 0.0)
+    if covered < MIN_ETA_AUDIO_SECONDS:
+        return None
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=UTC)
+    elapsed = ((now or datetime.now(UTC)) - started_at).total_seconds()
+    remaining = max(0.0, duration - audio_done)
+    return round(max(0.0, elapsed) / covered * remaining, 1)
+
+def progress_fields(row: Any, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Duration, fraction and ETA for a job row with the progress columns loaded."""
+    done = row.status == "done"
+    return {
+        "duration": row.duration,
+        "fraction": 1.0 if done else progress_fraction(row.duration, row.audio_done),
+        "eta_seconds": None if done or row.status != "processing" else eta_seconds(
+            row.duration, row.audio_done, row.attempt_offset, row.started_at, now
+        ),
+    }
+
+class Checkpointer:
+    """
+    Keeps the latest checkpoint in memory and passes it to `save` at most every
+    `interval` seconds. flush() saves whatever is pending, e.g. before a retry.
+    """
+    def __init__(self, task_id: str, save: Callable[[str, dict], None], interval: float = CHECKPOINT_INTERVAL):
+        self.task_id = task_id
+        self.save = save
+        self.interval = interval
+        self.latest = None
+        self._dirty = False
+        self._last_write = time.monotonic()
+
+    def __call__(self, checkpoint: dict):
+        self.latest = checkpoint
+        self._dirty = True
+        if time.monotonic() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self._dirty:
+            self.save(self.task_id, self.latest)
+            self._dirty = False
+            self._last_write = time.monotonic()
@@ -0,0 +1,67 @@
+import re
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, literal_column, text
+from .models import Transcription, TranscriptSegment
+
+MAX_SEARCH_RESULTS = 100
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def fts5_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches all of its words.
+    Each word is quoted, so FTS5 operators in user input are taken literally.
+    """
+    return " ".join(f'"{token}"' for token in _TOKEN.findall(query))
+
+def index_transcript(db, task_id: str, user_id: Optional[int], segments: List[Dict[str, Any]]):
+    """
+    Replaces the searchable segments of a finished job. Adds to the caller's
+    session without committing, so the index lands with the job's results.
+    """
+    db.query(TranscriptSegment).filter(TranscriptSegment.task_id == task_id).delete(synchronize_session=False)
+    db.bulk_insert_mappings(TranscriptSegment, [
+        {
+            "task_id": task_id,
+            "user_id": user_id,
+            "start": float(seg.get("start") or 0.0),
+            "end": float(seg.get("end") or 0.0),
+            "text": (seg.get("text") or "").strip(),
+        }
+        for seg in segments
+    ])
+
+def search_segments(db, user_id: int, query: str, after: int = 0, limit: int = 20) -> List[Any]:
+    """
+    Segments of the user's transcripts matching every word of `query`, in index
+    order. Pass the last returned id as `after` to fetch the next page.
+
+    Returns:
+        Rows with id, task_id, filename, start, end and text.
+    """
+    dialect = db.get_bind().dialect.name
+    columns = (
+        TranscriptSegment.id, TranscriptSegment.task_id, Transcription.filename,
+        TranscriptSegment.start, TranscriptSegment.end, TranscriptSegment.text,
+    )
+    q = (
+        db.query(*columns)
+        .join(Transcription, Transcription.id == TranscriptSegment.task_id)
+        .filter(TranscriptSegment.user_id == user_id, TranscriptSegment.id > after)
+    )
+    if dialect == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return []
+        q = q.filter(text(
+            "transcript_segments.id IN "
+            "(SELECT rowid FROM transcript_segments_fts WHERE transcript_segments_fts MATCH :match)"
+        ).bindparams(match=match))
+    elif dialect == "postgresql":
+        # Literal config so the expression matches ix_transcript_segments_tsv
+        simple = literal_column("'simple'")
+        q = q.filter(func.to_tsvector(simple, TranscriptSegment.text).op("@@")(func.plainto_tsquery(simple, query)))
+    else:
+        for token in _TOKEN.findall(query):
+            q = q.filter(TranscriptSegment.text.ilike(f"%{token}%"))
+    return q.order_by(TranscriptSegment.id).limit(limit).all()
@@ -0,0 +1,89 @@
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Iterable, Optional
+from starlette.staticfiles import StaticFiles
+
+# Vite fingerprints everything under /assets, so a URL's content never changes
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Unhashed root files (manifest, icons): short-lived, revalidated via ETag
+SHORT_CACHE = "public, max-age=3600"
+NO_CACHE = "no-cache"
+
+# Precompressed variants by preference, as written by e.g. vite-plugin-compression
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+CACHE_NAME_PATTERN = re.compile(r"const CACHE_NAME = '[^']*';")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names `etag`, using the weak comparison GET allows."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def first_existing(paths: Iterable[str]) -> Optional[str]:
+    for path in paths:
+        if os.path.isfile(path):
+            return path
+    return None
+
+def resolve_root_files(frontend_dist: str, static_dir: str) -> Dict[str, Optional[str]]:
+    """
+    Resolves the root-level PWA files once: the built frontend wins, then the
+    frontend's public dir (vite.svg in development), then the backend's static dir.
+    """
+    public_dir = os.path.join(os.path.dirname(frontend_dist), "public")
+    return {
+        name: first_existing(os.path.join(d, name) for d in (frontend_dist, public_dir, static_dir))
+        for name in ("manifest.json", "sw.js", "icon.svg", "vite.svg")
+    }
+
+def build_hash(paths: Iterable[Optional[str]]) -> str:
+    """Short content hash of the files the service worker caches."""
+    digest = hashlib.sha256()
+    for path in paths:
+        if path and os.path.isfile(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+def render_service_worker(path: str, version: str) -> bytes:
+    """The service worker with CACHE_NAME set to this build, so a deploy replaces old caches."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    return CACHE_NAME_PATTERN.sub(f"const CACHE_NAME = 'avtranscribe-{version}';", source, count=1).encode("utf-8")
+
+def accepted_encodings(scope) -> set:
+    for key, value in scope.get("headers", ()):
+        if key == b"accept-encoding":
+            return {part.split(";")[0].strip() for part in value.decode("latin-1").split(",")}
+    return set()
+
+class HashedStaticFiles(StaticFiles):
+    """
+    StaticFiles for fingerprinted build output: long-lived immutable caching,
+    and a .br or .gz sibling served in place of the file when the client accepts it.
+    """
+    async def get_response(self, path: str, scope):
+        accepted = accepted_encodings(scope)
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = self.lookup_path(path + suffix)
+            if stat_result is None:
+                continue
+            response = await super().get_response(path + suffix, scope)
+            # A 304 revalidates this variant; falling through would resend the whole file
+            if response.status_code in (200, 304):
+                response.headers["Content-Encoding"] = encoding
+                response.headers["Content-Type"] = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                response.headers["Vary"] = "Accept-Encoding"
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE
+                return response
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -1,9 +1,22 @@
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 import os
 import time
-from .transcribe import transcribe_with_whisper
+from datetime import UTC, datetime
+from .transcribe import TranscriptionInputError, get_model, transcribe_with_whisper
 from .utils import clean_to_csv, save_timestamped_text, send_error_email
-from .models import session_scope, Transcription
+from .timeindex import write_time_index
+from .search import index_transcript
+from .artifacts import purge_expired, register_artifact
+from .models import engine, session_scope, Transcription
+from .metrics import (
+    EXPORT_SECONDS, JOB_FAILURES, JOB_RETRIES, PROGRESS_WRITES,
+    mark_process_dead, observe_queue_wait, start_exporter,
+)
+from .profiling import StageTimer, maybe_profile, merge_timings
+from .progress import Checkpointer, attempt_realtime_factor, media_passes, pass_position
+from .policy import choose_for_job, record_language
+from . import events  # noqa: F401  publishes status changes committed by this worker
 import structlog
 
 logger = structlog.get_logger()
@@ -17,48 +30,191 @@ app.conf.beat_schedule = {
     },
 }
 
-def update_progress(task_id: str):
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
     """
-    Increments the progress count for a transcription task.
+    Exposes worker metrics on CELERY_METRICS_PORT when set.
+    Set PROMETHEUS_MULTIPROC_DIR so prefork children are aggregated.
+    """
+    port = os.getenv("CELERY_METRICS_PORT")
+    if port:
+        start_exporter(int(port))
+
+# Pools whose job slots are threads of one process and can share a loaded model
+SHARED_MODEL_POOLS = {"threads", "solo"}
+
+def pool_name(pool_cls) -> str:
+    """Normalises a Celery pool alias or class to its alias, e.g. "prefork" or "threads"."""
+    if isinstance(pool_cls, str):
+        return pool_cls.split(":")[0].rsplit(".", 1)[-1]
+    module = pool_cls.__module__.rsplit(".", 1)[-1]
+    return "threads" if module == "thread" else module
+
+def tune_model_threads(concurrency: int, pool: str) -> dict:
+    """
+    Sizes ctranslate2 threading so concurrent jobs together use each core once.
+    Explicit WHISPER_CPU_THREADS and WHISPER_NUM_WORKERS settings are kept.
+
+    Args:
+        concurrency: Number of jobs the worker runs at once.
+        pool: Celery pool alias.
+
+    Returns:
+        The effective threading settings.
+    """
+    concurrency = max(1, concurrency)
+    os.environ.setdefault("WHISPER_CPU_THREADS", str(max(1, (os.cpu_count() or 1) // concurrency)))
+    if pool in SHARED_MODEL_POOLS:
+        # One model serves every job slot, so it needs a ctranslate2 worker per slot
+        os.environ.setdefault("WHISPER_NUM_WORKERS", str(concurrency))
+    return {
+        "cpu_threads": int(os.environ["WHISPER_CPU_THREADS"]),
+        "num_workers": int(os.getenv("WHISPER_NUM_WORKERS", "1")),
+    }
+
+@worker_init.connect
+def prepare_models(sender=None, **kwargs):
+    """
+    Applies the CPU-thread profile and preloads PRELOAD_MODELS before the first job.
+    Preloading is limited to thread-based pools: ctranslate2 thread pools do not
+    survive fork, so prefork children must load their own copy.
+    """
+    if sender is None or os.getenv("WHISPER_THREAD_PROFILE", "auto") == "off":
+        return
+    pool = pool_name(sender.pool_cls)
+    settings = tune_model_threads(sender.concurrency, pool)
+    logger.info("Model thread profile", pool=pool, concurrency=sender.concurrency, **settings)
+
+    names = [n.strip() for n in os.getenv("PRELOAD_MODELS", "").split(",") if n.strip()]
+    if not names:
+        return
+    if pool not in SHARED_MODEL_POOLS:
+        logger.warning("PRELOAD_MODELS needs --pool threads to share one model; skipping", pool=pool)
+        return
+    for name in names:
+        get_model(name)
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """
+    Drops pooled connections inherited from the parent; each prefork child
+    opens its own, up to DB_POOL_SIZE + DB_MAX_OVERFLOW.
+    """
+    engine.dispose(close=False)
+
+@worker_process_shutdown.connect
+def cleanup_metrics_process(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+def update_progress(task_id: str, position: float | None = None):
+    """
+    Increments the progress count for a transcription task and records how
+    far into the media (`position`, in seconds) transcription has reached.
     """
     try:
         with session_scope() as db:
             trans = db.query(Transcription).filter(Transcription.id == task_id).first()
             if trans:
                 trans.progress += 1
+                if position is not None:
+                    trans.audio_done = max(trans.audio_done or 0.0, position)
                 db.commit()
+                PROGRESS_WRITES.inc()
     except Exception as e:
         logger.error("Failed to update task progress", task_id=task_id, error=str(e))
 
+def save_checkpoint(task_id: str, checkpoint: dict):
+    """
+    Persists the completed segments and audio offset so a retry can resume.
+    """
+    try:
+        with session_scope() as db:
+            trans = db.query(Transcription).filter(Transcription.id == task_id).first()
+            if trans:
+                trans.checkpoint = {**checkpoint, "segments": list(checkpoint["segments"])}
+    except Exception as e:
+        logger.error("Failed to save task checkpoint", task_id=task_id, error=str(e))
+
+def fail_transcription(task_id: str, file_path: str, message: str, error: str):
+    """
+    Marks a job as failed, notifies the admin and removes its input file.
+    """
+    with session_scope() as db:
+        trans = db.query(Transcription).filter(Transcription.id == task_id).first()
+        if trans:
+            trans.status = "failed"
+            trans.error_message = message
+            trans.checkpoint = None
+
+    JOB_FAILURES.labels(mode="celery").inc()
+    send_error_email(task_id, error)
+
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
 @app.task(bind=True, max_retries=3)
 def transcribe_task(self, file_path: str, language: str, format: str, task_id: str, diarize: bool = False):
     """
     Celery task for transcribing media files with automated retries.
     """
+    timer = StageTimer()
+    checkpointer = Checkpointer(task_id, save_checkpoint)
     try:
-        # Update status to processing and reset progress
+        # Update status to processing; progress resumes from any checkpoint
         with session_scope() as db:
             trans = db.query(Transcription).filter(Transcription.id == task_id).first()
             if not trans:
                 logger.error("Transcription record not found", task_id=task_id)
                 return
+            if self.request.retries == 0:
+                queue_wait = observe_queue_wait(trans.created_at)
+                if queue_wait is not None:
+                    timer.record("queue_wait", queue_wait)
+            checkpoint = dict(trans.checkpoint) if trans.checkpoint else None
+            choice = choose_for_job(db, trans, file_path)
+            job_task = trans.task or "transcribe"
+            word_timestamps = bool(trans.word_timestamps)
             trans.status = "processing"
-            trans.progress = 0
+            trans.progress = len(checkpoint["segments"]) if checkpoint else 0
+            trans.attempt_offset = trans.audio_done = (
+                pass_position(checkpoint["offset"], 0, media_passes(job_task), 0.0) if checkpoint else 0.0
+            )
+            trans.started_at = datetime.now(UTC)
+        started = time.perf_counter()
 
-        logger.info("Starting transcription task", task_id=task_id, file=file_path)
+        logger.info(
+            "Starting transcription task", task_id=task_id, file=file_path,
+            resume_offset=checkpoint["offset"] if checkpoint else None
+        )
         
         # Execute transcription with progress callback
-        def on_segment():
-            update_progress(task_id)
+        def on_segment(position=None):
+            update_progress(task_id, position)
 
-        result = transcribe_with_whisper(file_path, language=language, on_segment=on_segment, diarize=diarize)
+        with maybe_profile(task_id):
+            result = transcribe_with_whisper(
+                file_path, language=language, task=job_task, on_segment=on_segment, diarize=diarize,
+                resume_from=checkpoint, on_checkpoint=checkpointer,
+                model_name=choice["model"], compute_type=choice["compute_type"],
+                on_language=lambda lang, prob, model: record_language(task_id, lang, prob, model),
+                word_timestamps=word_timestamps
+            )
+        timer.update(result.get("timings"))
         
         text = result.get("text", "").strip()
         segments = result.get("segments", [])
         detected_lang = result.get("language", language)
         progress_count = len(segments)
-        csv_path = clean_to_csv(segments, task_id)
-        text_timestamps_path = save_timestamped_text(segments, task_id)
+        with timer.stage("export"):
+            with EXPORT_SECONDS.labels(format="csv").time():
+                csv_path = clean_to_csv(segments, task_id)
+            with EXPORT_SECONDS.labels(format="text_timestamps").time():
+                text_timestamps_path = save_timestamped_text(segments, task_id)
+            index_path = write_time_index(segments, result.get("words"), task_id)
+            translation = result.get("translation")
+            if translation:
+                translation_csv_path = clean_to_csv(translation["segments"], f"{task_id}_translation")
+                translation_timestamps_path = save_timestamped_text(translation["segments"], f"{task_id}_translation")
         
         # Update record with results
         with session_scope() as db:
@@ -67,9 +223,30 @@ def transcribe_task(self, file_path: str, language: str, format: str, task_id: s
                 trans.text = text
                 trans.csv_path = csv_path
                 trans.text_timestamps_path = text_timestamps_path
+                trans.index_path = index_path
                 trans.language = detected_lang
                 trans.progress = progress_count
+                trans.model_name = result.get("model", choice["model"])
+                trans.compute_type = result.get("compute_type", choice["compute_type"])
+                trans.language_probability = result.get("language_probability")
+                trans.timings = merge_timings(trans.timings, timer.stages)
+                trans.checkpoint = None
+                if translation:
+                    trans.translation = translation["text"].strip()
+                    trans.translation_csv_path = translation_csv_path
+                    trans.translation_timestamps_path = translation_timestamps_path
                 trans.status = "done"
+                trans.audio_done = trans.duration
+                trans.realtime_factor = attempt_realtime_factor(
+                    time.perf_counter() - started, trans.duration, trans.attempt_offset
+                )
+                index_transcript(db, task_id, trans.user_id, segments)
+            register_artifact(db, csv_path, "csv", task_id)
+            register_artifact(db, text_timestamps_path, "text_timestamps", task_id)
+            register_artifact(db, index_path, "time_index", task_id)
+            if translation:
+                register_artifact(db, translation_csv_path, "csv", task_id)
+                register_artifact(db, translation_timestamps_path, "text_timestamps", task_id)
         
         logger.info("Transcription complete", task_id=task_id)
         
@@ -77,62 +254,38 @@ def transcribe_task(self, file_path: str, language: str, format: str, task_id: s
         if os.path.exists(file_path):
             os.remove(file_path)
             
+    except TranscriptionInputError as e:
+        # Decode and format errors fail the same way on every attempt
+        logger.error("Transcription input rejected", task_id=task_id, error=str(e))
+        fail_transcription(task_id, file_path, f"Invalid media file: {str(e)}", str(e))
+        raise
+
     except Exception as e:
         logger.error("Transcription task failed", task_id=task_id, error=str(e))
         
         # Handle retries
         if self.request.retries < self.max_retries:
+            # Keep the work done so far for the next attempt
+            checkpointer.flush()
             with session_scope() as db:
                 trans = db.query(Transcription).filter(Transcription.id == task_id).first()
                 if trans:
                     trans.status = f"retrying ({self.request.retries + 1}/{self.max_retries})"
             
             # Exponential backoff: 60, 120, 240 seconds
+            JOB_RETRIES.inc()
             retry_delay = 60 * (2 ** self.request.retries)
             raise self.retry(exc=e, countdown=retry_delay)
         else:
             # Final failure
-            with session_scope() as db:
-                trans = db.query(Transcription).filter(Transcription.id == task_id).first()
-                if trans:
-                    trans.status = "failed"
-                    trans.error_message = f"Failed after {self.max_retries} retries: {str(e)}"
-            
-            # Final failure
-            send_error_email(task_id, str(e))
-
-            # Cleanup input file on final failure
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            fail_transcription(task_id, file_path, f"Failed after {self.max_retries} retries: {str(e)}", str(e))
             raise e
 
 @app.task
 def cleanup_temp_files():
     """
-    Cleans up files in /tmp that are older than 24 hours and match AVTranscribe patterns.
-    """
-    logger.info("Starting periodic cleanup of temp files")
-    tmp_dir = "/tmp"
-    now = time.time()
-    cutoff = now - (24 * 3600)
-    
-    count = 0
-    for filename in os.listdir(tmp_dir):
-        # Match files that have a UUID prefix (typical for our app)
-        # Patterns: {uuid}_{filename} or {uuid}.txt / {uuid}.csv
-        is_app_file = False
-        if any(filename.endswith(ext) for ext in [".txt", ".csv", ".mp3", ".wav", ".mp4", ".avi", ".mov"]):
-             # Check for UUID-like prefix (36 chars for UUID)
-             if len(filename) >= 36:
-                 is_app_file = True
-
-        if is_app_file:
-            file_path = os.path.join(tmp_dir, filename)
-            try:
-                if os.path.getmtime(file_path) < cutoff:
-                    os.remove(file_path)
-                    count += 1
-            except Exception as e:
-                logger.warning(f"Failed to delete {file_path}", error=str(e))
-    
+    Deletes expired uploads and result files recorded in the artifact registry.
+    """
+    logger.info("Starting periodic cleanup of expired artifacts")
+    count = purge_expired()
     logger.info(f"Cleanup finished. Deleted {count} files.")
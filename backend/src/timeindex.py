@@ -0,0 +1,188 @@
+import bisect
+import mmap
+import struct
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .utils import spool_path
+
+# magic, segment count, word count; every section after it is 8-byte aligned
+HEADER = struct.Struct("<8sQQ")
+MAGIC = b"AVTIDX01"
+
+# Upper bound on items returned by one range query
+MAX_RANGE_ITEMS = 5000
+
+class WordTimeline:
+    """
+    Word timings kept as parallel arrays plus one UTF-8 text blob, instead of
+    one dict per word. segment_offsets[i]:segment_offsets[i + 1] are the words
+    of segment i.
+    """
+    def __init__(self):
+        self.starts = array("d")
+        self.ends = array("d")
+        self.text = bytearray()
+        self.text_offsets = array("Q", [0])
+        self.segment_offsets = array("Q", [0])
+
+    def add_segment(self, words: Iterable[Any], offset: float = 0.0):
+        """Appends the words of the next segment; `words` carry .start, .end and .word."""
+        for word in words or ():
+            self.starts.append(word.start + offset)
+            self.ends.append(word.end + offset)
+            self.text += word.word.encode("utf-8")
+            self.text_offsets.append(len(self.text))
+        self.segment_offsets.append(len(self.starts))
+
+    def __len__(self):
+        return len(self.starts)
+
+def _running_max(values: array) -> array:
+    # Segment and word ends are almost always ordered, but not guaranteed;
+    # searching the running maximum keeps bisect correct either way
+    result = array("d")
+    current = float("-inf")
+    for value in values:
+        current = max(current, value)
+        result.append(current)
+    return result
+
+def _pack_strings(strings: Iterable[str]) -> Tuple[array, bytes]:
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += (s or "").encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+def write_time_index(segments: List[Dict[str, Any]], words: Optional[WordTimeline], task_id: str) -> str:
+    """
+    Writes a binary time index of segments (and words, if collected) for range queries.
+
+    Args:
+        segments: Segment dictionaries in time order.
+        words: Word timings collected during transcription, or None.
+        task_id: Unique task identifier for naming the file.
+
+    Returns:
+        Path to the generated index file.
+    """
+    words = words or WordTimeline()
+    if len(words.segment_offsets) != len(segments) + 1:
+        # Word timings no longer line up with the segments (e.g. after a resume); keep segments only
+        words = WordTimeline()
+        for _ in segments:
+            words.add_segment(())
+
+    seg_starts = array("d", (float(s["start"]) for s in segments))
+    seg_ends = array("d", (float(s["end"]) for s in segments))
+    text_offsets, text_blob = _pack_strings(s.get("text", "").strip() for s in segments)
+    speaker_offsets, speaker_blob = _pack_strings(s.get("speaker", "") for s in segments)
+
+    path = spool_path(f"{task_id}.idx")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(segments), len(words)))
+        for section in (
+            seg_starts, seg_ends, _running_max(seg_ends), words.segment_offsets, text_offsets, speaker_offsets,
+            words.starts, words.ends, _running_max(words.ends), words.text_offsets,
+        ):
+            f.write(section.tobytes())
+        f.write(text_blob)
+        f.write(speaker_blob)
+        f.write(words.text)
+    return path
+
+class TimeIndex:
+    """
+    Read-only view over a file written by write_time_index. The file is memory
+    mapped and searched in place, so a query only touches the pages it returns.
+    """
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        magic, n_segments, n_words = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Not a time index file")
+        self._pos = HEADER.size
+
+        self.seg_starts = self._take("d", n_segments)
+        self.seg_ends = self._take("d", n_segments)
+        self.seg_max_ends = self._take("d", n_segments)
+        self.seg_word_offsets = self._take("Q", n_segments + 1)
+        self.seg_text_offsets = self._take("Q", n_segments + 1)
+        self.seg_speaker_offsets = self._take("Q", n_segments + 1)
+        self.word_starts = self._take("d", n_words)
+        self.word_ends = self._take("d", n_words)
+        self.word_max_ends = self._take("d", n_words)
+        self.word_text_offsets = self._take("Q", n_words + 1)
+        self.seg_text = self._take("B", self.seg_text_offsets[-1])
+        self.seg_speakers = self._take("B", self.seg_speaker_offsets[-1])
+        self.word_text = self._take("B", self.word_text_offsets[-1])
+
+    def _take(self, fmt: str, count: int) -> memoryview:
+        size = count * (1 if fmt == "B" else 8)
+        view = memoryview(self._mmap)[self._pos:self._pos + size].cast(fmt)
+        self._views.append(view)
+        self._pos += size
+        return view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+        self._file.close()
+
+    @property
+    def has_words(self) -> bool:
+        return len(self.word_starts) > 0
+
+    @staticmethod
+    def _window(starts, max_ends, ends, t0: float, t1: float, limit: int) -> List[int]:
+        lo = bisect.bisect_right(max_ends, t0)
+        hi = bisect.bisect_left(starts, t1)
+        hits = []
+        for i in range(lo, hi):
+            if ends[i] > t0:
+                hits.append(i)
+                if len(hits) >= limit:
+                    break
+        return hits
+
+    @staticmethod
+    def _string(blob: memoryview, offsets: memoryview, i: int) -> str:
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def segments(self, t0: float, t1: float, limit: int = MAX_RANGE_ITEMS) -> List[Dict[str, Any]]:
+        """Segments overlapping [t0, t1]."""
+        result = []
+        for i in self._window(self.seg_starts, self.seg_max_ends, self.seg_ends, t0, t1, limit):
+            seg = {
+                "start": self.seg_starts[i],
+                "end": self.seg_ends[i],
+                "text": self._string(self.seg_text, self.seg_text_offsets, i),
+            }
+            speaker = self._string(self.seg_speakers, self.seg_speaker_offsets, i)
+            if speaker:
+                seg["speaker"] = speaker
+            result.append(seg)
+        return result
+
+    def words(self, t0: float, t1: float, limit: int = MAX_RANGE_ITEMS) -> List[Dict[str, Any]]:
+        """Words overlapping [t0, t1]."""
+        return [
+            {
+                "start": self.word_starts[i],
+                "end": self.word_ends[i],
+                "word": self._string(self.word_text, self.word_text_offsets, i),
+            }
+            for i in self._window(self.word_starts, self.word_max_ends, self.word_ends, t0, t1, limit)
+        ]
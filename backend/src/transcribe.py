@@ -1,22 +1,115 @@
 import os
+import subprocess
+import threading
+import time
+import uuid
 import structlog
-from typing import Any, Dict, Callable, Optional, List
+from typing import Any, Dict, Callable, Optional, List, Tuple
+from .metrics import API_UPLOAD_BYTES_SAVED, MODEL_LOAD, MODEL_CACHE, REALTIME_FACTOR, SEGMENTS_PER_SECOND, DIARIZATION_SECONDS
+from .profiling import StageTimer
+from .policy import route_model
+from .progress import media_passes, pass_position
+from .timeindex import WordTimeline
+from .utils import spool_path
 
 logger = structlog.get_logger()
 
-# Global model cache
+# Global model cache, shared by every thread of the process
 _MODELS = {}
+# One lock per (model, compute type), held only while that model loads
+_MODEL_LOCKS = {}
 
-def get_model(model_name: str):
-    """Retrieves or loads a Faster-Whisper model."""
+# Whisper models consume 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+# Trailing transcript passed as the prompt when resuming mid-file
+RESUME_PROMPT_CHARS = 200
+
+# Audio examined by the language-ID pre-pass; Whisper detects on one 30 s window
+LANGID_SECONDS = 30
+
+# langdetect is only a fallback; a few thousand characters are plenty for it
+LANGDETECT_MAX_CHARS = 2000
+
+# The OpenAI audio endpoints reject uploads larger than this
+OPENAI_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# ffmpeg encoder and container per OPENAI_AUDIO_FORMAT; both are accepted by the API
+API_AUDIO_CODECS = {
+    "opus": ("libopus", ".ogg"),
+    "mp3": ("libmp3lame", ".mp3"),
+}
+# Longest the re-encode may run before the input is treated as bad
+API_ENCODE_TIMEOUT = float(os.getenv("OPENAI_AUDIO_TIMEOUT", "600"))
+
+class TranscriptionInputError(Exception):
+    """The input file itself cannot be transcribed; retrying will not help."""
+
+def model_options() -> Dict[str, int]:
+    """
+    ctranslate2 threading options from WHISPER_CPU_THREADS (threads per inference)
+    and WHISPER_NUM_WORKERS (concurrent inferences on one model). Unset values keep
+    faster-whisper's defaults.
+    """
+    options = {}
+    for env, key in (("WHISPER_CPU_THREADS", "cpu_threads"), ("WHISPER_NUM_WORKERS", "num_workers")):
+        value = os.getenv(env)
+        if value:
+            options[key] = int(value)
+    return options
+
+def default_compute_type() -> str:
+    """float16 on CUDA, int8 on CPU."""
+    try:
+        import torch
+        return "float16" if torch.cuda.is_available() else "int8"
+    except ImportError:
+        return "int8"
+
+def get_model(model_name: str, compute_type: Optional[str] = None):
+    """Retrieves or loads a Faster-Whisper model, cached per model and compute type."""
     from faster_whisper import WhisperModel
     import torch
-    if model_name not in _MODELS:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        compute_type = "float16" if device == "cuda" else "int8"
-        logger.info("Loading Faster-Whisper model", model=model_name, device=device, compute_type=compute_type)
-        _MODELS[model_name] = WhisperModel(model_name, device=device, compute_type=compute_type)
-    return _MODELS[model_name]
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    compute_type = compute_type or ("float16" if device == "cuda" else "int8")
+    key = (model_name, compute_type)
+    # Fast path: a loaded model never waits behind another model's load
+    model = _MODELS.get(key)
+    if model is None:
+        # setdefault is atomic, so every thread gets the same lock for a key
+        with _MODEL_LOCKS.setdefault(key, threading.Lock()):
+            model = _MODELS.get(key)
+            if model is None:
+                MODEL_CACHE.labels(model=model_name, result="miss").inc()
+                options = model_options()
+                logger.info("Loading Faster-Whisper model", model=model_name, device=device, compute_type=compute_type, **options)
+                with MODEL_LOAD.labels(model=model_name).time():
+                    model = _MODELS[key] = WhisperModel(model_name, device=device, compute_type=compute_type, **options)
+                return model
+    MODEL_CACHE.labels(model=model_name, result="hit").inc()
+    return model
+
+def _observe_throughput(backend: str, elapsed: float, duration: float, segment_count: int):
+    """Records real-time factor and segment throughput for a finished job."""
+    if duration > 0:
+        REALTIME_FACTOR.labels(backend=backend).observe(elapsed / duration)
+    if elapsed > 0:
+        SEGMENTS_PER_SECOND.observe(segment_count / elapsed)
+
+def load_audio(file_path: str, sampling_rate: int = SAMPLE_RATE):
+    """
+    Decodes a media file into mono float32 samples at the given rate.
+
+    Raises:
+        TranscriptionInputError: If the file is missing or cannot be decoded.
+    """
+    from faster_whisper import decode_audio
+    try:
+        return decode_audio(file_path, sampling_rate=sampling_rate)
+    except MemoryError:
+        raise
+    except Exception as e:
+        raise TranscriptionInputError(f"Could not decode media file: {e}") from e
 
 def detect_language_fallback(text: str) -> str:
     """
@@ -27,46 +120,172 @@ def detect_language_fallback(text: str) -> str:
         from langdetect import detect
         if not text or len(text.strip()) < 5:
             return "en"
-        return detect(text)
+        return detect(text[:LANGDETECT_MAX_CHARS])
     except Exception as e:
         logger.warning("langdetect failed, defaulting to 'en'", error=str(e))
         return "en"
 
+def identify_language(audio) -> Tuple[Optional[str], float]:
+    """
+    Cheap language-ID pre-pass over the first LANGID_SECONDS of decoded audio,
+    using a small model (LANGID_MODEL, default "tiny").
+
+    Returns:
+        The detected language code and its probability, or (None, 0.0) on failure.
+    """
+    try:
+        model = get_model(os.getenv("LANGID_MODEL", "tiny"))
+        # Detection runs eagerly inside transcribe(); the segment generator is never consumed
+        _, info = model.transcribe(audio[:LANGID_SECONDS * SAMPLE_RATE], beam_size=1, without_timestamps=True)
+        return info.language, float(info.language_probability)
+    except Exception as e:
+        logger.warning("Language pre-pass failed", error=str(e))
+        return None, 0.0
+
+def api_audio_settings() -> Optional[Tuple[str, str]]:
+    """
+    Format and bitrate for audio sent to the OpenAI API, from OPENAI_AUDIO_FORMAT
+    (opus, mp3 or off; default opus) and OPENAI_AUDIO_BITRATE (default 32k).
+    None when the original file should be sent unchanged.
+    """
+    audio_format = os.getenv("OPENAI_AUDIO_FORMAT", "opus").lower()
+    if audio_format not in API_AUDIO_CODECS:
+        return None
+    return audio_format, os.getenv("OPENAI_AUDIO_BITRATE", "32k")
+
+def encode_for_api(file_path: str) -> Optional[str]:
+    """
+    Re-encodes the audio track to 16 kHz mono at a speech bitrate, which is all
+    Whisper uses, so the upload carries no video or surplus fidelity.
+
+    Returns:
+        Path of a file in the spool directory the caller must remove, or None to
+        send the original (encoding disabled, ffmpeg missing or failing, or no smaller).
+
+    Raises:
+        TranscriptionInputError: If ffmpeg runs past OPENAI_AUDIO_TIMEOUT.
+    """
+    settings = api_audio_settings()
+    if settings is None:
+        return None
+    audio_format, bitrate = settings
+    codec, suffix = API_AUDIO_CODECS[audio_format]
+    out_path = spool_path(f"api-{uuid.uuid4().hex}{suffix}")
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", file_path,
+        "-vn", "-map_metadata", "-1",
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-c:a", codec, "-b:a", bitrate,
+        out_path,
+    ]
+    keep = False
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, timeout=API_ENCODE_TIMEOUT)
+        keep = os.path.getsize(out_path) < os.path.getsize(file_path)
+    except subprocess.TimeoutExpired:
+        raise TranscriptionInputError(f"Audio re-encode did not finish within {API_ENCODE_TIMEOUT:g}s")
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", None)
+        logger.warning(
+            "Audio re-encode failed, sending the original file",
+            file=file_path,
+            error=(stderr.decode(errors="replace").strip() if stderr else str(e)),
+        )
+    finally:
+        if not keep and os.path.exists(out_path):
+            os.remove(out_path)
+    return out_path if keep else None
+
 def transcribe_with_openai_api(file_path: str, language: str = "auto", task: str = "transcribe") -> Dict[str, Any]:
     """
     Transcribes a media file using the OpenAI Whisper API.
+    The audio is re-encoded first (see encode_for_api) to cut upload size.
     Note: Real-time progress and Diarization are not supported for OpenAI API in this implementation.
     """
-    from openai import OpenAI
+    from openai import BadRequestError, OpenAI
     client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
     logger.info("Starting OpenAI API Whisper task", file=file_path, language=language, task=task)
 
-    with open(file_path, "rb") as audio_file:
-        lang = None if language == "auto" else language
+    timer = StageTimer()
+    with timer.stage("api_encode"):
+        encoded_path = encode_for_api(file_path)
+    try:
+        upload_path = encoded_path or file_path
+        original_bytes = os.path.getsize(file_path)
+        upload_bytes = os.path.getsize(upload_path)
+        if upload_bytes > OPENAI_MAX_UPLOAD_BYTES:
+            logger.warning("Upload exceeds the OpenAI API size limit", file=file_path, bytes=upload_bytes)
 
-        if task == "translate":
-            response = client.audio.translations.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json"
-            )
-        else:
-            response = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language=lang,
-                response_format="verbose_json"
-            )
+        started = time.perf_counter()
+        with timer.stage("inference"), open(upload_path, "rb") as audio_file:
+            lang = None if language == "auto" else language
+
+            try:
+                if task == "translate":
+                    response = client.audio.translations.create(
+                        model="whisper-1",
+                        file=audio_file,
+                        response_format="verbose_json"
+                    )
+                else:
+                    response = client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=audio_file,
+                        language=lang,
+                        response_format="verbose_json"
+                    )
+            except BadRequestError as e:
+                # The API rejected the file itself (format, size or corrupt audio)
+                raise TranscriptionInputError(f"OpenAI API rejected the file: {e}") from e
+
+        result = response.model_dump()
+        result["model"] = "whisper-1"
+        result["compute_type"] = None
+
+        if task == "both":
+            # The API has no shared decode, so the file is sent a second time
+            with timer.stage("translation"), open(upload_path, "rb") as audio_file:
+                translation = client.audio.translations.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="verbose_json"
+                ).model_dump()
+            result["translation"] = {"text": translation.get("text", ""), "segments": translation.get("segments") or []}
+    finally:
+        if encoded_path:
+            os.remove(encoded_path)
+
+    elapsed = time.perf_counter() - started
+    _observe_throughput("openai", elapsed, float(result.get("duration") or 0), len(result.get("segments") or []))
+    if encoded_path:
+        _log_upload_savings(file_path, original_bytes, upload_bytes, 2 if task == "both" else 1, elapsed, timer)
 
-    result = response.model_dump()
-    
     # Language detection fallback for OpenAI API
     if language == "auto" and not result.get("language"):
-        result["language"] = detect_language_fallback(result.get("text", ""))
-        
+        with timer.stage("language_fallback"):
+            result["language"] = detect_language_fallback(result.get("text", ""))
+
+    result["timings"] = timer.stages
     return result
 
+def _log_upload_savings(file_path: str, original_bytes: int, upload_bytes: int, uploads: int, elapsed: float, timer: StageTimer):
+    saved = (original_bytes - upload_bytes) * uploads
+    API_UPLOAD_BYTES_SAVED.inc(saved)
+    # Request time includes server-side work, so this understates bandwidth
+    # and the upload time saved is an upper estimate
+    rate = upload_bytes * uploads / elapsed if elapsed > 0 else 0
+    logger.info(
+        "Re-encoded audio for the OpenAI API",
+        file=file_path,
+        original_bytes=original_bytes,
+        upload_bytes=upload_bytes,
+        bytes_saved=saved,
+        encode_ms=timer.stages.get("api_encode"),
+        upload_seconds_saved_est=round(saved / rate, 2) if rate else None,
+    )
+
 def diarize_audio(file_path: str) -> List[Dict[str, Any]]:
     """
     Performs speaker diarization using pyannote.audio.
@@ -92,7 +311,8 @@ def diarize_audio(file_path: str) -> List[Dict[str, Any]]:
             pipeline.to(torch.device("cuda"))
 
         logger.info("Starting diarization", file=file_path)
-        diarization = pipeline(file_path)
+        with DIARIZATION_SECONDS.time():
+            diarization = pipeline(file_path)
 
         speaker_segments = []
         for turn, _, speaker in diarization.itertracks(yield_label=True):
@@ -140,12 +360,33 @@ def merge_speakers(whisper_segments: List[Dict[str, Any]], speaker_segments: Lis
         merged.append(seg)
     return merged
 
+def _translate(
+    model, audio, language: Optional[str], on_segment: Optional[Callable] = None, duration: float = 0.0
+) -> Dict[str, Any]:
+    """Runs the English translation pass of a dual-output job on already decoded audio."""
+    segments = []
+    segments_gen, _ = model.transcribe(audio, language=language, task="translate", beam_size=5)
+    for segment in segments_gen:
+        segments.append({"start": segment.start, "end": segment.end, "text": segment.text})
+        if on_segment:
+            try:
+                on_segment(pass_position(segment.end, 1, 2, duration))
+            except Exception:
+                pass
+    return {"text": "".join(seg["text"] for seg in segments).strip(), "segments": segments}
+
 def transcribe_with_whisper(
     file_path: str,
     language: str = "auto",
     task: str = "transcribe",
     diarize: bool = False,
-    on_segment: Optional[Callable] = None
+    on_segment: Optional[Callable] = None,
+    resume_from: Optional[Dict[str, Any]] = None,
+    on_checkpoint: Optional[Callable[[Dict[str, Any]], None]] = None,
+    model_name: Optional[str] = None,
+    compute_type: Optional[str] = None,
+    on_language: Optional[Callable[[str, float, str], None]] = None,
+    word_timestamps: bool = False
 ) -> Dict[str, Any]:
     """
     Transcribes a media file using either Faster-Whisper or OpenAI API.
@@ -153,12 +394,27 @@ def transcribe_with_whisper(
     Args:
         file_path: Path to the media (audio or video) file.
         language: Language code or "auto" for detection.
-        task: Whisper task type ("transcribe" or "translate").
+        task: Whisper task type ("transcribe" or "translate"), or "both" for a transcript
+            plus an English translation (under "translation") from one decode.
         diarize: Whether to perform speaker diarization.
-        on_segment: Callback triggered for each transcribed segment (local only).
+        on_segment: Callback triggered for each transcribed segment, given its end time in
+            seconds of media. Task "both" covers the media twice, so both passes report
+            onto one timeline: the transcript's first half, the translation's second (local only).
+        resume_from: Checkpoint from an earlier attempt; audio before its offset is skipped
+            and its segments are kept (local only).
+        on_checkpoint: Callback given the checkpoint after each completed segment (local only).
+        model_name: Faster-Whisper model to use; defaults to WHISPER_MODEL.
+        compute_type: ctranslate2 compute type; defaults to the device's.
+        on_language: Callback given the pre-pass language, its probability and the
+            routed model before inference starts (local only, language="auto").
+        word_timestamps: Collect per-word timings into a WordTimeline under "words" (local only).
         
     Returns:
-        The full Whisper result dictionary.
+        The full Whisper result dictionary, plus per-stage durations under "timings"
+        and the "model" and "compute_type" that served the job.
+
+    Raises:
+        TranscriptionInputError: If the input cannot be decoded or is rejected outright.
     """
     if os.getenv("OPENAI_API_KEY") or os.getenv("USE_OPENAI_API") == "true":
         try:
@@ -170,53 +426,147 @@ def transcribe_with_whisper(
             logger.warning("OpenAI API failed, falling back to local faster-whisper", error=str(e))
 
     try:
-        model_name = os.getenv("WHISPER_MODEL", "base")
-        model = get_model(model_name)
-        
+        timer = StageTimer()
+        model_name = model_name or os.getenv("WHISPER_MODEL", "base")
+        # The translation pass of a dual-output job needs the multilingual model
+        translation_model_name = model_name
+        compute_type = compute_type or default_compute_type()
         lang = None if language == "auto" else language
-        
-        logger.info("Starting Faster-Whisper task", file=file_path, language=language, task=task, model=model_name)
-
-        # Faster-whisper transcribe returns (segments_generator, info)
-        segments_gen, info = model.transcribe(
-            file_path,
-            language=lang,
-            task=task,
-            beam_size=5
-        )
+        primary_task = "transcribe" if task == "both" else task
 
+        # Resume after the last segment a previous attempt completed
+        offset = 0.0
         segments = []
-        full_text = []
-        for segment in segments_gen:
-            seg_dict = {
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text
-            }
-            segments.append(seg_dict)
-            full_text.append(segment.text)
-            if on_segment:
+        if resume_from:
+            offset = float(resume_from.get("offset") or 0.0)
+            segments = list(resume_from.get("segments") or [])
+            lang = lang or resume_from.get("language")
+        full_text = [seg["text"] for seg in segments]
+
+        # Decode up front so decoding and inference are timed separately
+        with timer.stage("audio_decode"):
+            audio = load_audio(file_path)
+
+        # Identify the language from the opening audio so the full pass can skip
+        # detection and run on a language-specialised model where one applies
+        language_probability = None
+        if lang is None and os.getenv("LANGID_PREPASS", "true") == "true":
+            with timer.stage("language_id"):
+                detected, language_probability = identify_language(audio)
+            if detected and language_probability >= float(os.getenv("LANGID_MIN_PROBABILITY", "0.5")):
+                lang = detected
+                model_name = route_model(model_name, lang, primary_task)
+            if detected and on_language:
                 try:
-                    on_segment()
+                    on_language(detected, language_probability, model_name)
                 except Exception:
                     pass
+
+        full_audio = audio
+        passes = media_passes(task)
+        media_duration = len(full_audio) / SAMPLE_RATE
+        if offset:
+            audio = audio[int(offset * SAMPLE_RATE):]
+
+        with timer.stage("model_acquisition"):
+            model = get_model(model_name, compute_type)
         
+        logger.info(
+            "Starting Faster-Whisper task", file=file_path, language=language, task=task,
+            model=model_name, resume_offset=offset, detected_language=lang
+        )
+
+        options = {}
+        words = None
+        if word_timestamps:
+            options["word_timestamps"] = True
+            words = WordTimeline()
+            # Checkpointed segments were transcribed without their words
+            for _ in segments:
+                words.add_segment(())
+        if full_text:
+            # Keeps wording and style consistent across the resume point
+            options["initial_prompt"] = "".join(full_text)[-RESUME_PROMPT_CHARS:]
+
+        # Faster-whisper transcribe returns (segments_generator, info)
+        started = time.perf_counter()
+        resumed_count = len(segments)
+        with timer.stage("inference"):
+            segments_gen, info = model.transcribe(
+                audio,
+                language=lang,
+                task=primary_task,
+                beam_size=5,
+                **options
+            )
+            for segment in segments_gen:
+                seg_dict = {
+                    "start": segment.start + offset,
+                    "end": segment.end + offset,
+                    "text": segment.text
+                }
+                segments.append(seg_dict)
+                full_text.append(segment.text)
+                if words is not None:
+                    words.add_segment(segment.words, offset)
+                if on_segment:
+                    try:
+                        on_segment(pass_position(seg_dict["end"], 0, passes, media_duration))
+                    except Exception:
+                        pass
+                if on_checkpoint:
+                    try:
+                        on_checkpoint({"offset": seg_dict["end"], "segments": segments, "language": info.language})
+                    except Exception:
+                        pass
+        # Inference runs lazily while the generator is consumed
+        _observe_throughput(
+            "local",
+            time.perf_counter() - started,
+            float(getattr(info, "duration", 0) or 0),
+            len(segments) - resumed_count,
+        )
+
         result = {
             "text": "".join(full_text).strip(),
             "segments": segments,
-            "language": info.language
+            "language": info.language,
+            "language_probability": language_probability or getattr(info, "language_probability", None),
+            "model": model_name,
+            "compute_type": compute_type
         }
+        if words is not None:
+            result["words"] = words
+
+        # Second output from the same decoded audio, language and diarization
+        if task == "both":
+            with timer.stage("translation"):
+                if info.language == "en":
+                    # Translating English into English would only repeat the transcript
+                    result["translation"] = {"text": result["text"], "segments": [dict(seg) for seg in segments]}
+                else:
+                    if translation_model_name == model_name:
+                        translation_model = model
+                    else:
+                        translation_model = get_model(translation_model_name, compute_type)
+                    result["translation"] = _translate(translation_model, full_audio, info.language, on_segment, media_duration)
 
         # Speaker Diarization
         if diarize:
-            speaker_segments = diarize_audio(file_path)
+            with timer.stage("diarization"):
+                speaker_segments = diarize_audio(file_path)
             if speaker_segments:
-                result["segments"] = merge_speakers(result["segments"], speaker_segments)
+                with timer.stage("merge_speakers"):
+                    result["segments"] = merge_speakers(result["segments"], speaker_segments)
+                    if "translation" in result:
+                        result["translation"]["segments"] = merge_speakers(result["translation"]["segments"], speaker_segments)
 
         # Language detection fallback
         if language == "auto" and (not result.get("language") or result.get("language") == "unknown"):
-            result["language"] = detect_language_fallback(result.get("text", ""))
+            with timer.stage("language_fallback"):
+                result["language"] = detect_language_fallback(result.get("text", ""))
 
+        result["timings"] = timer.stages
         return result
     except ImportError as e:
         logger.error("Faster-Whisper or dependencies not available", error=str(e))
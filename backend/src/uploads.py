@@ -0,0 +1,78 @@
+import hashlib
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+
+# Resumable uploads are allowed well past the 100MB single-request cap
+MAX_RESUMABLE_UPLOAD_SIZE = int(os.getenv("MAX_RESUMABLE_UPLOAD_MB", "4096")) * 1024 * 1024
+RECOMMENDED_CHUNK_SIZE = 8 * 1024 * 1024
+# Digest of a chunk whose span is reserved but whose bytes are still being written
+PENDING_DIGEST = ""
+
+def preallocate(path: str, size: int):
+    """Creates the destination file at its final size so chunks can land at any offset."""
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+async def write_chunk(path: str, offset: int, size: int, stream: AsyncIterator[bytes]) -> Tuple[int, str]:
+    """
+    Writes a streamed chunk in place at `offset`, hashing it as it arrives.
+
+    Returns:
+        The number of bytes written and the chunk's SHA-256 hex digest.
+
+    Raises:
+        ValueError: If the chunk would run past the declared upload size.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        async for data in stream:
+            if not data:
+                continue
+            if offset + written + len(data) > size:
+                raise ValueError("Chunk exceeds declared upload length")
+            os.pwrite(fd, data, offset + written)
+            digest.update(data)
+            written += len(data)
+    finally:
+        os.close(fd)
+    return written, digest.hexdigest()
+
+def missing_ranges(chunks: List[Tuple[int, int]], size: int) -> List[Tuple[int, int]]:
+    """Returns the [start, end) byte ranges not yet covered by (offset, length) chunks."""
+    missing = []
+    position = 0
+    for offset, length in sorted(chunks):
+        if offset > position:
+            missing.append((position, offset))
+        position = max(position, offset + length)
+    if position < size:
+        missing.append((position, size))
+    return missing
+
+def overlapping_chunk(chunks: List[Tuple[int, int]], offset: int, length: int) -> Optional[int]:
+    """Offset of a recorded chunk, other than one at `offset` itself, that [offset, offset + length) overlaps."""
+    for start, chunk_length in sorted(chunks):
+        if start != offset and start < offset + length and offset < start + chunk_length:
+            return start
+    return None
+
+def has_overlaps(chunks: List[Tuple[int, int]]) -> bool:
+    position = 0
+    for offset, length in sorted(chunks):
+        if offset < position:
+            return True
+        position = offset + length
+    return False
+
+def chunk_list_digest(chunk_digests: List[Tuple[int, str]]) -> str:
+    """
+    SHA-256 over the per-chunk SHA-256s in offset order. It identifies the
+    upload without re-reading the assembled file at finalize, but it is not
+    the file's own SHA-256 and depends on how the upload was chunked.
+    """
+    combined = hashlib.sha256()
+    for _, chunk_digest in sorted(chunk_digests):
+        combined.update(bytes.fromhex(chunk_digest))
+    return combined.hexdigest()
@@ -1,17 +1,27 @@
 import csv
 import os
-import smtplib
-import ssl
 import structlog
-from email.message import EmailMessage
 from fastapi import UploadFile
 
 logger = structlog.get_logger()
 
+# Everything the app writes lives under one namespaced directory
+SPOOL_DIR = os.getenv("SPOOL_DIR", "/tmp/avtranscribe")
+
+def spool_path(name: str) -> str:
+    """Returns a path for `name` inside the spool directory, creating it if needed."""
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    return os.path.join(SPOOL_DIR, name)
+
 def send_error_email(task_id: str, error_message: str):
     """
     Sends an error alert email when a transcription task fails.
     """
+    # Only failing jobs send mail, so the SMTP stack stays out of cold starts
+    import smtplib
+    import ssl
+    from email.message import EmailMessage
+
     smtp_host = os.getenv("SMTP_HOST")
     smtp_port = os.getenv("SMTP_PORT", "587")
     smtp_user = os.getenv("SMTP_USER")
@@ -78,7 +88,7 @@ def clean_to_csv(segments: list, task_id: str) -> str:
     Returns:
         Path to the generated CSV file.
     """
-    csv_path = f"/tmp/{task_id}.csv"
+    csv_path = spool_path(f"{task_id}.csv")
 
     # Check if speaker info is present in any segment
     has_speaker = any("speaker" in seg for seg in segments)
@@ -111,7 +121,7 @@ def save_text(text: str, task_id: str) -> str:
     Returns:
         Path to the generated text file.
     """
-    txt_path = f"/tmp/{task_id}.txt"
+    txt_path = spool_path(f"{task_id}.txt")
     with open(txt_path, "w", encoding="utf-8") as f:
         f.write(text or "")
     return txt_path
@@ -136,7 +146,7 @@ def save_timestamped_text(segments: list, task_id: str) -> str:
     Returns:
         Path to the generated timestamped text file.
     """
-    txt_path = f"/tmp/{task_id}_timestamps.txt"
+    txt_path = spool_path(f"{task_id}_timestamps.txt")
     with open(txt_path, "w", encoding="utf-8") as f:
         for seg in segments:
             start = format_timestamp(seg.get("start", 0.0))
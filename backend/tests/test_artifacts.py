@@ -0,0 +1,111 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta, UTC
+from unittest.mock import patch
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from src.models import Artifact, Base, Upload, UploadChunk, User
+from src.artifacts import purge_expired, register_artifact
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@contextmanager
+def scoped_test_session():
+    session = TestingSessionLocal()
+    try:
+        yield session
+        session.commit()
+    finally:
+        session.close()
+
+@pytest.fixture
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    with patch("src.artifacts.session_scope", scoped_test_session):
+        yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def _spool(tmp_path, name):
+    path = tmp_path / name
+    path.write_text("data")
+    return str(path)
+
+def test_register_artifact_refreshes_expiry(db_session):
+    register_artifact(db_session, "/spool/a.csv", "csv", "task-1", ttl_hours=1)
+    db_session.commit()
+    register_artifact(db_session, "/spool/a.csv", "csv", "task-1", ttl_hours=48)
+    db_session.commit()
+
+    artifacts = db_session.query(Artifact).all()
+    assert len(artifacts) == 1
+    assert artifacts[0].expires_at > datetime.now(UTC).replace(tzinfo=None) + timedelta(hours=47)
+
+def test_purge_expired_deletes_only_expired(db_session, tmp_path):
+    old = _spool(tmp_path, "old.mp3")
+    fresh = _spool(tmp_path, "fresh.csv")
+    unrelated = _spool(tmp_path, "someone_elses.txt")
+    register_artifact(db_session, old, "upload", ttl_hours=-1)
+    register_artifact(db_session, fresh, "csv")
+    register_artifact(db_session, str(tmp_path / "already_gone.txt"), "text", ttl_hours=-1)
+    db_session.commit()
+
+    assert purge_expired() == 2
+
+    assert not os.path.exists(old)
+    assert os.path.exists(fresh)
+    assert os.path.exists(unrelated)
+    assert [a.path for a in db_session.query(Artifact).all()] == [fresh]
+
+def test_purge_expired_in_batches(db_session, tmp_path):
+    for i in range(5):
+        register_artifact(db_session, _spool(tmp_path, f"{i}.csv"), "csv", ttl_hours=-1)
+    db_session.commit()
+
+    assert purge_expired(batch_size=2) == 5
+    assert db_session.query(Artifact).count() == 0
+    assert os.listdir(tmp_path) == []
+
+def test_purge_expired_removes_upload_rows(db_session, tmp_path):
+    user = User(username="u", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+    path = _spool(tmp_path, "partial.wav")
+    db_session.add(Upload(id="up-1", user_id=user.id, filename="partial.wav", path=path, size=8))
+    db_session.add(UploadChunk(upload_id="up-1", offset=0, length=4, sha256="00"))
+    register_artifact(db_session, path, "upload", ttl_hours=-1)
+    db_session.commit()
+
+    assert purge_expired() == 1
+    assert db_session.query(Upload).count() == 0
+    assert db_session.query(UploadChunk).count() == 0
+
+def test_purge_expired_keeps_inputs_of_unfinished_jobs(db_session, tmp_path):
+    from src.models import Transcription
+    waiting = _spool(tmp_path, "waiting.wav")
+    finished = _spool(tmp_path, "finished.wav")
+    unfinalized = _spool(tmp_path, "unfinalized.wav")
+    db_session.add_all([
+        Transcription(id="job-waiting", status="retrying (1/3)"),
+        Transcription(id="job-finished", status="done"),
+    ])
+    register_artifact(db_session, waiting, "upload", "job-waiting", ttl_hours=-1)
+    register_artifact(db_session, finished, "upload", "job-finished", ttl_hours=-1)
+    register_artifact(db_session, unfinalized, "upload", ttl_hours=-1)
+    db_session.commit()
+
+    assert purge_expired() == 2
+    assert os.path.exists(waiting)
+    assert not os.path.exists(finished)
+    assert not os.path.exists(unfinalized)
+
+def test_register_artifact_attaches_task_id_on_refresh(db_session):
+    register_artifact(db_session, "/spool/up.wav", "upload")
+    db_session.commit()
+    register_artifact(db_session, "/spool/up.wav", "upload", "task-1")
+    db_session.commit()
+    assert db_session.query(Artifact).one().task_id == "task-1"
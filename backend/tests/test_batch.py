@@ -0,0 +1,180 @@
+import io
+import os
+import zipfile
+import pytest
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+from backend.src.main import app, get_db
+from backend.src.models import Base, Transcription, User
+from backend.src.batch import stream_zip
+
+# Test Database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@contextmanager
+def scoped_test_session():
+    session = TestingSessionLocal()
+    try:
+        yield session
+        session.commit()
+    finally:
+        session.close()
+
+@pytest.fixture(scope="function")
+def authenticated_client(db_session):
+    user = User(username="batcher", hashed_password="fakehashedpassword")
+    db_session.add(user)
+    db_session.commit()
+
+    from backend.src.main import get_current_user as gcu
+
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[gcu] = lambda: user
+    app.state.limiter.enabled = False
+    with patch("backend.src.main.run_transcription_sync") as mock_run, \
+            patch("backend.src.main.session_scope", scoped_test_session):
+        with TestClient(app) as c:
+            c.mock_run = mock_run
+            yield c
+    app.dependency_overrides.clear()
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def test_stream_zip_roundtrip(tmp_path):
+    path = tmp_path / "a.csv"
+    path.write_bytes(b"start,end,text\n" * 1000)
+    data = b"".join(stream_zip([("a.csv", str(path)), ("b.txt", b"hello")]))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.read("b.txt") == b"hello"
+        assert archive.read("a.csv") == path.read_bytes()
+
+def test_batch_multiple_files(authenticated_client, db_session):
+    files = [("files", ("a.mp3", b"aaa", "audio/mpeg")), ("files", ("b.wav", b"bbb", "audio/wav"))]
+    response = authenticated_client.post("/batch", files=files, data={"language": "en"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2
+    assert authenticated_client.mock_run.call_count == 2
+    jobs = db_session.query(Transcription).filter(Transcription.group_id == body["group_id"]).all()
+    assert sorted(j.filename for j in jobs) == ["a.mp3", "b.wav"]
+
+def test_batch_probes_durations_off_the_event_loop(authenticated_client, db_session):
+    import asyncio
+    probed = []
+
+    def probe(path):
+        # Only the event loop's own thread has a running loop
+        try:
+            asyncio.get_running_loop()
+            probed.append(True)
+        except RuntimeError:
+            probed.append(False)
+        return 12.5 if path.endswith(".mp3") else 3.0
+
+    files = [("files", ("a.mp3", b"aaa", "audio/mpeg")), ("files", ("b.wav", b"bbb", "audio/wav"))]
+    with patch("backend.src.main.probe_duration", side_effect=probe):
+        response = authenticated_client.post("/batch", files=files)
+    assert response.status_code == 200
+    assert probed == [False, False]
+    jobs = db_session.query(Transcription).filter(Transcription.group_id == response.json()["group_id"]).all()
+    assert {j.filename: j.duration for j in jobs} == {"a.mp3": 12.5, "b.wav": 3.0}
+
+def test_batch_zip_extracts_media_only(authenticated_client, db_session):
+    archive = _zip({"talks/one.mp3": b"1", "talks/two.mp4": b"2", "notes.txt": b"x", "__MACOSX/.one.mp3": b"junk"})
+    response = authenticated_client.post("/batch", files=[("files", ("talks.zip", archive, "application/zip"))])
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+    spooled = [call.args[0] for call in authenticated_client.mock_run.call_args_list]
+    assert all(os.path.exists(p) for p in spooled)
+    for p in spooled:
+        os.remove(p)
+
+def test_batch_rejects_invalid_member(authenticated_client, db_session):
+    files = [("files", ("a.mp3", b"aaa", "audio/mpeg")), ("files", ("b.txt", b"bbb", "text/plain"))]
+    response = authenticated_client.post("/batch", files=files)
+    assert response.status_code == 400
+    assert db_session.query(Transcription).count() == 0
+
+def _damaged_zip(damage):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("ok.mp3", b"fine")
+        archive.writestr("bad.mp3", os.urandom(4096))
+    return damage(bytearray(buffer.getvalue()))
+
+def _corrupt_second_member(data):
+    # Garble the compressed bytes of bad.mp3, after its local header
+    start = data.index(b"bad.mp3") + len(b"bad.mp3") + 10
+    data[start:start + 64] = bytes(64)
+    return bytes(data)
+
+def _encrypt_flag_second_member(data):
+    # Mark bad.mp3 as encrypted in the central directory
+    header = data.index(b"PK\x01\x02", data.index(b"PK\x01\x02") + 4)
+    data[header + 8] |= 0x1
+    return bytes(data)
+
+@pytest.mark.parametrize("damage", [_corrupt_second_member, _encrypt_flag_second_member])
+def test_batch_rejects_damaged_archive_without_leaving_files(authenticated_client, db_session, tmp_path, monkeypatch, damage):
+    monkeypatch.setattr("backend.src.utils.SPOOL_DIR", str(tmp_path))
+    archive = _damaged_zip(damage)
+    response = authenticated_client.post("/batch", files=[("files", ("talks.zip", archive, "application/zip"))])
+    assert response.status_code == 400
+    assert "bad.mp3" in response.json()["detail"]
+    assert list(tmp_path.iterdir()) == []
+    assert db_session.query(Transcription).count() == 0
+
+def test_batch_status_and_download(authenticated_client, db_session, tmp_path):
+    files = [("files", ("a.mp3", b"aaa", "audio/mpeg")), ("files", ("b.mp3", b"bbb", "audio/mpeg"))]
+    group_id = authenticated_client.post("/batch", files=files).json()["group_id"]
+
+    status = authenticated_client.get(f"/batch/{group_id}").json()
+    assert status["status"] == "queued"
+    assert status["counts"] == {"queued": 2}
+    assert authenticated_client.get(f"/batch/{group_id}/download").status_code == 400
+
+    csv_path = tmp_path / "a.csv"
+    csv_path.write_text("start,end,text\n0,1,hi\n")
+    a, b = sorted(db_session.query(Transcription).all(), key=lambda t: t.filename)
+    a.status, a.text, a.csv_path = "done", "hi", str(csv_path)
+    b.status = "failed"
+    db_session.commit()
+
+    status = authenticated_client.get(f"/batch/{group_id}").json()
+    assert status["status"] == "partial"
+    assert status["finished"] == 2
+
+    response = authenticated_client.get(f"/batch/{group_id}/download")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert sorted(archive.namelist()) == ["001_a.csv", "001_a.txt"]
+        assert archive.read("001_a.txt") == b"hi"
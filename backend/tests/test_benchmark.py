@@ -0,0 +1,46 @@
+from benchmarks.bench_db_contention import run_benchmark as run_contention_benchmark
+from benchmarks.audio import SAMPLE_RATE, synth_samples
+from benchmarks.bench_status_rows import run_benchmark as run_status_benchmark
+from benchmarks.bench_transcribe import StubWhisperModel, compare, run_case
+
+def test_synth_samples_length_and_silence():
+    samples = synth_samples(12)
+    assert len(samples) == 12 * SAMPLE_RATE
+    # 4s tone then 1s silence
+    assert max(samples[:4 * SAMPLE_RATE]) > 1000
+    assert max(samples[4 * SAMPLE_RATE + 100:5 * SAMPLE_RATE - 100]) == 0
+
+def test_stub_model_is_deterministic():
+    audio = synth_samples(12)
+    model = StubWhisperModel()
+    first = [(s.start, s.end, s.text) for s in model.transcribe(audio)[0]]
+    second = [(s.start, s.end, s.text) for s in model.transcribe(audio)[0]]
+    assert first == second
+    assert [(start, end) for start, end, _ in first] == [(0.0, 4.0), (5.0, 9.0), (10.0, 12.0)]
+
+def test_run_case_reports_stage_costs(tmp_path):
+    report = run_case(10, workdir=str(tmp_path))
+    assert report["segments"] == 2
+    assert report["progress_writes"] == 2
+    assert report["rtf"] > 0
+    assert report["peak_rss_mb"] > 0
+    assert {"inference", "merge_speakers", "progress_writes", "export"} <= set(report["stages"])
+
+def test_compare_flags_regressions_past_tolerance():
+    baseline = {"cases": {"30": {"rtf": 0.1, "stages": {"export": 100.0}}}}
+    ok = {"cases": {"30": {"rtf": 0.12, "stages": {"export": 120.0}}}}
+    slow = {"cases": {"30": {"rtf": 0.2, "stages": {"export": 400.0}}}}
+    assert compare(ok, baseline, tolerance=0.25) == []
+    regressions = compare(slow, baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert any("rtf" in r for r in regressions)
+
+def test_status_rows_benchmark_reports_each_query():
+    report = run_status_benchmark(jobs=3, text_kb=4, lookups=5)
+    assert set(report["ms_per_lookup"]) == {"full_row", "orm_row", "status_columns"}
+    assert all(ms > 0 for ms in report["ms_per_lookup"].values())
+
+def test_db_contention_benchmark_compares_engines():
+    report = run_contention_benchmark(writers=1, readers=1, seconds=0.2)
+    assert set(report["engines"]) == {"default", "tuned"}
+    assert report["engines"]["tuned"]["writes_per_s"] > 0
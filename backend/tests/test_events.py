@@ -0,0 +1,225 @@
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import pytest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.src import events
+from backend.src.main import app, get_db
+from backend.src.models import Base, Transcription, make_engine
+
+# Test Database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+events.watch_sessions(TestingSessionLocal)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+def scoped_sessions(session_factory):
+    @contextmanager
+    def scope():
+        session = session_factory()
+        try:
+            yield session
+            session.commit()
+        finally:
+            session.close()
+    return scope
+
+@pytest.fixture(scope="function")
+def client(db_session, monkeypatch):
+    monkeypatch.setenv("STATUS_EVENTS", "local")
+
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    with patch("backend.src.main.session_scope", scoped_sessions(TestingSessionLocal)), TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+def test_commit_publishes_status_and_progress_changes(db_session, monkeypatch):
+    monkeypatch.setenv("STATUS_EVENTS", "local")
+    received = []
+
+    async def run():
+        broker = events.StatusBroker()
+        monkeypatch.setattr(events, "broker", broker)
+        broker.start(asyncio.get_running_loop())
+        with broker.subscription("job-1") as updates:
+            db_session.add(Transcription(id="job-1", status="queued"))
+            db_session.commit()
+            received.append(await asyncio.wait_for(updates.get(), 1))
+
+            trans = db_session.query(Transcription).filter(Transcription.id == "job-1").first()
+            trans.filename = "renamed.mp3"
+            db_session.commit()
+            trans.progress += 3
+            db_session.commit()
+            received.append(await asyncio.wait_for(updates.get(), 1))
+            assert updates.empty()
+        broker.stop()
+
+    asyncio.run(run())
+    assert received == [
+        {"task_id": "job-1", "status": "queued", "progress": 0, "fraction": None},
+        {"task_id": "job-1", "status": "queued", "progress": 3, "fraction": None},
+    ]
+
+def test_rollback_publishes_nothing(db_session, monkeypatch):
+    monkeypatch.setenv("STATUS_EVENTS", "redis")
+    monkeypatch.setattr(events, "_redis_client", MagicMock())
+    db_session.add(Transcription(id="job-2", status="queued"))
+    db_session.flush()
+    db_session.rollback()
+    events._redis_client.publish.assert_not_called()
+
+    db_session.add(Transcription(id="job-2", status="processing"))
+    db_session.commit()
+    channel, payload = events._redis_client.publish.call_args.args
+    assert channel == events.CHANNEL
+    assert json.loads(payload) == {"task_id": "job-2", "status": "processing", "progress": 0, "fraction": None}
+
+def test_status_wait_returns_when_job_finishes(client, db_session):
+    task_id = str(uuid.uuid4())
+    db_session.add(Transcription(id=task_id, status="processing"))
+    db_session.commit()
+
+    def finish():
+        time.sleep(0.3)
+        writer = TestingSessionLocal()
+        writer.query(Transcription).filter(Transcription.id == task_id).first().status = "done"
+        writer.commit()
+        writer.close()
+
+    threading.Thread(target=finish).start()
+    started = time.perf_counter()
+    response = client.get(f"/status/{task_id}?wait=10", headers={"Accept": "application/json"})
+    assert response.json()["status"] == "done"
+    assert time.perf_counter() - started < 5
+
+def test_status_events_stream_ends_for_finished_job(client, db_session):
+    task_id = str(uuid.uuid4())
+    db_session.add(Transcription(id=task_id, status="done", progress=4))
+    db_session.commit()
+
+    with client.stream("GET", f"/status/{task_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    assert body.startswith("data: ")
+    assert json.loads(body[len("data: "):])["progress"] == 4
+
+def test_status_events_not_found(client):
+    assert client.get(f"/status/{uuid.uuid4()}/events").status_code == 404
+
+def test_waiting_requests_hold_no_pooled_connection(tmp_path, monkeypatch):
+    monkeypatch.setenv("STATUS_EVENTS", "local")
+    file_engine = make_engine(f"sqlite:///{tmp_path / 'status.db'}")
+    Base.metadata.create_all(bind=file_engine)
+    Session = sessionmaker(bind=file_engine)
+    events.watch_sessions(Session)
+    stream_id, poll_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with Session() as db:
+        db.add_all([Transcription(id=stream_id, status="processing"), Transcription(id=poll_id, status="processing")])
+        db.commit()
+
+    def override_get_db():
+        with Session() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    bodies = {}
+    try:
+        with patch("backend.src.main.session_scope", scoped_sessions(Session)), TestClient(app) as c:
+            def watch():
+                with c.stream("GET", f"/status/{stream_id}/events") as response:
+                    bodies["stream"] = "".join(response.iter_text())
+
+            def poll():
+                bodies["poll"] = c.get(f"/status/{poll_id}?wait=10", headers={"Accept": "application/json"}).json()
+
+            threads = [threading.Thread(target=watch, daemon=True), threading.Thread(target=poll, daemon=True)]
+            for t in threads:
+                t.start()
+            time.sleep(0.5)
+            checked_out = file_engine.pool.checkedout()
+
+            with Session() as db:
+                for trans in db.query(Transcription).all():
+                    trans.status = "done"
+                db.commit()
+            for t in threads:
+                t.join(timeout=10)
+    finally:
+        app.dependency_overrides.clear()
+    assert checked_out == 0
+    assert '"status": "done"' in bodies["stream"]
+    assert bodies["poll"]["status"] == "done"
+    file_engine.dispose()
+
+def test_stream_sees_changes_committed_by_another_process(tmp_path, monkeypatch):
+    from backend.src import main
+    monkeypatch.setenv("STATUS_EVENTS", "local")
+    monkeypatch.setattr(main, "STATUS_POLL_SECONDS", 0.2)
+    path = tmp_path / "status.db"
+    file_engine = make_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=file_engine)
+    Session = sessionmaker(bind=file_engine)
+    stream_id, poll_id = str(uuid.uuid4()), str(uuid.uuid4())
+    with Session() as db:
+        db.add_all([Transcription(id=stream_id, status="processing"), Transcription(id=poll_id, status="processing")])
+        db.commit()
+
+    def override_get_db():
+        with Session() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    bodies = {}
+    with patch("backend.src.main.session_scope", scoped_sessions(Session)), TestClient(app) as c:
+        assert not events.broker.live
+
+        def watch():
+            with c.stream("GET", f"/status/{stream_id}/events") as response:
+                bodies["stream"] = "".join(response.iter_text())
+
+        def poll():
+            bodies["poll"] = c.get(f"/status/{poll_id}?wait=10", headers={"Accept": "application/json"}).json()
+
+        threads = [threading.Thread(target=watch, daemon=True), threading.Thread(target=poll, daemon=True)]
+        for t in threads:
+            t.start()
+        time.sleep(0.3)
+        # e.g. a local executor worker: its commit is never dispatched to this process
+        subprocess.run(
+            [sys.executable, "-c", "import sqlite3, sys; db = sqlite3.connect(sys.argv[1]); "
+             "db.execute(\"UPDATE transcriptions SET status = 'done'\"); db.commit()", str(path)],
+            check=True,
+        )
+        for t in threads:
+            t.join(timeout=10)
+    app.dependency_overrides.clear()
+    assert '"status": "done"' in bodies["stream"]
+    assert bodies["poll"]["status"] == "done"
+    file_engine.dispose()
@@ -0,0 +1,208 @@
+import signal
+import threading
+import pytest
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.src import executor
+from backend.src.models import Base, LocalJob, Transcription, make_engine
+
+# Test Database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+def queue_jobs(db, count, session_factory=TestingSessionLocal):
+    ids = [f"job-{i}" for i in range(count)]
+    for i, task_id in enumerate(ids):
+        db.add(Transcription(id=task_id, status="queued", created_at=datetime(2026, 1, 1, tzinfo=UTC) + timedelta(seconds=i)))
+    db.commit()
+    for task_id in ids:
+        executor.submit(f"/tmp/{task_id}.wav", "auto", "csv", task_id, False, session_factory=session_factory)
+    return ids
+
+def test_executor_mode(monkeypatch):
+    monkeypatch.delenv("JOB_EXECUTOR", raising=False)
+    monkeypatch.delenv("VERCEL", raising=False)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    assert executor.executor_mode() == "background"
+    monkeypatch.setenv("REDIS_URL", "redis://localhost")
+    assert executor.executor_mode() == "celery"
+    monkeypatch.setenv("JOB_EXECUTOR", "local")
+    assert executor.executor_mode() == "local"
+
+def test_claim_next_takes_oldest_job_once(db_session):
+    queue_jobs(db_session, 2)
+    first = executor.claim_next("w1", session_factory=TestingSessionLocal)
+    second = executor.claim_next("w2", session_factory=TestingSessionLocal)
+    assert (first["task_id"], second["task_id"]) == ("job-0", "job-1")
+    assert first["attempts"] == 1 and first["format"] == "csv"
+    assert executor.claim_next("w3", session_factory=TestingSessionLocal) is None
+    job = db_session.query(LocalJob).filter(LocalJob.task_id == "job-0").one()
+    assert (job.status, job.worker) == ("claimed", "w1")
+
+def test_concurrent_claims_on_sqlite_file_never_overlap(tmp_path):
+    file_engine = make_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+    Base.metadata.create_all(bind=file_engine)
+    Session = sessionmaker(bind=file_engine)
+    with Session() as db:
+        queue_jobs(db, 20, session_factory=Session)
+
+    claimed = []
+    def claim_all(name):
+        while (job := executor.claim_next(name, session_factory=Session)) is not None:
+            claimed.append(job["task_id"])
+
+    threads = [threading.Thread(target=claim_all, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(f"job-{i}" for i in range(20))
+    assert (tmp_path / "queue.db.queue-lock").exists()
+    file_engine.dispose()
+
+def test_recover_stale_requeues_then_fails(db_session, tmp_path, monkeypatch):
+    from backend.src.metrics import REGISTRY
+    monkeypatch.setattr(executor, "MAX_ATTEMPTS", 2)
+    failures = REGISTRY.get_sample_value("avtranscribe_job_failures_total", {"mode": "local"}) or 0
+    queue_jobs(db_session, 1)
+    later = datetime.now(UTC) + timedelta(seconds=executor.LEASE_SECONDS + 1)
+
+    executor.claim_next("w1", session_factory=TestingSessionLocal)
+    assert executor.recover_stale(datetime.now(UTC), session_factory=TestingSessionLocal) == 0
+    assert executor.recover_stale(later, session_factory=TestingSessionLocal) == 1
+    db_session.expire_all()
+    assert db_session.get(LocalJob, "job-0").status == "queued"
+    assert db_session.get(Transcription, "job-0").status == "retrying (1/2)"
+
+    executor.claim_next("w2", session_factory=TestingSessionLocal)
+    with patch("backend.src.executor.send_error_email") as email:
+        executor.recover_stale(later, session_factory=TestingSessionLocal)
+    email.assert_called_once()
+    assert REGISTRY.get_sample_value("avtranscribe_job_failures_total", {"mode": "local"}) == failures + 1
+    db_session.expire_all()
+    assert db_session.get(LocalJob, "job-0") is None
+    trans = db_session.get(Transcription, "job-0")
+    assert trans.status == "failed"
+    assert "2 times" in trans.error_message
+
+def test_release_worker_requeues_only_its_job(db_session):
+    queue_jobs(db_session, 2)
+    executor.claim_next("dead", session_factory=TestingSessionLocal)
+    executor.claim_next("alive", session_factory=TestingSessionLocal)
+    assert executor.release_worker("dead", session_factory=TestingSessionLocal) == 1
+    db_session.expire_all()
+    assert db_session.get(LocalJob, "job-0").status == "queued"
+    assert db_session.get(LocalJob, "job-1").status == "claimed"
+
+def test_run_job_runs_pipeline_and_removes_queue_row(db_session):
+    queue_jobs(db_session, 1)
+    job = executor.claim_next("w1", session_factory=TestingSessionLocal)
+    with patch("backend.src.main.run_transcription_sync") as run:
+        executor.run_job(job, "w1", session_factory=TestingSessionLocal)
+    run.assert_called_once_with("/tmp/job-0.wav", "auto", "csv", "job-0", False, mode="local")
+    db_session.expire_all()
+    assert db_session.get(LocalJob, "job-0") is None
+
+@contextmanager
+def scoped_test_session():
+    session = TestingSessionLocal()
+    try:
+        yield session
+        session.commit()
+    finally:
+        session.close()
+
+def test_run_job_fails_cleanly_when_input_is_gone(db_session):
+    queue_jobs(db_session, 1)
+    job = executor.claim_next("w1", session_factory=TestingSessionLocal)
+    with patch("backend.src.main.session_scope", scoped_test_session), \
+            patch("backend.src.main.transcribe_with_whisper") as transcribe, \
+            patch("backend.src.main.send_error_email") as email:
+        executor.run_job(job, "w1", session_factory=TestingSessionLocal)
+    transcribe.assert_not_called()
+    email.assert_not_called()
+    db_session.expire_all()
+    trans = db_session.get(Transcription, "job-0")
+    assert trans.status == "failed"
+    assert "no longer available" in trans.error_message
+    assert db_session.get(LocalJob, "job-0") is None
+
+def test_requeued_job_resumes_from_checkpoint(db_session, tmp_path, monkeypatch):
+    monkeypatch.setenv("SPOOL_DIR", str(tmp_path))
+    media = tmp_path / "job-0.wav"
+    media.write_bytes(b"RIFF")
+    checkpoint = {"offset": 2.0, "segments": [{"start": 0.0, "end": 2.0, "text": "First"}], "language": "en"}
+    db_session.add(Transcription(id="job-0", status="retrying (1/3)", duration=4.0, checkpoint=checkpoint))
+    db_session.commit()
+    executor.submit(str(media), "en", "csv", "job-0", False, session_factory=TestingSessionLocal)
+    job = executor.claim_next("w1", session_factory=TestingSessionLocal)
+
+    def finish_rest(file_path, resume_from=None, on_checkpoint=None, **kwargs):
+        assert resume_from == checkpoint
+        segments = resume_from["segments"] + [{"start": 2.0, "end": 4.0, "text": "Second"}]
+        return {"text": "First Second", "segments": segments, "language": "en"}
+
+    with patch("backend.src.main.session_scope", scoped_test_session), \
+            patch("backend.src.main.transcribe_with_whisper", side_effect=finish_rest):
+        executor.run_job(job, "w1", session_factory=TestingSessionLocal)
+    db_session.expire_all()
+    trans = db_session.get(Transcription, "job-0")
+    assert (trans.status, trans.progress, trans.attempt_offset) == ("done", 2, 2.0)
+    assert trans.checkpoint is None
+    assert not media.exists()
+
+def test_pool_purges_expired_artifacts(monkeypatch):
+    monkeypatch.setattr(executor, "CLEANUP_SECONDS", 0)
+    monkeypatch.setattr(executor, "LEASE_SECONDS", 0.1)
+    purges = []
+
+    class Context:
+        def Event(self):
+            return threading.Event()
+
+        def Process(self, target, args, name):
+            return type("Worker", (), {"start": lambda self: None, "is_alive": lambda self: True, "join": lambda self: None})()
+
+    def purge():
+        purges.append(True)
+        if len(purges) == 2:
+            # The first purge runs at startup, the second from the loop; then stop the pool
+            signal.raise_signal(signal.SIGTERM)
+        return 0
+
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        with patch("backend.src.executor.ensure_schema"), patch("backend.src.executor.recover_stale"), \
+                patch("backend.src.executor.multiprocessing.get_context", return_value=Context()), \
+                patch("backend.src.executor.purge_expired", side_effect=purge):
+            executor.run_pool(1)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    assert len(purges) == 2
+
+def test_enqueue_job_uses_local_queue(monkeypatch):
+    from backend.src import main
+    monkeypatch.setenv("JOB_EXECUTOR", "local")
+    with patch("backend.src.main.submit_local_job") as submit:
+        main.enqueue_job(None, "/tmp/a.wav", "en", "csv", "job-9", True)
+    submit.assert_called_once_with("/tmp/a.wav", "en", "csv", "job-9", True)
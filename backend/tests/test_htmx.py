@@ -69,6 +69,23 @@ def test_status_polling_processing(client, db_session):
     assert "Transcribing Media" in response.text
     assert "3 segments processed so far" in response.text
 
+def test_status_processing_shows_audio_fraction_and_eta(client, db_session):
+    from datetime import UTC, datetime, timedelta
+    task_id = str(uuid.uuid4())
+    # 60 of 600 s covered in 30 s: RTF 0.5, so 270 s left
+    trans = Transcription(
+        id=task_id, status="processing", progress=12, duration=600.0, audio_done=60.0, attempt_offset=0.0,
+        started_at=datetime.now(UTC) - timedelta(seconds=30)
+    )
+    db_session.add(trans)
+    db_session.commit()
+
+    response = client.get(f"/status/{task_id}")
+    assert "12 segments processed so far" in response.text
+    assert "10% of the audio transcribed" in response.text
+    assert "about" in response.text and "min left" in response.text
+    assert 'style="width: 10%"' in response.text
+
 def test_status_no_polling_done(client, db_session):
     task_id = str(uuid.uuid4())
     trans = Transcription(id=task_id, status="done", progress=10)
@@ -0,0 +1,109 @@
+import pytest
+from datetime import UTC, datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.src.main import app, get_db
+from backend.src.models import Base, Transcription, User
+
+# Test Database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def users(db_session):
+    alice = User(username="alice", hashed_password="x")
+    bob = User(username="bob", hashed_password="x")
+    db_session.add_all([alice, bob])
+    db_session.commit()
+    return alice, bob
+
+@pytest.fixture(scope="function")
+def client_for(db_session):
+    from backend.src.main import get_current_user as gcu
+
+    def override_get_db():
+        yield db_session
+
+    def make(user):
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[gcu] = lambda: user
+        return TestClient(app)
+    yield make
+    app.dependency_overrides.clear()
+
+def _add_jobs(db, user, count, status="done"):
+    base = datetime(2024, 1, 1, tzinfo=UTC)
+    for i in range(count):
+        db.add(Transcription(
+            id=f"{user.username}-{i:03d}", status=status, user_id=user.id,
+            filename=f"file{i}.mp3", text="x" * 100, created_at=base + timedelta(minutes=i // 2)
+        ))
+    db.commit()
+
+def test_jobs_pages_newest_first_without_gaps(db_session, users, client_for):
+    alice, bob = users
+    # Pairs share a created_at, so the id tie-breaker is exercised at page boundaries
+    _add_jobs(db_session, alice, 7)
+    _add_jobs(db_session, bob, 3)
+    client = client_for(alice)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/jobs", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        seen.extend(job["task_id"] for job in body["jobs"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [f"alice-{i:03d}" for i in reversed(range(7))]
+    job = body["jobs"][-1]
+    assert job["filename"] == "file0.mp3"
+    assert "text" not in job
+
+def test_jobs_filters_by_status(db_session, users, client_for):
+    alice, _ = users
+    _add_jobs(db_session, alice, 2)
+    db_session.add(Transcription(id="alice-running", status="processing", user_id=alice.id, filename="a.mp3"))
+    db_session.commit()
+
+    response = client_for(alice).get("/jobs", params={"status_filter": "processing"})
+    assert [job["task_id"] for job in response.json()["jobs"]] == ["alice-running"]
+    assert response.json()["next_cursor"] is None
+
+def test_jobs_rejects_bad_cursor(users, client_for):
+    alice, _ = users
+    response = client_for(alice).get("/jobs", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_jobs_query_uses_user_index(db_session, users):
+    alice, _ = users
+    plan = db_session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id, filename, status FROM transcriptions "
+        "WHERE user_id = :user AND (created_at, id) < (:created_at, :id) "
+        "ORDER BY created_at DESC, id DESC LIMIT 20"
+    ), {"user": alice.id, "created_at": "2024-01-01", "id": "x"}).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_transcriptions_user_id_created_at" in detail
+    assert "TEMP B-TREE" not in detail
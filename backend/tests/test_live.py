@@ -0,0 +1,173 @@
+import json
+from contextlib import contextmanager
+import struct
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.src import live
+from backend.src.live import LiveSession
+from backend.src.main import app, get_db
+from backend.src.models import Base, Transcription, User
+
+# Test Database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(autouse=True)
+def plain_samples(monkeypatch):
+    # The stub model reads sample counts, so numpy conversion is not needed
+    monkeypatch.setattr(live, "pcm16_to_float32", lambda samples: samples)
+
+class StubModel:
+    """One segment per whole second of buffered audio."""
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append(kwargs)
+        seconds = len(audio) // 16000
+        return iter([SimpleNamespace(start=float(i), end=float(i + 1), text=f" s{i}") for i in range(seconds)]), SimpleNamespace(language="en")
+
+def pcm(seconds: float) -> bytes:
+    return struct.pack(f"<{int(seconds * 16000)}h", *([0] * int(seconds * 16000)))
+
+def test_feed_signals_a_decode_every_step():
+    session = LiveSession(StubModel(), step=1.0)
+    assert not session.feed(pcm(0.5))
+    # An odd byte count is carried over, not dropped
+    assert not session.feed(pcm(0.25) + b"\x01")
+    assert session.feed(b"\x00" + pcm(0.25))
+    assert session.received == 16001
+
+def test_decode_settles_all_but_last_segment():
+    session = LiveSession(StubModel(), window=15)
+    session.feed(pcm(3))
+    messages = session.decode()
+    assert [m["type"] for m in messages] == ["final", "final", "partial"]
+    assert messages[-1]["text"] == " s2"
+    # Buffer now starts where the partial segment starts
+    assert session.buffer_start == 2.0
+    assert len(session.buffer) == 16000
+    assert session.language == "en"
+
+    session.feed(pcm(1))
+    messages = session.decode()
+    assert [(m["type"], m["start"]) for m in messages] == [("final", 2.0), ("partial", 3.0)]
+    # Settled text so far primes the next window
+    assert session.model.calls[-1]["initial_prompt"] == " s0 s1"
+
+def test_decode_finalises_at_window_and_end():
+    session = LiveSession(StubModel(), window=2)
+    session.feed(pcm(2))
+    assert [m["type"] for m in session.decode()] == ["final", "final"]
+    assert len(session.buffer) == 0
+
+    session = LiveSession(StubModel())
+    session.feed(pcm(1.5))
+    assert [m["type"] for m in session.decode(final=True)] == ["final"]
+    assert [s["text"] for s in session.segments] == [" s0"]
+
+@contextmanager
+def scoped_test_session():
+    session = TestingSessionLocal()
+    try:
+        yield session
+        session.commit()
+    finally:
+        session.close()
+
+def test_live_websocket_saves_a_done_job(db_session, tmp_path, monkeypatch):
+    from backend.src.main import get_websocket_user
+    monkeypatch.setenv("SPOOL_DIR", str(tmp_path))
+    user = User(username="speaker", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+
+    app.dependency_overrides[get_websocket_user] = lambda: user
+    try:
+        with patch("backend.src.main.get_model", return_value=StubModel()), \
+                patch("backend.src.main.session_scope", scoped_test_session):
+            with TestClient(app).websocket_connect("/live?language=en") as ws:
+                ready = ws.receive_json()
+                assert ready["type"] == "ready"
+                ws.send_bytes(pcm(2))
+                assert [ws.receive_json()["type"] for _ in range(2)] == ["final", "partial"]
+                ws.send_text(json.dumps({"type": "stop"}))
+                messages = []
+                while True:
+                    messages.append(ws.receive_json())
+                    if messages[-1]["type"] == "done":
+                        break
+    finally:
+        app.dependency_overrides.clear()
+
+    assert messages[-1]["task_id"] == ready["task_id"]
+    trans = db_session.query(Transcription).filter(Transcription.id == ready["task_id"]).first()
+    assert trans.status == "done"
+    assert trans.user_id == user.id
+    # The last second was re-decoded on its own, so the stub numbers it from zero again
+    assert trans.text == "s0 s0"
+    assert trans.duration == 2.0
+
+def test_live_websocket_requires_token(db_session):
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        with pytest.raises(Exception):
+            with TestClient(app).websocket_connect("/live") as ws:
+                ws.receive_json()
+    finally:
+        app.dependency_overrides.clear()
+
+def test_live_websocket_saves_audio_when_a_decode_fails(db_session, tmp_path, monkeypatch):
+    from backend.src.main import get_websocket_user
+    monkeypatch.setenv("SPOOL_DIR", str(tmp_path))
+    user = User(username="speaker", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+
+    class FailingOnce(StubModel):
+        calls = 0
+        def transcribe(self, audio, **kwargs):
+            FailingOnce.calls += 1
+            if FailingOnce.calls == 1:
+                raise RuntimeError("decoder crashed")
+            return super().transcribe(audio, **kwargs)
+
+    app.dependency_overrides[get_websocket_user] = lambda: user
+    try:
+        with patch("backend.src.main.get_model", return_value=FailingOnce()), \
+                patch("backend.src.main.session_scope", scoped_test_session):
+            # Two-letter codes are accepted here as they are by /transcribe
+            with pytest.raises(RuntimeError, match="decoder crashed"):
+                with TestClient(app).websocket_connect("/live?language=sv") as ws:
+                    ready = ws.receive_json()
+                    ws.send_bytes(pcm(2))
+                    ws.receive_json()
+    finally:
+        app.dependency_overrides.clear()
+
+    trans = db_session.query(Transcription).filter(Transcription.id == ready["task_id"]).first()
+    assert trans.status == "done"
+    assert trans.duration == 2.0
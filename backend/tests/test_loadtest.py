@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+from benchmarks.loadtest import SCENARIO_DIR, Recorder, load_scenario, percentile, run
+
+def test_percentile_nearest_rank():
+    values = sorted(float(i) for i in range(1, 101))
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+def test_recorder_summary():
+    recorder = Recorder()
+    recorder.record("/status/{task_id}", 0.010, True)
+    recorder.record("/status/{task_id}", 0.020, False)
+    summary = recorder.summary()
+    assert summary["requests"] == 2
+    assert summary["error_rate"] == 0.5
+    assert summary["routes"]["/status/{task_id}"]["p99_ms"] == 20.0
+
+def test_load_scenario_fills_defaults(tmp_path):
+    path = tmp_path / "scenario.yaml"
+    path.write_text("name: tiny\npollers:\n  count: 3\n")
+    scenario = load_scenario(str(path))
+    assert scenario["pollers"] == {"count": 3, "interval": 5, "accept": "html"}
+    assert scenario["uploads"]["per_minute"] == 0
+
+def test_run_smoke_scenario():
+    scenario = load_scenario(os.path.join(SCENARIO_DIR, "smoke.yaml"))
+    scenario["duration"] = 1
+    summary = run(scenario)
+    assert summary["error_rate"] == 0.0
+    assert {"/login", "/transcribe", "/status/{task_id}"} <= set(summary["routes"])
+
+def test_main_runs_against_a_fresh_database(tmp_path):
+    # A new process, so the engine is built from this DB_URL with no tables yet
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "DB_URL": f"sqlite:///{tmp_path / 'fresh.db'}"}
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.loadtest", os.path.join(SCENARIO_DIR, "smoke.yaml"),
+         "--duration", "1", "--output", str(tmp_path / "report.json")],
+        cwd=backend_dir, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "report.json").exists()
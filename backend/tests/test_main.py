@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from backend.src.main import app, get_db
@@ -8,6 +8,7 @@ from backend.src.models import Base, Transcription, User
 from backend.src.auth import get_current_user
 from unittest.mock import patch, MagicMock
 import os
+from datetime import UTC, datetime, timedelta
 
 # Test Database setup
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -124,11 +125,74 @@ def test_get_status_success(client, db_session):
     assert "processing" in response.text
     assert "5 segments" in response.text
 
+def test_get_status_debug_timings(client, db_session):
+    task_id = str(uuid.uuid4())
+    trans = Transcription(id=task_id, status="done", progress=2, timings={"upload_spool": 1.5, "inference": 820.0})
+    db_session.add(trans)
+    db_session.commit()
+
+    response = client.get(f"/status/{task_id}?debug=true")
+    assert response.status_code == 200
+    assert response.json()["timings"] == {"upload_spool": 1.5, "inference": 820.0}
+
+def test_bulk_status(client, db_session):
+    old, fresh, unknown = (str(uuid.uuid4()) for _ in range(3))
+    db_session.add_all([
+        Transcription(id=old, status="done", progress=10, updated_at=datetime(2024, 1, 1)),
+        Transcription(id=fresh, status="processing", progress=3, updated_at=datetime(2024, 6, 1)),
+    ])
+    db_session.commit()
+
+    response = client.post("/status/bulk", json={"task_ids": [old, fresh, unknown]})
+    assert response.status_code == 200
+    body = response.json()
+    assert {t["task_id"]: t["status"] for t in body["tasks"]} == {old: "done", fresh: "processing"}
+    assert body["missing"] == [unknown]
+    assert "as_of" in body
+
+    response = client.post("/status/bulk", json={"task_ids": [old, fresh], "changed_since": "2024-03-01T00:00:00Z"})
+    body = response.json()
+    assert [t["task_id"] for t in body["tasks"]] == [fresh]
+    assert "missing" not in body
+
+def test_bulk_status_as_of_overlaps_late_commits(client, db_session):
+    from backend.src.main import BULK_STATUS_OVERLAP
+    seen, late = str(uuid.uuid4()), str(uuid.uuid4())
+    now = datetime.now(UTC).replace(tzinfo=None)
+    db_session.add(Transcription(id=seen, status="processing", progress=1, updated_at=now - timedelta(seconds=1)))
+    db_session.commit()
+    body = client.post("/status/bulk", json={"task_ids": [seen, late]}).json()
+    as_of = datetime.fromisoformat(body["as_of"])
+    assert as_of == now - timedelta(seconds=1) - BULK_STATUS_OVERLAP
+
+    # Stamped before the previous response was built but committed after it
+    db_session.add(Transcription(id=late, status="processing", progress=1, updated_at=now - timedelta(seconds=2)))
+    db_session.commit()
+    body = client.post("/status/bulk", json={"task_ids": [seen, late], "changed_since": body["as_of"]}).json()
+    assert {t["task_id"] for t in body["tasks"]} == {seen, late}
+    assert datetime.fromisoformat(body["as_of"]) >= as_of
+
+def test_bulk_status_invalid_id(client):
+    response = client.post("/status/bulk", json={"task_ids": ["not-a-uuid"]})
+    assert response.status_code == 422
+
 def test_get_status_not_found(client):
     random_uuid = str(uuid.uuid4())
     response = client.get(f"/status/{random_uuid}")
     assert response.status_code == 404
 
+def test_payload_columns_are_deferred(db_session):
+    db_session.add(Transcription(id="deferred-job", status="done", text="x" * 10000, checkpoint={"offset": 1.0}))
+    db_session.commit()
+    db_session.expunge_all()
+
+    trans = db_session.query(Transcription).filter(Transcription.id == "deferred-job").first()
+    loaded = inspect(trans).dict
+    assert "status" in loaded
+    assert not {"text", "translation", "timings", "checkpoint"} & set(loaded)
+    # Still available on access
+    assert len(trans.text) == 10000
+
 def test_download_text_success(client, db_session):
     task_id = str(uuid.uuid4())
     trans = Transcription(id=task_id, status="done", text="Transcription text")
@@ -165,6 +229,50 @@ def test_download_csv_success(client, db_session):
         if os.path.exists(csv_path):
             os.remove(csv_path)
 
+def test_download_translation(client, db_session, tmp_path):
+    task_id = str(uuid.uuid4())
+    csv_path = tmp_path / "translation.csv"
+    csv_path.write_text("start,end,text\n0,1,Hello\n")
+    db_session.add(Transcription(
+        id=task_id, status="done", task="both", text="Hallo", translation="Hello",
+        translation_csv_path=str(csv_path), timings={"audio_decode": 40.0, "inference": 900.0}
+    ))
+    db_session.commit()
+
+    response = client.get(f"/download/{task_id}/csv?output=translation")
+    assert response.status_code == 200
+    assert "translation.csv" in response.headers["content-disposition"]
+    assert "Hello" in response.text
+
+    response = client.get(f"/download/{task_id}/text?output=translation")
+    assert response.text == "Hello"
+
+    assert client.get(f"/status/{task_id}?debug=true").json()["dual_output_saved_ms"] == 40.0
+
+def test_download_translation_missing(client, db_session):
+    task_id = str(uuid.uuid4())
+    db_session.add(Transcription(id=task_id, status="done", text="Hello"))
+    db_session.commit()
+
+    assert client.get(f"/download/{task_id}/text?output=translation").status_code == 404
+
+def test_transcript_range(client, db_session):
+    from backend.src.timeindex import write_time_index
+    task_id = str(uuid.uuid4())
+    segments = [{"start": float(i), "end": float(i + 1), "text": f"Segment {i}"} for i in range(100)]
+    index_path = write_time_index(segments, None, task_id)
+    db_session.add(Transcription(id=task_id, status="done", index_path=index_path))
+    db_session.commit()
+
+    try:
+        response = client.get(f"/transcript/{task_id}/range?t0=10.5&t1=12")
+        assert response.status_code == 200
+        assert [s["text"] for s in response.json()["segments"]] == ["Segment 10", "Segment 11"]
+        assert client.get(f"/transcript/{task_id}/range?level=words").status_code == 404
+        assert client.get(f"/transcript/{task_id}/range?t0=5&t1=1").status_code == 400
+    finally:
+        os.remove(index_path)
+
 def test_download_not_complete(client, db_session):
     task_id = str(uuid.uuid4())
     trans = Transcription(id=task_id, status="queued")
@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime, timedelta, UTC
+from fastapi.testclient import TestClient
+from backend.src.main import app
+from backend.src.metrics import REGISTRY, observe_queue_wait
+
+client = TestClient(app)
+
+def _sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+def test_metrics_endpoint():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "text/plain" in response.headers["content-type"]
+    assert "avtranscribe_progress_writes_total" in response.text
+
+def test_request_latency_labelled_by_route_template():
+    labels = {"method": "GET", "route": "/status/{task_id}", "status": "404"}
+    before = _sample("avtranscribe_http_request_duration_seconds_count", labels)
+    client.get(f"/status/{uuid.uuid4()}")
+    after = _sample("avtranscribe_http_request_duration_seconds_count", labels)
+    assert after == before + 1
+
+def test_observe_queue_wait():
+    before = _sample("avtranscribe_queue_wait_seconds_count")
+    observe_queue_wait(datetime.now(UTC).replace(tzinfo=None) - timedelta(seconds=5))
+    observe_queue_wait(None)
+    assert _sample("avtranscribe_queue_wait_seconds_count") == before + 1
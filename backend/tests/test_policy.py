@@ -0,0 +1,84 @@
+import os
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.src.models import Base, Transcription
+from backend.src.policy import choose_for_job, queue_backlog, route_model, select_model
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(autouse=True)
+def policy_env():
+    with patch.dict(os.environ, {"WHISPER_MODEL": "small", "ACCURATE_WHISPER_MODEL": "large-v3"}):
+        for key in ("LANGUAGE_MODELS", "ENGLISH_ONLY_MODELS", "MODEL_POLICY", "BACKLOG_HIGH", "BACKLOG_CRITICAL", "LONG_MEDIA_SECONDS"):
+            os.environ.pop(key, None)
+        yield
+
+def test_select_model_idle_uses_tier():
+    assert select_model("balanced", 60, 0)["model"] == "small"
+    assert select_model("accurate", 60, 0)["model"] == "large-v3"
+    assert select_model(None, None, 0)["model"] == "small"
+
+def test_select_model_steps_down_under_load():
+    assert select_model("accurate", 60, 10)["model"] == "medium"
+    critical = select_model("accurate", 60, 50)
+    assert critical["model"] == "small"
+    assert critical["compute_type"] == "int8"
+    # Long files give way first
+    assert select_model("accurate", 7200, 10)["model"] == "small"
+    assert select_model("balanced", 7200, 0)["model"] == "small"
+    assert select_model("fast", 60, 500)["model"] == "tiny"
+
+def test_select_model_fixed_policy():
+    with patch.dict(os.environ, {"MODEL_POLICY": "fixed"}):
+        assert select_model("balanced", 7200, 500) == {"model": "small", "compute_type": None, "reason": "tier:balanced"}
+
+def test_queue_backlog(db_session):
+    db_session.add_all([
+        Transcription(id="a", status="queued"),
+        Transcription(id="b", status="retrying (1/3)"),
+        Transcription(id="c", status="processing"),
+        Transcription(id="d", status="done"),
+    ])
+    db_session.commit()
+    assert queue_backlog(db_session) == 2
+
+@patch("backend.src.policy.probe_duration", return_value=4000.0)
+def test_choose_for_job_records_choice(mock_probe, db_session):
+    db_session.add_all([Transcription(id=f"q{i}", status="queued") for i in range(10)])
+    trans = Transcription(id="job", status="queued", quality="accurate")
+    db_session.add(trans)
+    db_session.commit()
+
+    choice = choose_for_job(db_session, trans, "/tmp/long.mp3")
+
+    # 10 other jobs waiting plus a long file: two steps down from large-v3
+    assert choice["model"] == "small"
+    assert trans.model_name == "small"
+    assert trans.duration == 4000.0
+
+def test_route_model():
+    assert route_model("small", "en") == "small.en"
+    assert route_model("small", "en", task="translate") == "small"
+    assert route_model("large-v3", "en") == "large-v3"
+    assert route_model("small", "de") == "small"
+    with patch.dict(os.environ, {"LANGUAGE_MODELS": "en=distil-large-v3, de=large-v3"}):
+        assert route_model("small", "en") == "distil-large-v3"
+        assert route_model("small", "de") == "large-v3"
@@ -0,0 +1,31 @@
+import os
+from unittest.mock import patch
+from src.profiling import StageTimer, maybe_profile, merge_timings
+
+def test_stage_timer_records_milliseconds():
+    timer = StageTimer()
+    with timer.stage("inference"):
+        pass
+    timer.record("export", 0.25)
+    timer.record("export", 0.25)
+    assert "inference" in timer.stages
+    assert timer.stages["export"] == 500.0
+
+def test_stage_timer_update_and_merge():
+    timer = StageTimer()
+    timer.update({"audio_decode": 10.0})
+    timer.update(None)
+    merged = merge_timings({"upload_spool": 3.5}, timer.stages)
+    assert merged == {"upload_spool": 3.5, "audio_decode": 10.0}
+
+def test_maybe_profile_disabled_by_default(tmp_path):
+    with patch("src.profiling.PROFILE_DIR", str(tmp_path)):
+        with maybe_profile("task-1"):
+            sum(range(10))
+    assert os.listdir(tmp_path) == []
+
+def test_maybe_profile_sampled(tmp_path):
+    with patch.dict(os.environ, {"PROFILE_SAMPLE_RATE": "1.0"}), patch("src.profiling.PROFILE_DIR", str(tmp_path)):
+        with maybe_profile("task-2"):
+            sum(range(10))
+    assert os.listdir(tmp_path) == ["task-2.prof"]
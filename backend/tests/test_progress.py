@@ -0,0 +1,37 @@
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from backend.src.progress import attempt_realtime_factor, eta_seconds, progress_fields, progress_fraction
+
+NOW = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+def test_progress_fraction_needs_duration():
+    assert progress_fraction(None, 10.0) is None
+    assert progress_fraction(100.0, None) is None
+    assert progress_fraction(100.0, 25.0) == 0.25
+    # Segment ends can overshoot the probed duration slightly
+    assert progress_fraction(100.0, 101.0) == 1.0
+
+def test_eta_uses_observed_realtime_factor():
+    started = NOW - timedelta(seconds=20)
+    # 40 s of audio in 20 s: RTF 0.5, 60 s of audio left
+    assert eta_seconds(100.0, 40.0, 0.0, started, NOW) == 30.0
+    # Too little audio covered to estimate
+    assert eta_seconds(100.0, 2.0, 0.0, started, NOW) is None
+
+def test_eta_counts_only_the_current_attempt():
+    # Resumed at 50 s; 20 s covered since then in 10 s
+    started = (NOW - timedelta(seconds=10)).replace(tzinfo=None)
+    assert eta_seconds(100.0, 70.0, 50.0, started, NOW) == 15.0
+
+def test_progress_fields_by_status():
+    row = SimpleNamespace(status="queued", duration=100.0, audio_done=None, attempt_offset=None, started_at=None)
+    assert progress_fields(row, NOW) == {"duration": 100.0, "fraction": None, "eta_seconds": None}
+    row.status = "done"
+    assert progress_fields(row, NOW)["fraction"] == 1.0
+
+def test_realtime_factor_counts_only_the_media_this_attempt_covered():
+    assert attempt_realtime_factor(30.0, 60.0, None) == 0.5
+    # Resumed at 40s: 30s of wall time for the remaining 20s of media
+    assert attempt_realtime_factor(30.0, 60.0, 40.0) == 1.5
+    assert attempt_realtime_factor(30.0, 60.0, 60.0) is None
+    assert attempt_realtime_factor(30.0, None, None) is None
@@ -20,3 +20,62 @@ def test_pwa_icon():
     response = client.get("/icon.svg")
     assert response.status_code == 200
     assert "image/svg+xml" in response.headers["content-type"]
+
+def test_pwa_sw_cache_name_follows_build():
+    from src.main import BUILD_HASH
+    response = client.get("/sw.js")
+    assert f"const CACHE_NAME = 'avtranscribe-{BUILD_HASH}';" in response.text
+    assert "avtranscribe-v1" not in response.text
+    assert response.headers["cache-control"] == "no-cache"
+
+def test_pwa_root_files_are_cacheable():
+    response = client.get("/manifest.json")
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    assert "etag" in response.headers
+
+def test_pwa_root_files_revalidate_with_304():
+    first = client.get("/manifest.json")
+    response = client.get("/manifest.json", headers={"If-None-Match": first.headers["etag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    assert client.get("/manifest.json", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    sw = client.get("/sw.js")
+    assert client.get("/sw.js", headers={"If-None-Match": sw.headers["etag"]}).status_code == 304
+
+def test_hashed_assets_are_immutable_and_precompressed(tmp_path):
+    from fastapi import FastAPI
+    from src.static_assets import HashedStaticFiles
+    (tmp_path / "index-abc123.js").write_text("console.log('plain')")
+    (tmp_path / "index-abc123.js.br").write_bytes(b"brotli-bytes")
+    assets_app = FastAPI()
+    assets_app.mount("/assets", HashedStaticFiles(directory=str(tmp_path)), name="assets")
+    assets_client = TestClient(assets_app)
+
+    response = assets_client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert "javascript" in response.headers["content-type"]
+    assert "immutable" in response.headers["cache-control"]
+
+    response = assets_client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text == "console.log('plain')"
+    assert "immutable" in response.headers["cache-control"]
+
+def test_precompressed_asset_revalidates_with_its_encoding(tmp_path):
+    from fastapi import FastAPI
+    from src.static_assets import HashedStaticFiles
+    (tmp_path / "index-abc123.js").write_text("console.log('plain')")
+    (tmp_path / "index-abc123.js.br").write_bytes(b"brotli-bytes")
+    assets_app = FastAPI()
+    assets_app.mount("/assets", HashedStaticFiles(directory=str(tmp_path)), name="assets")
+    assets_client = TestClient(assets_app)
+
+    etag = assets_client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "br"}).headers["etag"]
+    response = assets_client.get("/assets/index-abc123.js", headers={"Accept-Encoding": "br", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "immutable" in response.headers["cache-control"]
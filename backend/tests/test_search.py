@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend.src.main import app, get_db
+from backend.src.models import Base, Transcription, TranscriptSegment, User
+from backend.src.search import fts5_query, index_transcript, search_segments
+
+# Test Database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def users(db_session):
+    alice = User(username="alice", hashed_password="x")
+    bob = User(username="bob", hashed_password="x")
+    db_session.add_all([alice, bob])
+    db_session.commit()
+    return alice, bob
+
+@pytest.fixture(scope="function")
+def client_for(db_session):
+    from backend.src.main import get_current_user as gcu
+
+    def override_get_db():
+        yield db_session
+
+    def make(user):
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[gcu] = lambda: user
+        return TestClient(app)
+    yield make
+    app.dependency_overrides.clear()
+
+def _finish(db, task_id, user, texts, filename="talk.mp3"):
+    db.add(Transcription(id=task_id, status="done", user_id=user.id, filename=filename))
+    segments = [{"start": float(i), "end": float(i + 1), "text": t} for i, t in enumerate(texts)]
+    index_transcript(db, task_id, user.id, segments)
+    db.commit()
+
+def test_fts5_query_quotes_operators():
+    assert fts5_query('budget OR "x" NEAR(y)') == '"budget" "OR" "x" "NEAR" "y"'
+    assert fts5_query("  ") == ""
+
+def test_search_scoped_to_user(db_session, users, client_for):
+    alice, bob = users
+    _finish(db_session, "a1", alice, [" We discussed the budget.", " Then lunch."])
+    _finish(db_session, "b1", bob, [" The budget is private."])
+
+    response = client_for(alice).get("/search?q=budget")
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["task_id"], r["start"], r["text"]) for r in results] == [("a1", 0.0, "We discussed the budget.")]
+
+def test_search_keyset_pagination(db_session, users, client_for):
+    alice, _ = users
+    _finish(db_session, "a1", alice, [f" Item {i} mentions budget." for i in range(5)])
+    client = client_for(alice)
+
+    first = client.get("/search?q=budget&limit=3").json()
+    assert len(first["results"]) == 3
+    second = client.get(f"/search?q=budget&limit=3&after={first['next_after']}").json()
+    assert [r["start"] for r in second["results"]] == [3.0, 4.0]
+    assert second["next_after"] is None
+
+def test_reindex_replaces_segments(db_session, users):
+    alice, _ = users
+    _finish(db_session, "a1", alice, [" old words"])
+    index_transcript(db_session, "a1", alice.id, [{"start": 0.0, "end": 1.0, "text": " new words"}])
+    db_session.commit()
+    assert [s.text for s in db_session.query(TranscriptSegment).all()] == ["new words"]
+    assert search_segments(db_session, alice.id, "old") == []
+    assert len(search_segments(db_session, alice.id, "new")) == 1
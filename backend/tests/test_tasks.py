@@ -24,6 +24,8 @@ def test_transcribe_task_success(
     mock_exists.return_value = True
     
     mock_trans = MagicMock(spec=Transcription)
+    mock_trans.checkpoint = None
+    mock_trans.duration = 60.0
     mock_db.query.return_value.filter.return_value.first.return_value = mock_trans
     
     # Execute
@@ -38,8 +40,46 @@ def test_transcribe_task_success(
     assert mock_trans.text == "Transcribed text"
     assert mock_trans.csv_path == "/tmp/test.csv"
     assert mock_trans.progress == 1
+    assert "export" in mock_trans.timings
     mock_remove.assert_called_once_with("dummy.mp3")
-    mock_transcribe.assert_called_once_with("dummy.mp3", language="en", on_segment=ANY, diarize=True)
+    assert mock_trans.checkpoint is None
+    mock_transcribe.assert_called_once_with(
+        "dummy.mp3", language="en", task=ANY, on_segment=ANY, diarize=True, resume_from=None, on_checkpoint=ANY,
+        model_name=ANY, compute_type=ANY, on_language=ANY, word_timestamps=ANY
+    )
+
+@patch("backend.src.tasks.session_scope")
+@patch("backend.src.tasks.transcribe_with_whisper")
+@patch("backend.src.tasks.clean_to_csv", return_value="/tmp/test.csv")
+@patch("backend.src.tasks.save_timestamped_text", return_value="/tmp/test_timestamps.txt")
+@patch("os.path.exists", return_value=False)
+def test_transcribe_task_resumes_from_checkpoint(
+    mock_exists, mock_save, mock_clean, mock_transcribe, mock_scope, mock_db
+):
+    mock_scope.return_value.__enter__.return_value = mock_db
+    checkpoint = {"offset": 2.0, "segments": [{"start": 0, "end": 2.0, "text": "First"}], "language": "en"}
+    mock_trans = MagicMock(spec=Transcription)
+    mock_trans.checkpoint = checkpoint
+    mock_trans.duration = 3.0
+    mock_db.query.return_value.filter.return_value.first.return_value = mock_trans
+
+    def fake_transcribe(file_path, **kwargs):
+        # Progress picks up from the checkpointed segment count
+        assert mock_trans.progress == 1
+        return {"text": "First Second", "segments": [{"start": 0, "end": 2.0, "text": "First"}, {"start": 2.0, "end": 3.0, "text": " Second"}]}
+    mock_transcribe.side_effect = fake_transcribe
+
+    task_self = MagicMock()
+    task_self.request.retries = 1
+    task_self.max_retries = 3
+
+    transcribe_task.__wrapped__.__func__(task_self, "dummy.mp3", "en", "auto", "task-123")
+
+    assert mock_transcribe.call_args.kwargs["resume_from"] == checkpoint
+    assert mock_trans.status == "done"
+    assert mock_trans.attempt_offset == 2.0
+    assert isinstance(mock_trans.realtime_factor, float)
+    assert mock_trans.checkpoint is None
 
 @patch("backend.src.tasks.session_scope")
 @patch("backend.src.tasks.transcribe_with_whisper")
@@ -70,6 +110,7 @@ def test_transcribe_task_failure_retry(
     mock_exists.return_value = True
     
     mock_trans = MagicMock(spec=Transcription)
+    mock_trans.checkpoint = None
     mock_db.query.return_value.filter.return_value.first.return_value = mock_trans
     
     task_self = MagicMock()
@@ -84,6 +125,57 @@ def test_transcribe_task_failure_retry(
     assert "retrying" in mock_trans.status
     mock_remove.assert_not_called()
 
+@patch("backend.src.tasks.session_scope")
+@patch("backend.src.tasks.transcribe_with_whisper")
+def test_transcribe_task_retry_saves_checkpoint(mock_transcribe, mock_scope, mock_db):
+    mock_scope.return_value.__enter__.return_value = mock_db
+    mock_trans = MagicMock(spec=Transcription)
+    mock_trans.checkpoint = None
+    mock_db.query.return_value.filter.return_value.first.return_value = mock_trans
+
+    def fail_midway(file_path, on_checkpoint=None, **kwargs):
+        on_checkpoint({"offset": 1.0, "segments": [{"start": 0, "end": 1.0, "text": "Done"}], "language": "en"})
+        raise Exception("Worker lost")
+    mock_transcribe.side_effect = fail_midway
+
+    task_self = MagicMock()
+    task_self.request.retries = 0
+    task_self.max_retries = 3
+    task_self.retry.side_effect = Exception("Retry called")
+
+    with pytest.raises(Exception, match="Retry called"):
+        transcribe_task.__wrapped__.__func__(task_self, "dummy.mp3", "en", "auto", "task-123")
+
+    assert mock_trans.checkpoint["offset"] == 1.0
+    assert len(mock_trans.checkpoint["segments"]) == 1
+
+@patch("backend.src.tasks.session_scope")
+@patch("backend.src.tasks.transcribe_with_whisper")
+@patch("backend.src.tasks.send_error_email")
+@patch("os.path.exists", return_value=True)
+@patch("os.remove")
+def test_transcribe_task_input_error_fails_fast(
+    mock_remove, mock_exists, mock_email, mock_transcribe, mock_scope, mock_db
+):
+    from backend.src.transcribe import TranscriptionInputError
+    mock_scope.return_value.__enter__.return_value = mock_db
+    mock_transcribe.side_effect = TranscriptionInputError("Could not decode media file")
+    mock_trans = MagicMock(spec=Transcription)
+    mock_trans.checkpoint = None
+    mock_db.query.return_value.filter.return_value.first.return_value = mock_trans
+
+    task_self = MagicMock()
+    task_self.request.retries = 0
+    task_self.max_retries = 3
+
+    with pytest.raises(TranscriptionInputError):
+        transcribe_task.__wrapped__.__func__(task_self, "dummy.mp3", "en", "auto", "task-123")
+
+    task_self.retry.assert_not_called()
+    assert mock_trans.status == "failed"
+    assert "Invalid media file" in mock_trans.error_message
+    mock_remove.assert_called_once_with("dummy.mp3")
+
 @patch("backend.src.tasks.session_scope")
 @patch("backend.src.tasks.transcribe_with_whisper")
 @patch("os.path.exists")
@@ -97,6 +189,7 @@ def test_transcribe_task_final_failure(
     mock_exists.return_value = True
     
     mock_trans = MagicMock(spec=Transcription)
+    mock_trans.checkpoint = None
     mock_db.query.return_value.filter.return_value.first.return_value = mock_trans
     
     task_self = MagicMock()
@@ -111,32 +204,13 @@ def test_transcribe_task_final_failure(
     assert "Failed after 3 retries" in mock_trans.error_message
     mock_remove.assert_called_once_with("dummy.mp3")
 
-@patch("os.listdir")
-@patch("os.path.getmtime")
-@patch("os.remove")
-@patch("time.time")
-def test_cleanup_temp_files(mock_time, mock_remove, mock_mtime, mock_listdir):
+@patch("backend.src.tasks.purge_expired", return_value=2)
+def test_cleanup_temp_files(mock_purge):
     from backend.src.tasks import cleanup_temp_files
-    # Setup
-    mock_time.return_value = 100000
-    # Files must match pattern {uuid}_{filename} or {uuid}.txt / {uuid}.csv
-    # A UUID is 36 chars.
-    uuid_prefix = "a" * 36
-    mock_listdir.return_value = [f"{uuid_prefix}_old.mp3", f"{uuid_prefix}_new.mp3", "other.log"]
-    
-    def getmtime_side_effect(path):
-        if "old.mp3" in path:
-            return 100000 - (25 * 3600)
-        return 100000 - (1 * 3600)
-    
-    mock_mtime.side_effect = getmtime_side_effect
-    
-    # Execute
+
     cleanup_temp_files()
-    
-    # Assertions
-    mock_remove.assert_called_once()
-    assert "old.mp3" in mock_remove.call_args[0][0]
+
+    mock_purge.assert_called_once_with()
 
 @patch("backend.src.tasks.session_scope")
 def test_update_progress(mock_scope, mock_db):
@@ -152,3 +226,42 @@ def test_update_progress(mock_scope, mock_db):
 
     # Assert
     assert mock_trans.progress == 6
+
+@patch("backend.src.tasks.session_scope")
+def test_update_progress_records_media_position(mock_scope, mock_db):
+    from backend.src.tasks import update_progress
+    mock_scope.return_value.__enter__.return_value = mock_db
+    mock_trans = MagicMock(spec=Transcription)
+    mock_trans.progress = 0
+    mock_trans.audio_done = 12.0
+    mock_db.query.return_value.filter.return_value.first.return_value = mock_trans
+
+    update_progress("task-123", 18.5)
+    assert mock_trans.audio_done == 18.5
+    # Positions never move backwards, e.g. for a late translation segment
+    update_progress("task-123", 3.0)
+    assert mock_trans.audio_done == 18.5
+
+@patch("os.cpu_count", return_value=8)
+def test_tune_model_threads(mock_cpus):
+    from backend.src.tasks import tune_model_threads
+    with patch.dict(os.environ, {}, clear=True):
+        assert tune_model_threads(4, "prefork") == {"cpu_threads": 2, "num_workers": 1}
+    with patch.dict(os.environ, {}, clear=True):
+        assert tune_model_threads(4, "threads") == {"cpu_threads": 2, "num_workers": 4}
+    with patch.dict(os.environ, {"WHISPER_CPU_THREADS": "3"}, clear=True):
+        assert tune_model_threads(16, "prefork")["cpu_threads"] == 3
+
+@patch("backend.src.tasks.get_model")
+def test_prepare_models_preloads_for_thread_pool(mock_get_model):
+    from types import SimpleNamespace
+    from backend.src.tasks import prepare_models
+    with patch.dict(os.environ, {"PRELOAD_MODELS": "base, small"}, clear=True):
+        prepare_models(sender=SimpleNamespace(pool_cls="threads", concurrency=2))
+        assert os.environ["WHISPER_NUM_WORKERS"] == "2"
+    assert [c.args[0] for c in mock_get_model.call_args_list] == ["base", "small"]
+
+    mock_get_model.reset_mock()
+    with patch.dict(os.environ, {"PRELOAD_MODELS": "base"}, clear=True):
+        prepare_models(sender=SimpleNamespace(pool_cls="prefork", concurrency=2))
+    mock_get_model.assert_not_called()
@@ -0,0 +1,51 @@
+import os
+from types import SimpleNamespace
+from backend.src.timeindex import TimeIndex, WordTimeline, write_time_index
+
+def _word(start, end, word):
+    return SimpleNamespace(start=start, end=end, word=word)
+
+def _build(task_id):
+    segments = [
+        {"start": 0.0, "end": 2.0, "text": " Hello there.", "speaker": "SPEAKER_00"},
+        {"start": 2.0, "end": 4.0, "text": " Grüße aus Köln.", "speaker": "SPEAKER_01"},
+        {"start": 4.0, "end": 6.0, "text": " Bye."},
+    ]
+    words = WordTimeline()
+    words.add_segment([_word(0.0, 0.8, " Hello"), _word(0.9, 2.0, " there.")])
+    words.add_segment([_word(0.0, 0.7, " Grüße"), _word(0.8, 1.2, " aus"), _word(1.3, 2.0, " Köln.")], offset=2.0)
+    words.add_segment([_word(4.0, 6.0, " Bye.")])
+    return write_time_index(segments, words, task_id)
+
+def test_time_index_segment_range():
+    path = _build("idx-seg")
+    try:
+        with TimeIndex(path) as index:
+            assert [s["text"] for s in index.segments(1.0, 3.0)] == ["Hello there.", "Grüße aus Köln."]
+            assert index.segments(1.0, 3.0)[1]["speaker"] == "SPEAKER_01"
+            assert [s["text"] for s in index.segments(4.5, 100)] == ["Bye."]
+            assert index.segments(100, 200) == []
+            assert len(index.segments(0, 100, limit=2)) == 2
+    finally:
+        os.remove(path)
+
+def test_time_index_word_range():
+    path = _build("idx-word")
+    try:
+        with TimeIndex(path) as index:
+            assert index.has_words
+            words = index.words(2.5, 3.4)
+            assert [w["word"] for w in words] == [" Grüße", " aus", " Köln."]
+            assert words[0]["start"] == 2.0
+    finally:
+        os.remove(path)
+
+def test_time_index_without_words():
+    path = write_time_index([{"start": 0.0, "end": 5.0, "text": "Long"}, {"start": 1.0, "end": 2.0, "text": "Inner"}], None, "idx-plain")
+    try:
+        with TimeIndex(path) as index:
+            assert not index.has_words
+            # Ends need not be ordered: the long first segment still overlaps t=4
+            assert [s["text"] for s in index.segments(3.0, 4.0)] == ["Long"]
+    finally:
+        os.remove(path)
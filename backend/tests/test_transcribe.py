@@ -37,6 +37,8 @@ def test_transcribe_with_whisper_success(mock_get_model):
     # Assertions
     assert result["text"] == "Hello world"
     mock_model.transcribe.assert_called_once()
+    assert {"model_acquisition", "audio_decode", "inference"} <= set(result["timings"])
+    assert result["model"] == "base"
 
 @patch("src.transcribe.get_model")
 def test_transcribe_with_whisper_on_segment(mock_get_model):
@@ -75,6 +77,120 @@ def test_transcribe_with_whisper_error(mock_get_model):
     
     assert "Whisper error" in str(excinfo.value)
 
+@patch("src.transcribe.load_audio")
+@patch("src.transcribe.get_model")
+def test_transcribe_with_whisper_resume(mock_get_model, mock_load_audio):
+    mock_load_audio.return_value = list(range(5 * 16000))
+    mock_segment = MagicMock(start=0.5, end=1.5, text=" second")
+    mock_model = MagicMock()
+    mock_model.transcribe.return_value = ([mock_segment], MagicMock(language="de"))
+    mock_get_model.return_value = mock_model
+    checkpoints = []
+
+    result = transcribe_with_whisper(
+        "dummy_path.mp3",
+        resume_from={"offset": 2.0, "segments": [{"start": 0.0, "end": 2.0, "text": "first"}], "language": "de"},
+        on_checkpoint=lambda c: checkpoints.append(c["offset"]),
+    )
+
+    audio = mock_model.transcribe.call_args.args[0]
+    assert len(audio) == 3 * 16000
+    assert mock_model.transcribe.call_args.kwargs["language"] == "de"
+    assert mock_model.transcribe.call_args.kwargs["initial_prompt"] == "first"
+    assert result["segments"][1] == {"start": 2.5, "end": 3.5, "text": " second"}
+    assert result["text"] == "first second"
+    assert checkpoints == [3.5]
+
+@patch("src.transcribe.load_audio")
+@patch("src.transcribe.get_model")
+def test_transcribe_with_whisper_language_prepass(mock_get_model, mock_load_audio):
+    mock_load_audio.return_value = list(range(60 * 16000))
+    langid_model, main_model = MagicMock(), MagicMock()
+    langid_model.transcribe.return_value = ([], MagicMock(language="en", language_probability=0.97))
+    main_model.transcribe.return_value = ([MagicMock(start=0.0, end=1.0, text="Hi")], MagicMock(language="en"))
+    mock_get_model.side_effect = lambda name, compute_type=None: langid_model if name == "tiny" else main_model
+    on_language = MagicMock()
+
+    with patch.dict(os.environ, {"WHISPER_MODEL": "small"}):
+        result = transcribe_with_whisper("dummy_path.mp3", on_language=on_language)
+
+    assert len(langid_model.transcribe.call_args.args[0]) == 30 * 16000
+    on_language.assert_called_once_with("en", 0.97, "small.en")
+    assert main_model.transcribe.call_args.kwargs["language"] == "en"
+    assert result["model"] == "small.en"
+    assert result["language_probability"] == 0.97
+    assert "language_fallback" not in result["timings"]
+
+@patch("src.transcribe.load_audio")
+@patch("src.transcribe.get_model")
+def test_transcribe_with_whisper_both(mock_get_model, mock_load_audio):
+    mock_load_audio.return_value = list(range(10 * 16000))
+    mock_model = MagicMock()
+    def fake_transcribe(audio, task="transcribe", **kwargs):
+        text = " Hallo Welt" if task == "transcribe" else " Hello world"
+        return [MagicMock(start=0.0, end=1.0, text=text)], MagicMock(language="de")
+    mock_model.transcribe.side_effect = fake_transcribe
+    mock_get_model.return_value = mock_model
+
+    result = transcribe_with_whisper("dummy_path.mp3", language="de", task="both")
+
+    mock_load_audio.assert_called_once()
+    assert [c.kwargs["task"] for c in mock_model.transcribe.call_args_list] == ["transcribe", "translate"]
+    assert result["text"] == "Hallo Welt"
+    assert result["translation"]["text"] == "Hello world"
+    assert "translation" in result["timings"]
+
+@patch("src.transcribe.load_audio")
+@patch("src.transcribe.get_model")
+def test_transcribe_with_whisper_both_reports_progress_over_two_passes(mock_get_model, mock_load_audio):
+    from src.progress import progress_fraction
+    mock_load_audio.return_value = list(range(10 * 16000))
+    mock_model = MagicMock()
+    def fake_transcribe(audio, task="transcribe", **kwargs):
+        return [MagicMock(start=0.0, end=5.0, text=" a"), MagicMock(start=5.0, end=10.0, text=" b")], MagicMock(language="de")
+    mock_model.transcribe.side_effect = fake_transcribe
+    mock_get_model.return_value = mock_model
+    positions = []
+
+    transcribe_with_whisper("dummy_path.mp3", language="de", task="both", on_segment=positions.append)
+
+    fractions = [progress_fraction(10.0, p) for p in positions]
+    assert fractions == [0.25, 0.5, 0.75, 1.0]
+
+@patch("src.transcribe.load_audio")
+@patch("src.transcribe.get_model")
+def test_transcribe_with_whisper_both_english_reuses_transcript(mock_get_model, mock_load_audio):
+    mock_model = MagicMock()
+    mock_model.transcribe.return_value = ([MagicMock(start=0.0, end=1.0, text="Hello")], MagicMock(language="en"))
+    mock_get_model.return_value = mock_model
+
+    result = transcribe_with_whisper("dummy_path.mp3", language="en", task="both")
+
+    mock_model.transcribe.assert_called_once()
+    assert result["translation"]["text"] == "Hello"
+
+@patch("src.transcribe.load_audio")
+@patch("src.transcribe.get_model")
+def test_transcribe_with_whisper_word_timestamps(mock_get_model, mock_load_audio):
+    words = [MagicMock(start=0.0, end=0.4, word=" Hello"), MagicMock(start=0.5, end=1.0, word=" world")]
+    mock_model = MagicMock()
+    mock_model.transcribe.return_value = ([MagicMock(start=0.0, end=1.0, text=" Hello world", words=words)], MagicMock(language="en"))
+    mock_get_model.return_value = mock_model
+
+    result = transcribe_with_whisper("dummy_path.mp3", language="en", word_timestamps=True)
+
+    assert mock_model.transcribe.call_args.kwargs["word_timestamps"] is True
+    timeline = result["words"]
+    assert list(timeline.starts) == [0.0, 0.5]
+    assert list(timeline.segment_offsets) == [0, 2]
+    assert bytes(timeline.text).decode() == " Hello world"
+
+def test_load_audio_decode_error():
+    from src.transcribe import TranscriptionInputError, load_audio
+    with patch("faster_whisper.decode_audio", side_effect=ValueError("Invalid data found")):
+        with pytest.raises(TranscriptionInputError):
+            load_audio("corrupt.mp3")
+
 @patch("faster_whisper.WhisperModel")
 @patch("torch.cuda.is_available", return_value=False)
 def test_get_model_cpu(mock_cuda, mock_whisper_model):
@@ -89,6 +205,14 @@ def test_get_model_cuda(mock_cuda, mock_whisper_model):
     get_model("base")
     mock_whisper_model.assert_called_once_with("base", device="cuda", compute_type="float16")
 
+@patch("faster_whisper.WhisperModel")
+@patch("torch.cuda.is_available", return_value=False)
+def test_get_model_thread_options(mock_cuda, mock_whisper_model):
+    from src.transcribe import get_model
+    with patch.dict(os.environ, {"WHISPER_CPU_THREADS": "2", "WHISPER_NUM_WORKERS": "4"}):
+        get_model("base")
+    mock_whisper_model.assert_called_once_with("base", device="cpu", compute_type="int8", cpu_threads=2, num_workers=4)
+
 def test_merge_speakers():
     from src.transcribe import merge_speakers
     whisper_segments = [
@@ -104,3 +228,129 @@ def test_merge_speakers():
 
     assert merged[0]["speaker"] == "SPEAKER_00"
     assert merged[1]["speaker"] == "SPEAKER_01" # 2.0-4.0 overlaps 0.5s with SPK00 and 1.5s with SPK01
+
+@patch("faster_whisper.WhisperModel")
+@patch("torch.cuda.is_available", return_value=False)
+def test_get_model_cache_metrics(mock_cuda, mock_whisper_model):
+    from src.metrics import REGISTRY
+    from src.transcribe import get_model
+
+    def sample(result):
+        return REGISTRY.get_sample_value("avtranscribe_model_cache_total", {"model": "tiny", "result": result}) or 0
+
+    hits, misses = sample("hit"), sample("miss")
+    get_model("tiny")
+    get_model("tiny")
+    assert sample("miss") == misses + 1
+    assert sample("hit") == hits + 1
+    mock_whisper_model.assert_called_once()
+
+def _fake_ffmpeg(size):
+    def run(cmd, **kwargs):
+        with open(cmd[-1], "wb") as f:
+            f.write(b"\0" * size)
+    return run
+
+def test_encode_for_api_writes_mono_16k_opus(tmp_path, monkeypatch):
+    from src.transcribe import encode_for_api
+    monkeypatch.delenv("OPENAI_AUDIO_FORMAT", raising=False)
+    monkeypatch.setenv("OPENAI_AUDIO_BITRATE", "24k")
+    source = tmp_path / "talk.wav"
+    source.write_bytes(b"\0" * 10000)
+    with patch("src.transcribe.subprocess.run", side_effect=_fake_ffmpeg(100)) as run:
+        encoded = encode_for_api(str(source))
+    cmd = run.call_args[0][0]
+    assert cmd[cmd.index("-ac") + 1] == "1"
+    assert cmd[cmd.index("-ar") + 1] == "16000"
+    assert cmd[cmd.index("-c:a") + 1] == "libopus"
+    assert cmd[cmd.index("-b:a") + 1] == "24k"
+    assert "-vn" in cmd
+    assert encoded.endswith(".ogg") and os.path.getsize(encoded) == 100
+    os.remove(encoded)
+
+def test_encode_for_api_keeps_original_when_not_smaller_or_failing(tmp_path):
+    from src.transcribe import encode_for_api
+    source = tmp_path / "tiny.ogg"
+    source.write_bytes(b"\0" * 50)
+    with patch("src.transcribe.subprocess.run", side_effect=_fake_ffmpeg(80)):
+        assert encode_for_api(str(source)) is None
+    with patch("src.transcribe.subprocess.run", side_effect=FileNotFoundError("ffmpeg")):
+        assert encode_for_api(str(source)) is None
+
+def test_encode_for_api_writes_to_spool_and_times_out(tmp_path, monkeypatch):
+    import subprocess
+    from src.transcribe import TranscriptionInputError, encode_for_api
+    monkeypatch.delenv("OPENAI_AUDIO_FORMAT", raising=False)
+    spool = tmp_path / "spool"
+    monkeypatch.setattr("src.utils.SPOOL_DIR", str(spool))
+    source = tmp_path / "talk.wav"
+    source.write_bytes(b"\0" * 10000)
+    with patch("src.transcribe.subprocess.run", side_effect=_fake_ffmpeg(100)) as run:
+        encoded = encode_for_api(str(source))
+    assert os.path.dirname(encoded) == str(spool)
+    assert run.call_args.kwargs["timeout"] > 0
+    os.remove(encoded)
+
+    def hang(cmd, **kwargs):
+        _fake_ffmpeg(10)(cmd)
+        raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+    with patch("src.transcribe.subprocess.run", side_effect=hang), pytest.raises(TranscriptionInputError):
+        encode_for_api(str(source))
+    assert list(spool.iterdir()) == []
+
+def test_encode_for_api_disabled(tmp_path, monkeypatch):
+    from src.transcribe import encode_for_api
+    monkeypatch.setenv("OPENAI_AUDIO_FORMAT", "off")
+    with patch("src.transcribe.subprocess.run") as run:
+        assert encode_for_api(str(tmp_path / "talk.wav")) is None
+    run.assert_not_called()
+
+def test_openai_api_uploads_encoded_audio(tmp_path):
+    from src.metrics import REGISTRY
+    from src.transcribe import transcribe_with_openai_api
+    source = tmp_path / "talk.mp4"
+    source.write_bytes(b"\0" * 10000)
+    encoded = tmp_path / "api.ogg"
+    encoded.write_bytes(b"\0" * 1000)
+    client = MagicMock()
+    uploaded = []
+
+    def create(file, **kwargs):
+        uploaded.append(file.name)
+        return MagicMock(model_dump=lambda: {"text": "hi", "language": "en", "duration": 3.0, "segments": []})
+    client.audio.transcriptions.create.side_effect = create
+    client.audio.translations.create.side_effect = create
+
+    before = REGISTRY.get_sample_value("avtranscribe_api_upload_bytes_saved_total") or 0
+    with patch("src.transcribe.encode_for_api", return_value=str(encoded)), patch("openai.OpenAI", return_value=client):
+        result = transcribe_with_openai_api(str(source), task="both")
+
+    assert uploaded == [str(encoded), str(encoded)]
+    assert not encoded.exists()
+    assert "api_encode" in result["timings"]
+    assert REGISTRY.get_sample_value("avtranscribe_api_upload_bytes_saved_total") == before + 2 * 9000
+
+@patch("torch.cuda.is_available", return_value=False)
+def test_get_model_load_does_not_block_other_models(mock_cuda):
+    import threading
+    from src.transcribe import get_model
+    release = threading.Event()
+    loads = []
+
+    def load(name, **kwargs):
+        loads.append(name)
+        if name == "large-v3":
+            assert release.wait(5)
+        return MagicMock(name=name)
+
+    with patch("faster_whisper.WhisperModel", side_effect=load):
+        tiny = get_model("tiny")
+        slow = [threading.Thread(target=get_model, args=("large-v3",)) for _ in range(2)]
+        for t in slow:
+            t.start()
+        # Served from the cache while large-v3 is still loading
+        assert get_model("tiny") is tiny
+        release.set()
+        for t in slow:
+            t.join()
+    assert loads == ["tiny", "large-v3"]
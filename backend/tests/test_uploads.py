@@ -0,0 +1,157 @@
+import hashlib
+import os
+from datetime import datetime, timedelta, UTC
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+from backend.src.main import app, get_db
+from backend.src.models import Base, Transcription, Upload, User
+from backend.src.uploads import chunk_list_digest, has_overlaps, missing_ranges, overlapping_chunk
+
+# Test Database setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db_session():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="function")
+def authenticated_client(db_session):
+    user = User(username="uploader", hashed_password="fakehashedpassword")
+    db_session.add(user)
+    db_session.commit()
+
+    from backend.src.main import get_current_user as gcu
+
+    def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[gcu] = lambda: user
+    app.state.limiter.enabled = False
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+def _create(client, size, filename="talk.wav"):
+    response = client.post("/uploads", data={"filename": filename, "size": size, "language": "en"})
+    assert response.status_code == 201
+    return response.json()["upload_id"]
+
+def test_missing_ranges_and_overlaps():
+    assert missing_ranges([(4, 4), (0, 2)], 10) == [(2, 4), (8, 10)]
+    assert missing_ranges([(0, 5), (5, 5)], 10) == []
+    assert has_overlaps([(0, 5), (4, 2)]) is True
+    assert has_overlaps([(5, 5), (0, 5)]) is False
+    assert overlapping_chunk([(0, 5), (10, 5)], 4, 3) == 0
+    assert overlapping_chunk([(0, 5), (10, 5)], 5, 5) is None
+    # The same offset is a resend, not an overlap
+    assert overlapping_chunk([(0, 5)], 0, 8) is None
+
+@patch("backend.src.main.run_transcription_sync")
+def test_resumable_upload_out_of_order(mock_run, authenticated_client, db_session):
+    data = os.urandom(10_000)
+    upload_id = _create(authenticated_client, len(data))
+
+    # Second half first, as a parallel client might
+    response = authenticated_client.patch(f"/uploads/{upload_id}", content=data[6000:], headers={"Upload-Offset": "6000"})
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == "10000"
+
+    status = authenticated_client.get(f"/uploads/{upload_id}").json()
+    assert status["missing"] == [[0, 6000]]
+    assert status["received"] == 4000
+
+    response = authenticated_client.post(f"/uploads/{upload_id}/finalize", headers={"Accept": "application/json"})
+    assert response.status_code == 409
+
+    authenticated_client.patch(f"/uploads/{upload_id}", content=data[:6000], headers={"Upload-Offset": "0"})
+    response = authenticated_client.post(f"/uploads/{upload_id}/finalize", headers={"Accept": "application/json"})
+    assert response.status_code == 200
+    task_id = response.json()["task_id"]
+
+    upload = db_session.query(Upload).filter(Upload.id == upload_id).first()
+    with open(upload.path, "rb") as f:
+        assert f.read() == data
+    expected = chunk_list_digest([
+        (0, hashlib.sha256(data[:6000]).hexdigest()),
+        (6000, hashlib.sha256(data[6000:]).hexdigest()),
+    ])
+    assert upload.digest == expected
+    assert db_session.query(Transcription).filter(Transcription.id == task_id).first().status == "queued"
+    mock_run.assert_called_once_with(upload.path, "en", "auto", task_id, False)
+    os.remove(upload.path)
+
+def test_upload_chunk_past_declared_size(authenticated_client):
+    upload_id = _create(authenticated_client, 100)
+    response = authenticated_client.patch(f"/uploads/{upload_id}", content=b"x" * 50, headers={"Upload-Offset": "80"})
+    assert response.status_code == 413
+
+def test_create_upload_rejects_bad_type(authenticated_client):
+    response = authenticated_client.post("/uploads", data={"filename": "notes.txt", "size": 10})
+    assert response.status_code == 400
+
+def test_finalize_twice(authenticated_client):
+    upload_id = _create(authenticated_client, 4)
+    authenticated_client.patch(f"/uploads/{upload_id}", content=b"abcd", headers={"Upload-Offset": "0"})
+    with patch("backend.src.main.run_transcription_sync"):
+        assert authenticated_client.post(f"/uploads/{upload_id}/finalize").status_code == 200
+        assert authenticated_client.post(f"/uploads/{upload_id}/finalize").status_code == 409
+
+def test_upload_chunk_refreshes_partial_file_expiry(authenticated_client, db_session):
+    from backend.src.models import Artifact
+    upload_id = _create(authenticated_client, 8)
+    upload = db_session.query(Upload).filter(Upload.id == upload_id).first()
+    artifact = db_session.query(Artifact).filter(Artifact.path == upload.path).first()
+    artifact.expires_at = datetime.now(UTC) + timedelta(minutes=1)
+    db_session.commit()
+
+    authenticated_client.patch(f"/uploads/{upload_id}", content=b"abcd", headers={"Upload-Offset": "0"})
+    db_session.refresh(artifact)
+    assert artifact.expires_at > datetime.now(UTC).replace(tzinfo=None) + timedelta(hours=1)
+    os.remove(upload.path)
+
+def test_overlapping_chunk_is_refused_before_writing(authenticated_client, db_session):
+    upload_id = _create(authenticated_client, 10)
+    authenticated_client.patch(f"/uploads/{upload_id}", content=b"aaaaaa", headers={"Upload-Offset": "0"})
+    response = authenticated_client.patch(f"/uploads/{upload_id}", content=b"bbbbbb", headers={"Upload-Offset": "4"})
+    assert response.status_code == 409
+
+    upload = db_session.query(Upload).filter(Upload.id == upload_id).first()
+    with open(upload.path, "rb") as f:
+        assert f.read(6) == b"aaaaaa"
+    # The client can still complete the upload with the remaining span
+    assert authenticated_client.patch(f"/uploads/{upload_id}", content=b"cccc", headers={"Upload-Offset": "6"}).status_code == 204
+    assert authenticated_client.get(f"/uploads/{upload_id}").json()["missing"] == []
+    os.remove(upload.path)
+
+def test_failed_chunk_write_leaves_span_missing(authenticated_client, db_session):
+    from backend.src.models import UploadChunk
+    upload_id = _create(authenticated_client, 8)
+    with patch("backend.src.main.write_chunk", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            authenticated_client.patch(f"/uploads/{upload_id}", content=b"abcd", headers={"Upload-Offset": "0"})
+    assert db_session.query(UploadChunk).count() == 0
+    assert authenticated_client.get(f"/uploads/{upload_id}").json()["missing"] == [[0, 8]]
+
+def test_upload_chunk_requires_content_length(authenticated_client):
+    upload_id = _create(authenticated_client, 8)
+    response = authenticated_client.patch(
+        f"/uploads/{upload_id}", content=iter([b"abcd"]), headers={"Upload-Offset": "0"}
+    )
+    assert response.status_code == 411
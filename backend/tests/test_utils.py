@@ -1,6 +1,6 @@
 import os
 import pytest
-from src.utils import validate_file, clean_to_csv, save_text
+from src.utils import validate_file, clean_to_csv, save_text, SPOOL_DIR
 from fastapi import UploadFile
 from io import BytesIO
 from starlette.datastructures import Headers
@@ -59,7 +59,7 @@ def test_clean_to_csv():
     csv_path = clean_to_csv(segments, task_id)
     
     assert os.path.exists(csv_path)
-    assert csv_path == f"/tmp/{task_id}.csv"
+    assert csv_path == os.path.join(SPOOL_DIR, f"{task_id}.csv")
     
     with open(csv_path, "r", newline="") as f:
         import csv
@@ -77,7 +77,7 @@ def test_save_text():
     txt_path = save_text(text, task_id)
     
     assert os.path.exists(txt_path)
-    assert txt_path == f"/tmp/{task_id}.txt"
+    assert txt_path == os.path.join(SPOOL_DIR, f"{task_id}.txt")
     
     with open(txt_path, "r") as f:
         content = f.read()
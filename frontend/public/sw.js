@@ -1,3 +1,4 @@
+// The server rewrites this to 'avtranscribe-<build hash>' when serving /sw.js
 const CACHE_NAME = 'avtranscribe-v1';
 const ASSETS_TO_CACHE = [
   '/',
@@ -14,6 +15,15 @@ self.addEventListener('install', (event) => {
   );
 });
 
+// Drop caches left by earlier builds
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys().then((names) => Promise.all(
+      names.filter((name) => name !== CACHE_NAME).map((name) => caches.delete(name))
+    ))
+  );
+});
+
 self.addEventListener('fetch', (event) => {
   // Only cache GET requests
   if (event.request.method !== 'GET') return;
@@ -22,7 +32,12 @@ self.addEventListener('fetch', (event) => {
   const url = new URL(event.request.url);
   if (url.pathname.startsWith('/transcribe') || 
       url.pathname.startsWith('/status') || 
-      url.pathname.startsWith('/download')) {
+      url.pathname.startsWith('/download') ||
+      url.pathname.startsWith('/jobs') ||
+      url.pathname.startsWith('/search') ||
+      url.pathname.startsWith('/transcript') ||
+      url.pathname.startsWith('/uploads') ||
+      url.pathname.startsWith('/batch')) {
     return;
   }
 